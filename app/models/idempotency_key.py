@@ -0,0 +1,32 @@
+from app import db
+from datetime import datetime, timezone
+
+
+class IdempotencyKey(db.Model):
+    """
+    Outcome of a webhook delivery, keyed by the idempotency key of the
+    request, so retried deliveries can be answered without a new fan-out.
+
+    A row without ``status_code`` is a delivery still being processed.
+    """
+
+    __tablename__ = "idempotency_keys"
+
+    key = db.Column(db.String(64), primary_key=True)
+    path = db.Column(db.String(100), nullable=False)
+    status_code = db.Column(db.Integer, nullable=True)
+    response = db.Column(db.JSON, nullable=True)
+    created_at = db.Column(
+        db.DateTime,
+        default=lambda: datetime.now(timezone.utc),
+        index=True,
+    )
+
+    def to_dict(self):
+        return {
+            "key": self.key,
+            "path": self.path,
+            "status_code": self.status_code,
+            "response": self.response,
+            "created_at": self.created_at,
+        }
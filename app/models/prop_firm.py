@@ -1,11 +1,12 @@
 from app import db, TimezoneAwareModel
 from datetime import datetime, timezone
 from app.models.signal import Signal
+from app.models.symbol_specification import SymbolSpecification
 from app.models.user import user_prop_firm
-import importlib
 import logging
 from typing import Optional, List, TYPE_CHECKING
 from sqlalchemy.orm import relationship
+from app.trade_actions.registry import trading_registry
 from app.trade_actions.trade_interface import TradingInterface
 
 logger = logging.getLogger(__name__)
@@ -43,6 +44,13 @@ class PropFirm(TimezoneAwareModel):
         cascade="all, delete-orphan",
     )
 
+    # Broker specifications of the prop firm's symbols
+    symbol_specifications = relationship(
+        SymbolSpecification,
+        lazy="dynamic",
+        cascade="all, delete-orphan",
+    )
+
     # Many-to-many relationship with users
     users = relationship(
         "User",
@@ -51,13 +59,6 @@ class PropFirm(TimezoneAwareModel):
         lazy="dynamic",
     )
 
-    # Note: _trading_instance is set dynamically in __init__
-    # to avoid SQLAlchemy mapping
-
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        self._trading_instance: Optional[TradingInterface] = None
-
     def get_active_trades(self) -> List["Trade"]:
         """Get all active trades for this prop firm"""
         return self.trades.all()
@@ -82,45 +83,15 @@ class PropFirm(TimezoneAwareModel):
 
     @property
     def trading(self) -> Optional[TradingInterface]:
-        """Get or create trading instance based on platform_type"""
-        # Ensure _trading_instance exists (for existing database records)
-        if not hasattr(self, "_trading_instance"):
-            self._trading_instance = None
-
-        if not self._trading_instance and self.platform_type:
-            # Convert platform type to module name
-            # (e.g., 'MT5' -> 'mt5_trading')
-            module_name = f"{self.platform_type.lower()}_trading"
-            # Import the module
-            module = importlib.import_module(f"app.trade_actions.{module_name}")
-            # Get the class
-            # (assumes class name is platform type + 'Trading')
-            class_name = f"{self.platform_type.upper()}Trading"
-            trading_class = getattr(module, class_name)
-            # Create instance
-            self._trading_instance = trading_class(self)
-
-            # Try to connect if we have credentials
-            if self.has_complete_credentials():
-                try:
-                    if self._trading_instance:
-                        self._trading_instance.connect()
-                except Exception as e:
-                    logger.error("Failed to connect trading instance: %s", e)
-
-            # Credentials are now handled through the prop_firm reference
-
-        return self._trading_instance
+        """Get the process-wide trading instance based on platform_type"""
+        return trading_registry.get(self)
 
     def is_connected(self) -> bool:
-        # Implement your logic to check if the connection is active
-        # Ensure _trading_instance exists (for existing database records)
-        if not hasattr(self, "_trading_instance"):
-            self._trading_instance = None
-
-        return (
-            self._trading_instance is not None and self._trading_instance.is_connected()
-        )
+        # Last heartbeat result, the terminal is only probed when the
+        # heartbeat is disabled
+        from app.services.health_monitor import health_monitor
+
+        return health_monitor.is_connected(self)
 
     # When a prop firm is created, the available balance should be
     # set to the full balance
@@ -8,6 +8,18 @@ class Signal(TimezoneAwareModel):
     """
 
     __tablename__ = "signals"
+    __table_args__ = (
+        # Latest identical signal (get_signal_by_parsed); its first three
+        # columns also serve the opposite signals lookup of
+        # identify_old_trades
+        db.Index(
+            "ix_signals_strategy_order_type_ticker_position_size",
+            "strategy",
+            "order_type",
+            "ticker",
+            "position_size",
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     strategy = db.Column(db.String(100), nullable=False)
@@ -15,7 +27,7 @@ class Signal(TimezoneAwareModel):
     contracts = db.Column(db.Float, nullable=False)
     ticker = db.Column(db.String(20), nullable=False)
     position_size = db.Column(db.Float, nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.now(timezone.utc))
+    created_at = db.Column(db.DateTime, default=datetime.now(timezone.utc), index=True)
 
     # Define the relationship with Trade
     prop_firm_associations = db.relationship(
@@ -70,27 +82,9 @@ class Signal(TimezoneAwareModel):
         "\"strategy\":\"Stiff Zone\", \"order\":\"sell\", \"contracts\":\"0.001\", \"ticker\":\"BTCUSDT.P\", \"position_size\":\"-0.001\""
         '"strategy":"Stiff Zone", "order":"sell", "contracts":"0.001", "ticker":"BTCUSDT.P", "position_size":-0.001'
         """
-        try:
-            # Attempt to format the input string to be a valid JSON string
-            formatted_string = "{" + mt_string.strip() + "}"
-            escaped_string = formatted_string.replace("'", '"')
-            # Load the JSON data
-            data = json.loads(escaped_string)
-        except json.JSONDecodeError:
-            formatted_string = "{" + mt_string.strip() + "}"
-            data = json.loads(formatted_string)
-
-        # conversion from 0.461 to 0.46
-        contracts = round(float(data["contracts"]), 2)
-
-        # Create a Trade instance using the extracted data
-        return Signal(
-            strategy=data["strategy"],
-            order_type=data["order"],
-            contracts=max(contracts, 0.01),
-            ticker=data["ticker"],
-            position_size=abs(float(data["position_size"])),
-        )
+        from app.services.signal_parser import parse_signal
+
+        return parse_signal(mt_string).to_signal()
 
     @staticmethod
     def update_matching_trades(
@@ -121,13 +115,21 @@ class Signal(TimezoneAwareModel):
         """
         Get a signal by its MT string
         """
-        new_signal = Signal.from_mt_string(mt_string)
+        from app.services.signal_parser import parse_signal
+
+        return Signal.get_signal_by_parsed(parse_signal(mt_string))
+
+    @staticmethod
+    def get_signal_by_parsed(parsed):
+        """
+        Get the latest signal matching an already parsed MT string
+        """
         existing_signal = (
             Signal.query.filter_by(
-                strategy=new_signal.strategy,
-                order_type=new_signal.order_type,
-                ticker=new_signal.ticker,
-                position_size=new_signal.position_size,
+                strategy=parsed.strategy,
+                order_type=parsed.order_type,
+                ticker=parsed.ticker,
+                position_size=parsed.position_size,
             )
             .order_by(Signal.id.desc())
             .first()
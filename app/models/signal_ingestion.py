@@ -0,0 +1,60 @@
+from app import db, TimezoneAwareModel
+from datetime import datetime, timezone
+
+
+class SignalIngestion(TimezoneAwareModel):
+    """
+    A signal waiting to be (or already) fanned out to the prop firms.
+
+    Rows are written by the webhook routes when running in async ingestion
+    mode and drained by the workers in ``app.services.signal_queue``.
+    """
+
+    __tablename__ = "signal_ingestions"
+
+    QUEUED = "queued"
+    PROCESSING = "processing"
+    DONE = "done"
+    FAILED = "failed"
+
+    id = db.Column(db.Integer, primary_key=True)
+    signal_id = db.Column(
+        db.Integer,
+        db.ForeignKey("signals.id"),
+        nullable=False,
+        index=True,
+    )
+    status = db.Column(
+        db.String(20),
+        nullable=False,
+        default=QUEUED,
+        index=True,
+    )
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    result = db.Column(db.JSON, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(
+        db.DateTime,
+        default=lambda: datetime.now(timezone.utc),
+    )
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    signal = db.relationship("Signal")
+
+    def _format_datetime(self, dt):
+        dt = self.get_datetime_in_timezone(dt)
+        return dt.strftime("%Y-%m-%d %H:%M:%S %z") if dt else None
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "signal_id": self.signal_id,
+            "status": self.status,
+            "attempts": self.attempts,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self._format_datetime(self.created_at),
+            "started_at": self._format_datetime(self.started_at),
+            "finished_at": self._format_datetime(self.finished_at),
+        }
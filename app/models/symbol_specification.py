@@ -0,0 +1,55 @@
+from app import db
+from datetime import datetime, timezone
+
+
+class SymbolSpecification(db.Model):
+    """
+    Broker specification of a symbol (trade pair label) of a prop firm, as
+    reported by the platform, so orders can be validated before sending.
+    """
+
+    __tablename__ = "symbol_specifications"
+
+    prop_firm_id = db.Column(
+        db.Integer,
+        db.ForeignKey("prop_firms.id"),
+        primary_key=True,
+    )
+    symbol = db.Column(
+        db.String(100),
+        primary_key=True,
+    )
+    volume_min = db.Column(db.Float, nullable=False)
+    volume_max = db.Column(db.Float, nullable=False)
+    volume_step = db.Column(db.Float, nullable=False)
+    digits = db.Column(db.Integer, nullable=False)
+    trade_contract_size = db.Column(db.Float, nullable=True)
+    trade_mode = db.Column(db.Integer, nullable=False)
+    # Bitmask of the SYMBOL_FILLING_* flags accepted by the symbol
+    filling_mode = db.Column(db.Integer, nullable=False)
+    visible = db.Column(db.Boolean, nullable=False, default=False)
+    # ORDER_FILLING_* type the last accepted order used
+    learned_filling_type = db.Column(db.Integer, nullable=True)
+    updated_at = db.Column(
+        db.DateTime,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
+
+    def to_dict(self):
+        return {
+            "prop_firm_id": self.prop_firm_id,
+            "symbol": self.symbol,
+            "volume_min": self.volume_min,
+            "volume_max": self.volume_max,
+            "volume_step": self.volume_step,
+            "digits": self.digits,
+            "trade_contract_size": self.trade_contract_size,
+            "trade_mode": self.trade_mode,
+            "filling_mode": self.filling_mode,
+            "visible": self.visible,
+            "learned_filling_type": self.learned_filling_type,
+            "updated_at": (
+                self.updated_at.strftime("%Y-%m-%d %H:%M:%S") if self.updated_at else None
+            ),
+        }
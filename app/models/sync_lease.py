@@ -0,0 +1,36 @@
+from app import db
+from datetime import datetime, timezone
+
+
+class SyncLease(db.Model):
+    """
+    Named lease shared by the gunicorn workers: the holder of ``name`` runs
+    the job (a sync, the sync scheduler) until ``expires_at``, the others
+    wait for it and read the stored ``result``.
+
+    A row without ``owner`` is a lease nobody holds.
+    """
+
+    __tablename__ = "sync_leases"
+
+    name = db.Column(db.String(100), primary_key=True)
+    owner = db.Column(db.String(100), nullable=True)
+    expires_at = db.Column(db.DateTime, nullable=True)
+    started_at = db.Column(
+        db.DateTime,
+        default=lambda: datetime.now(timezone.utc),
+    )
+    finished_at = db.Column(db.DateTime, nullable=True)
+    result = db.Column(db.JSON, nullable=True)
+    # Requests that joined a run instead of starting their own
+    coalesced = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "owner": self.owner,
+            "expires_at": self.expires_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "coalesced": self.coalesced,
+        }
@@ -1,12 +1,31 @@
+import importlib
+from typing import Iterable, List
+
+from sqlalchemy import Column, MetaData, String, Table, and_, delete, exists
+
 from app import db
 from app.models.signal import Signal
 from app.models.prop_firm import PropFirm
 
+# Tickets still open on the prop firm being synced. A temporary table lives
+# in its own connection, so concurrent syncs never see each other's rows;
+# it is kept out of db.metadata, migrations don't know about it.
+sync_open_tickets = Table(
+    "sync_open_tickets",
+    MetaData(),
+    Column("ticket", String(50), primary_key=True),
+    prefixes=["TEMPORARY"],
+)
+
 
 class Trade(db.Model):
     """Helper class for managing signal associations."""
 
     __tablename__ = "trades"
+    __table_args__ = (
+        # Trade of a ticket (sync, /api/trades/close)
+        db.Index("ix_trades_platform_id_prop_firm_id", "platform_id", "prop_firm_id"),
+    )
 
     prop_firm_id = db.Column(
         db.Integer,
@@ -40,6 +59,7 @@ class Trade(db.Model):
     created_at = db.Column(
         db.DateTime,
         default=db.func.now(),
+        index=True,
     )
     ticker = db.Column(
         db.String(10),
@@ -94,39 +114,77 @@ class Trade(db.Model):
         platform_id: str,
         response: dict,
         ticker: str,
+        commit: bool = True,
     ):
         """
         Place a trade with this prop firm.
+
+        The row is upserted in one statement: when a trade already exists
+        for this prop firm / signal pair, e.g. recorded meanwhile by a sync
+        of another worker that saw the new position, it gets the latest
+        execution details instead of failing the composite primary key.
+
+        Pass ``commit=False`` to only stage the change, so several
+        associations can be persisted in a single transaction.
         """
-        # Check if a trade already exists for this prop_firm / signal pair. The
-        # composite primary-key (prop_firm_id, signal_id) must be unique, so
-        # attempting to insert duplicates will raise an ``IntegrityError``.  If
-        # a record already exists we simply update its details and return it.
-
-        existing_trade: "Trade" | None = Trade.query.filter_by(
-            prop_firm_id=prop_firm.id,
-            signal_id=signal.id,
-        ).first()
-
-        if existing_trade:
-            # Update the existing record with the latest execution details.
-            existing_trade.platform_id = platform_id
-            existing_trade.response = response
-            existing_trade.ticker = ticker
+        details = {"platform_id": platform_id, "response": response, "ticker": ticker}
+        dialect = db.session.get_bind().dialect.name
+        # SQLite and PostgreSQL share the ON CONFLICT upsert
+        insert = importlib.import_module(f"sqlalchemy.dialects.{dialect}").insert
+        db.session.execute(
+            insert(Trade)
+            .values(prop_firm_id=prop_firm.id, signal_id=signal.id, **details)
+            .on_conflict_do_update(
+                index_elements=["prop_firm_id", "signal_id"], set_=details
+            )
+        )
+        trade = db.session.get(
+            Trade, (prop_firm.id, signal.id), populate_existing=True
+        )
+        if commit:
             db.session.commit()
-            return existing_trade
-
-        # No previous record – create a brand-new association.
-        new_trade = Trade(
-            prop_firm_id=prop_firm.id,
-            signal_id=signal.id,
-            platform_id=platform_id,
-            response=response,
-            ticker=ticker,
+        return trade
+
+    @staticmethod
+    def delete_stale(
+        prop_firm_id: int, open_tickets: Iterable[str], keep_untracked: bool = False
+    ) -> List[int]:
+        """
+        Delete the trades of a prop firm whose ticket is not open anymore,
+        with one DELETE joined against the open tickets loaded in a
+        temporary table. Nothing is committed.
+
+        Args:
+            prop_firm_id: Prop firm being synced
+            open_tickets: Tickets of its open positions
+            keep_untracked: Keep the trades without a ticket
+
+        Returns:
+            The signal ids of the deleted trades.
+        """
+        connection = db.session.connection()
+        sync_open_tickets.create(connection, checkfirst=True)
+        connection.execute(sync_open_tickets.delete())
+        tickets = [{"ticket": ticket} for ticket in set(open_tickets)]
+        if tickets:
+            connection.execute(sync_open_tickets.insert(), tickets)
+
+        stale = and_(
+            Trade.prop_firm_id == prop_firm_id,
+            ~exists().where(sync_open_tickets.c.ticket == Trade.platform_id),
         )
-        db.session.add(new_trade)
-        db.session.commit()
-        return new_trade
+        if keep_untracked:
+            stale = and_(stale, Trade.platform_id.isnot(None))
+        deleted = (
+            db.session.execute(
+                delete(Trade).where(stale).returning(Trade.signal_id),
+                execution_options={"synchronize_session": "fetch"},
+            )
+            .scalars()
+            .all()
+        )
+        connection.execute(sync_open_tickets.delete())
+        return deleted
 
     def to_dict(self):
         """
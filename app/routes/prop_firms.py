@@ -1,3 +1,5 @@
+import time
+
 from flask import Blueprint, jsonify, request
 from app.models.prop_firm import PropFirm
 from app import db
@@ -9,6 +11,12 @@ from app.models.prop_firm_trade_pair_association import (
 from app.models.user import User
 from app.routes.auth import login_required
 from app.models.user import user_prop_firm
+from app.services.filling_modes import filling_modes
+from app.services.prop_firm_sync import prop_firm_synchronizer
+from app.services.routing import routing_table
+from app.services.single_flight import SYNC_ALL, prop_firm_flight, single_flight
+from app.services.sync_stats import sync_stats
+from app.trade_actions.registry import trading_registry
 from sqlalchemy import select
 
 bp = Blueprint("prop_firms", __name__)
@@ -104,6 +112,8 @@ def delete_get_update_prop_firm(prop_firm_id):
         try:
             db.session.delete(prop_firm)
             db.session.commit()
+            routing_table.invalidate()
+            trading_registry.invalidate(prop_firm_id)
             return jsonify({"message": "Prop firm deleted successfully"}), 200
         except Exception as e:
             db.session.rollback()
@@ -142,6 +152,45 @@ def trades_for_prop_firm(prop_firm_id):
     return jsonify(output_data)
 
 
+@login_required
+@bp.route("/<int:prop_firm_id>/symbols", methods=["GET", "POST"])
+def symbol_specifications(prop_firm_id):
+    """
+    Broker specifications of the prop firm's symbols with the learned filling
+    types, POST refetches them from the platform first.
+    """
+    prop_firm = db.session.get(PropFirm, prop_firm_id)
+    if not prop_firm:
+        return jsonify({"error": "Prop firm not found"}), 404
+
+    if request.method == "POST":
+        refresh_symbols = getattr(prop_firm.trading, "refresh_symbol_specs", None)
+        if refresh_symbols is None:
+            return jsonify({"error": "Platform has no symbol catalog"}), 400
+        labels = [
+            association.label
+            for association in PropFirmTradePairAssociation.query.filter_by(
+                prop_firm_id=prop_firm_id
+            )
+        ]
+        try:
+            refresh_symbols(labels)
+        except Exception as e:
+            return jsonify({"error": str(e)}), 502
+
+    return jsonify(
+        {
+            "prop_firm_id": prop_firm_id,
+            "symbols": [
+                spec.to_dict()
+                for spec in prop_firm.symbol_specifications.order_by("symbol")
+            ],
+            # Order sends since the process started, per symbol
+            "filling_stats": filling_modes.stats(prop_firm_id),
+        }
+    )
+
+
 @login_required
 @bp.route("/<int:prop_firm_id>", methods=["PUT"])
 def update_prop_firm(prop_firm_id):
@@ -187,6 +236,13 @@ def update_prop_firm(prop_firm_id):
             prop_firm.description = data["description"]
         db.session.commit()
 
+        if "is_active" in data:
+            routing_table.invalidate()
+        # The adapter holds a terminal session for the old credentials
+        connection_fields = ("username", "password", "ip_address", "port")
+        if "platform_type" in data or any(f in data for f in connection_fields):
+            trading_registry.invalidate(prop_firm.id)
+
         stmt = select(user_prop_firm).where(
             user_prop_firm.c.user_id == user.id,
             user_prop_firm.c.prop_firm_id == prop_firm.id,
@@ -245,6 +301,7 @@ def manage_trade_pairs(prop_firm_id):
                 )
                 db.session.add(new_assoc)
             db.session.commit()
+            routing_table.invalidate()
             return jsonify(
                 {
                     "status": "success",
@@ -268,6 +325,7 @@ def delete_trade_pair(prop_firm_id, trade_pair_id):
     try:
         db.session.delete(trade_pair)
         db.session.commit()
+        routing_table.invalidate()
         return jsonify({"message": "Trade pair deleted successfully"}), 200
     except Exception as e:
         db.session.rollback()
@@ -297,55 +355,89 @@ def _sync_prop_firms_internal():
     if request.content_type == "application/json":
         data = request.get_json()
         prop_firm_id_req = data.get("prop_firm_id") if data else None
+        # Full reconciliation even if the account did not change
+        force = bool(data.get("force")) if data else False
     else:
         prop_firm_id_req = None
+        force = False
 
     if not prop_firm_id_req:
-        return sync_all_active_prop_firms()
+        try:
+            return sync_all_active_prop_firms(force=force)
+        except Exception as e:
+            return jsonify({"success": False, "error": str(e)}), 500
 
     try:
         results = {}
         pf_sync = PropFirm.query.get(prop_firm_id_req)
         if not pf_sync:
             return jsonify({"error": "Prop firm not found"}), 404
-        results = pf_sync.trading.sync_prop_firm(pf_sync)
+        # Joins a sync of this prop firm already running in any worker
+        results, coalesced = single_flight.run(
+            prop_firm_flight(pf_sync.id),
+            lambda: pf_sync.trading.sync_prop_firm(pf_sync, force=force),
+        )
         msg = "Prop firm synced successfully"
         return jsonify(
             {
                 "prop_firm": results,
                 "success": True,
                 "message": msg,
+                "coalesced": coalesced,
             }
         )
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 
-def sync_all_active_prop_firms():
-    # for every user prop firm, get the prop_firm_id and update the is_active
-    # attribute of the prop_firm to the is_active attribute of the user_prop_firm
-    user_prop_firms = db.session.query(user_prop_firm).group_by(user_prop_firm.c.prop_firm_id).all()
-    all_prop_firms = PropFirm.query.all()
-    for pf in all_prop_firms:
-        if pf.id in [upf.prop_firm_id for upf in user_prop_firms]:
-            pf.is_active = True
-        else:
-            pf.is_active = False
-        db.session.commit()
+def sync_all_active_prop_firms(force: bool = False):
+    # Requests arriving while a cycle runs (in any worker) share its result
+    result, coalesced = single_flight.run(
+        SYNC_ALL, lambda: _sync_active_prop_firms(force)
+    )
+    if result is None:
+        # Run by another worker, which could not store its result
+        return {
+            "success": None,
+            "status": "unknown",
+            "message": "Synced by another worker, its result is not available",
+            "coalesced": coalesced,
+            "single_flight": single_flight.stats(),
+        }, 202
+    return {
+        **result,
+        "coalesced": coalesced,
+        "single_flight": single_flight.stats(),
+    }
 
-    results = {}
 
-    firms_to_sync = PropFirm.query.filter_by(is_active=True).all()
-    for pf in firms_to_sync:
-        try:
-            results[pf.id] = pf.trading.sync_prop_firm(pf)
-        except Exception as e:
-            results[pf.id] = {"success": False, "error": str(e)}
-    s_count = sum(1 for r in results.values() if r)
+def _sync_active_prop_firms(force: bool):
+    prop_firm_synchronizer.refresh_active()
+
+    prop_firm_ids = [
+        prop_firm_id
+        for (prop_firm_id,) in db.session.query(PropFirm.id).filter_by(
+            is_active=True
+        )
+    ]
+    started = time.monotonic()
+    results, timings = prop_firm_synchronizer.sync(prop_firm_ids, force=force)
+
+    s_count = sum(
+        1
+        for r in results.values()
+        if not (isinstance(r, dict) and r.get("success") is False)
+    )
     t_count = len(results)
     sync_msg = f"Synced {s_count} out of {t_count} prop firms"
     return {
         "success": True,
         "message": sync_msg,
         "results": results,
+        "timings": timings,
+        "deadline_exceeded": any(
+            timing["status"] == "pending" for timing in timings.values()
+        ),
+        "elapsed_seconds": round(time.monotonic() - started, 4),
+        "sync_stats": sync_stats.stats(),
     }
@@ -2,6 +2,8 @@ from flask import Blueprint, jsonify, request
 from app.models.signal import Signal
 from app import db
 from app.routes.auth import login_required
+from app.services.pagination import PaginationError, filter_listing, paginate
+from app.services.signal_parser import ParsedSignal
 
 bp = Blueprint("signals", __name__)
 
@@ -9,8 +11,23 @@ bp = Blueprint("signals", __name__)
 @login_required
 @bp.route("/list", methods=["GET"])
 def list_signals():
-    signals = db.session.query(Signal).order_by(Signal.id.desc()).all()
-    return jsonify({"signals": [signal.to_dict() for signal in signals]})
+    try:
+        page = paginate(
+            filter_listing(
+                db.session.query(Signal), request.args, Signal.created_at, trades=False
+            ),
+            request.args,
+            [Signal.id],
+            lambda signal: (signal.id,),
+        )
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(
+        {
+            "signals": [signal.to_dict() for signal in page.items],
+            "next_cursor": page.next_cursor,
+        }
+    )
 
 
 @login_required
@@ -21,6 +38,18 @@ def create_signal():
     return save_signal(mt_string)
 
 
+@bp.route("/<int:signal_id>/status", methods=["GET"])
+def signal_status(signal_id):
+    """Fan-out outcome of a signal ingested in async mode."""
+    from app.services.signal_queue import signal_queue
+
+    ingestion = signal_queue.latest_for_signal(signal_id)
+    if not ingestion:
+        return jsonify({"message": "No ingestion found for signal"}), 404
+
+    return jsonify(ingestion.to_dict())
+
+
 @login_required
 @bp.route("/<int:signal_id>", methods=["DELETE"])
 def delete_signal(signal_id):
@@ -40,7 +69,11 @@ def delete_signal(signal_id):
 
 @staticmethod
 def save_signal(mt_string):
-    signal = Signal.from_mt_string(mt_string)
+    """Persist a signal from an MT string or an already parsed signal."""
+    if isinstance(mt_string, ParsedSignal):
+        signal = mt_string.to_signal()
+    else:
+        signal = Signal.from_mt_string(mt_string)
     db.session.add(signal)
     db.session.commit()
     return signal
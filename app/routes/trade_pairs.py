@@ -1,6 +1,7 @@
 from flask import Blueprint, jsonify, request, render_template
 from app import db
 from app.models.trade_pairs import TradePairs
+from app.services.routing import routing_table
 
 bp = Blueprint("trade_pairs", __name__)
 
@@ -45,6 +46,7 @@ def handle_pairs():
         trade_pair = TradePairs.query.get_or_404(data['id'])
         trade_pair.name = data['name']
         db.session.commit()
+        routing_table.invalidate()
         return jsonify(trade_pair.to_dict())
     elif request.method == 'DELETE':
         # Delete a trade pair based on the provided ID
@@ -52,4 +54,5 @@ def handle_pairs():
         trade_pair = TradePairs.query.get_or_404(data['id'])
         db.session.delete(trade_pair)
         db.session.commit()
+        routing_table.invalidate()
         return '', 204
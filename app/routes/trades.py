@@ -8,6 +8,7 @@ from app.routes.trades_association import (
 from app.models.prop_firm import PropFirm
 from app.models.trade import Trade
 from app import db
+from app.services.pagination import PaginationError, filter_listing, paginate
 import json
 
 # Create a Blueprint for the trades routes
@@ -34,13 +35,32 @@ def get_trade(trade_id):
 def handle_trades():
     """Handle GET requests for trades.
 
-    GET: Retrieve all trades, ordered by ID in descending order.
+    GET: Retrieve a page of trades, ordered by ID in descending order.
+
+    Query parameters: ``cursor``, ``limit``, ``prop_firm_id``, ``strategy``,
+    ``ticker``, ``created_after`` and ``created_before``.
 
     Returns:
-        JSON response containing the list of trades or the status of the trade creation.
+        JSON response containing the list of trades and the cursor of the
+        next page (None on the last one).
     """
-    trades = db.session.query(Trade).order_by(Trade.signal_id.desc()).all()
-    return jsonify({"trades": [trade.to_dict() for trade in trades]})
+    try:
+        page = paginate(
+            filter_listing(
+                db.session.query(Trade), request.args, Trade.created_at, signals=False
+            ),
+            request.args,
+            [Trade.signal_id, Trade.prop_firm_id],
+            lambda trade: (trade.signal_id, trade.prop_firm_id),
+        )
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(
+        {
+            "trades": [trade.to_dict() for trade in page.items],
+            "next_cursor": page.next_cursor,
+        }
+    )
 
 
 def handle_trade_with_parameters(saved_signal):
@@ -62,21 +82,33 @@ def handle_trade_with_parameters(saved_signal):
 
 @bp.route("/view", methods=["GET"])
 def view_trades():
-    """View trades along with their associated prop firms.
+    """View a page of trades along with their associated prop firms.
+
+    Accepts the query parameters of ``GET /``.
 
     Returns:
-        JSON response containing trades with their associated prop firms.
+        JSON response containing trades with their associated prop firms
+        and the cursor of the next page.
     """
-    trades_with_firms = (
-        db.session.query(Trade, PropFirm)
-        .select_from(Trade)
-        .join(PropFirm, PropFirm.id == Trade.prop_firm_id)
-        .order_by(Trade.signal_id.desc())
-        .all()
-    )
+    try:
+        page = paginate(
+            filter_listing(
+                db.session.query(Trade, PropFirm)
+                .select_from(Trade)
+                .join(PropFirm, PropFirm.id == Trade.prop_firm_id),
+                request.args,
+                Trade.created_at,
+                signals=False,
+            ),
+            request.args,
+            [Trade.signal_id, Trade.prop_firm_id],
+            lambda row: (row[0].signal_id, row[0].prop_firm_id),
+        )
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
 
     result = []
-    for trade, prop_firm in trades_with_firms:
+    for trade, prop_firm in page.items:
         trade_data = trade.to_dict()
         trade_data["prop_firm"] = {
             "id": prop_firm.id,
@@ -86,25 +118,38 @@ def view_trades():
         }
         result.append(trade_data)
 
-    return jsonify({"trades_with_firms": result})
+    return jsonify({"trades_with_firms": result, "next_cursor": page.next_cursor})
 
 
 @bp.route("/list", methods=["GET"])
 def list_trades():
-    """List all trades ordered by creation date with their prop firm details.
+    """List a page of trades ordered by creation date with their prop firm details.
+
+    Accepts the query parameters of ``GET /``, the date range applies to
+    the creation date of the signals.
 
     Returns:
-        JSON response containing the list of trades with response data.
+        JSON response containing the list of trades with response data and
+        the cursor of the next page.
     """
-    trades = (
-        db.session.query(Signal, Trade.response)
-        .join(Trade)
-        .order_by(Signal.created_at.desc())
-        .all()
-    )
+    try:
+        page = paginate(
+            filter_listing(
+                db.session.query(Signal, Trade.response, Trade.prop_firm_id).join(
+                    Trade
+                ),
+                request.args,
+                Signal.created_at,
+            ),
+            request.args,
+            [Signal.created_at, Signal.id, Trade.prop_firm_id],
+            lambda row: (row[0].created_at, row[0].id, row[2]),
+        )
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
 
     trades_with_response = []
-    for trade, response in trades:
+    for trade, response, _ in page.items:
         trade_dict = trade.to_dict()
         if response:
             trade_dict["response"] = json.loads(response)
@@ -112,7 +157,7 @@ def list_trades():
             trade_dict["response"] = None
         trades_with_response.append(trade_dict)
 
-    return jsonify({"trades": trades_with_response})
+    return jsonify({"trades": trades_with_response, "next_cursor": page.next_cursor})
 
 
 @bp.route(
@@ -1,11 +1,14 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
 from app.models.prop_firm import PropFirm
 from app.models.signal import Signal
 from app.models.trade import Trade
-from app.models.trade_pairs import TradePairs
-from app.models.prop_firm_trade_pair_association import PropFirmTradePairAssociation
+from app.models.execute_trade_return import ExecuteTradeReturn
 from app import db
-from app.models.user import User
+from app.services.fanout import get_fanout_executor, in_flight_signals
+from app.services.pagination import PaginationError, filter_listing, paginate
+from app.services.routing import routing_table
+from app.services.signal_parser import ParsedSignal, SignalParseError
+from typing import Callable, Dict, List, Tuple, Union
 import json
 import logging
 
@@ -101,101 +104,307 @@ def close_all_trade_associations(signal: Signal):
     return trades
 
 
-@staticmethod
-def add_trade_associations(saved_signal: Signal):
-    """Add trade associations based on the provided MT string.
-
-    Args:
-        saved_signal (Signal): The signal to add trade associations for.
+def _route_signals(
+    signals: List[Signal],
+) -> Tuple[Dict[int, PropFirm], Dict[int, List[Tuple[Signal, str]]]]:
+    """Group the orders of the signals per prop firm terminal, in input order.
 
     Returns:
-        [Trade]: One trade for each prop firm of each user.
+        The routed prop firms by id and, for each of them, the
+        (signal, label) orders to place.
     """
-    trades = []
-
-    # for every user in the database, get only the active prop firms
-    all_users = db.session.query(User).all()
-    for user in all_users:
-        prop_firms = user.get_prop_firms()
-        for prop_firm in prop_firms:
-            # Check if the trade's ticker exists in trade_pairs
-            trade_pair = (
-                db.session.query(TradePairs).filter_by(name=saved_signal.ticker).first()
+    orders: Dict[int, List[Tuple[Signal, str]]] = {}
+    for signal in signals:
+        # Single lookup in the precomputed ticker -> (prop firm, label) index
+        ticker_routes = routing_table.lookup(signal.ticker)
+        if not ticker_routes:
+            logger.warning(
+                "Ticker %s not tracked by any prop firm", signal.ticker
             )
+            continue
+        for prop_firm_id, label in ticker_routes:
+            orders.setdefault(prop_firm_id, []).append((signal, label))
+
+    if not orders:
+        return {}, {}
+
+    prop_firms = {
+        prop_firm.id: prop_firm
+        for prop_firm in PropFirm.query.filter(PropFirm.id.in_(list(orders))).all()
+    }
+    orders = {
+        prop_firm_id: firm_orders
+        for prop_firm_id, firm_orders in orders.items()
+        if prop_firm_id in prop_firms
+    }
+    return prop_firms, orders
+
+
+def _place_firm_orders(trading, firm_orders) -> List[ExecuteTradeReturn]:
+    """Place the orders of one terminal one after the other."""
+    outcomes = []
+    for signal, label in firm_orders:
+        try:
+            outcomes.append(trading.place_trade(signal, label=label))
+        except Exception as e:
+            outcomes.append(
+                ExecuteTradeReturn(
+                    success=False,
+                    message=f"Error placing trade: {e}",
+                    trade_id=None,
+                    details={},
+                )
+            )
+    return outcomes
 
-            if not trade_pair:
-                print(f"Ticker {saved_signal.ticker} not tracked by {prop_firm.name}")
-                # If ticker is not tracked, skip prop firm associations
-                continue
 
-            # Check if the prop firm has an association with the trade pair
-            association = (
-                db.session.query(PropFirmTradePairAssociation)
-                .filter_by(prop_firm_id=prop_firm.id, trade_pair_id=trade_pair.id)
-                .first()
+def place_orders(
+    signals: List[Signal],
+) -> Tuple[Dict[int, List[Trade]], Dict[int, List[str]]]:
+    """Place the orders of several signals and persist the resulting trades.
+
+    The terminals are worked concurrently (one in-flight order per terminal),
+    each placing its orders in input order, and every trade is persisted in
+    one transaction.
+
+    Args:
+        signals (list[Signal]): Saved signals to fan out.
+
+    Returns:
+        The trades placed and the error messages, both by signal id.
+    """
+    trades: Dict[int, List[Trade]] = {signal.id: [] for signal in signals}
+    errors: Dict[int, List[str]] = {signal.id: [] for signal in signals}
+
+    prop_firms, orders = _route_signals(signals)
+    if not orders:
+        return trades, errors
+
+    fanout_timeout = current_app.config.get("FANOUT_TIMEOUT_SECONDS", 30)
+    timeout = fanout_timeout * max(len(firm_orders) for firm_orders in orders.values())
+    # Until the trades are committed, a sync (of any worker) must leave the
+    # new positions to this fan-out instead of recording them itself
+    with in_flight_signals.track(
+        {
+            prop_firm_id: [signal.id for signal, _ in firm_orders]
+            for prop_firm_id, firm_orders in orders.items()
+        },
+        ttl=timeout + fanout_timeout,
+    ):
+        _place_and_record(prop_firms, orders, timeout, trades, errors)
+    return trades, errors
+
+
+def _place_and_record(
+    prop_firms: Dict[int, PropFirm],
+    orders: Dict[int, List[Tuple[Signal, str]]],
+    timeout: float,
+    trades: Dict[int, List[Trade]],
+    errors: Dict[int, List[str]],
+):
+    """Fan the routed orders out and commit their trades (see place_orders)."""
+    # Resolve the trading adapters here, the worker threads must not lazy
+    # load anything through this request's session
+    tasks = {}
+    for prop_firm_id, firm_orders in orders.items():
+        prop_firm = prop_firms[prop_firm_id]
+        logger.debug("Current prop firm %s", prop_firm.name)
+        trading = prop_firm.trading
+        tasks[prop_firm_id] = (
+            lambda trading=trading, firm_orders=firm_orders: _place_firm_orders(
+                trading, firm_orders
             )
+        )
 
-            if not association:
-                print(
-                    f"Trade pair not associated with {saved_signal.ticker} and {prop_firm.name}"
-                )
-                continue
+    outcomes = get_fanout_executor().run(tasks, timeout=timeout)
 
-            print(f"Current prop firm {prop_firm.name}")
-            # If association exists, use the label when placing the trade
-            outcome = prop_firm.trading.place_trade(
-                saved_signal, label=association.label
+    for prop_firm_id, firm_outcomes in outcomes.items():
+        prop_firm = prop_firms[prop_firm_id]
+        if isinstance(firm_outcomes, Exception):
+            logger.error(
+                "Error placing trades on %s: %s", prop_firm.name, firm_outcomes
             )
+            for signal, _ in orders[prop_firm_id]:
+                errors[signal.id].append(f"{prop_firm.name}: {firm_outcomes}")
+            continue
+
+        for (signal, label), outcome in zip(orders[prop_firm_id], firm_outcomes):
             if not outcome.success:
-                print(f"Error placing trade: {outcome.message}")
+                logger.error("Error placing trade: %s", outcome.message)
+                errors[signal.id].append(f"{prop_firm.name}: {outcome.message}")
+                continue
+            if outcome.queued:
+                logger.info(
+                    "Trade queued for %s, it will be synced later", prop_firm.name
+                )
                 continue
 
             # Add trade to prop firm with platform ID
             prop_firm_trade = Trade.associate_signal(
-                signal=saved_signal,
+                signal=signal,
                 prop_firm=prop_firm,
                 platform_id=outcome.details["response"].ticket,
                 response=json.dumps(outcome.details["response"]._asdict()),
-                ticker=association.label,
+                ticker=label,
+                commit=False,
             )
 
-            prop_firm.update_available_balance(saved_signal)
-            print(f"Trade {outcome.details['response'].ticket} placed successfully")
-            trades.append(prop_firm_trade)
-    return trades
+            prop_firm.update_available_balance_with_trade(signal)
+            logger.info(
+                "Trade %s placed successfully", outcome.details["response"].ticket
+            )
+            trades[signal.id].append(prop_firm_trade)
+
+    db.session.commit()
+
+
+@staticmethod
+def add_trade_associations(saved_signal: Signal):
+    """Add trade associations based on the provided MT string.
+
+    The orders are sent to every prop firm concurrently (one in-flight order
+    per terminal) and the resulting trades are persisted in one transaction.
+
+    Args:
+        saved_signal (Signal): The signal to add trade associations for.
+
+    Returns:
+        [Trade]: One trade for each prop firm of each user.
+    """
+    trades, _ = place_orders([saved_signal])
+    return trades[saved_signal.id]
+
+
+def _describe_trade(trade: Trade) -> dict:
+    return {"prop_firm_id": trade.prop_firm_id, "platform_id": trade.platform_id}
+
+
+def place_signal_batch(signals: List[Signal]) -> List[dict]:
+    """Fan out a batch of saved signals together.
+
+    Closing signals are handled first, then the orders of every opening
+    signal are grouped per prop firm terminal and placed in one fan-out.
+
+    Args:
+        signals (list[Signal]): Saved signals, in input order.
+
+    Returns:
+        [dict]: The outcome of each signal, in input order.
+    """
+    outcomes = {}
+    for signal in signals:
+        if signal.position_size != 0:
+            continue
+        try:
+            closed = close_all_trade_associations(signal)
+            outcomes[signal.id] = {
+                "status": "success",
+                "trades": [_describe_trade(trade) for trade in closed],
+                "errors": [],
+            }
+        except Exception as e:
+            db.session.rollback()
+            outcomes[signal.id] = {"status": "error", "trades": [], "errors": [str(e)]}
+
+    opening = [signal for signal in signals if signal.position_size != 0]
+    try:
+        trades, errors = place_orders(opening)
+    except Exception as e:
+        db.session.rollback()
+        trades = {signal.id: [] for signal in opening}
+        errors = {signal.id: [str(e)] for signal in opening}
+
+    for signal in opening:
+        failed = bool(errors[signal.id]) and not trades[signal.id]
+        outcomes[signal.id] = {
+            "status": "error" if failed else "success",
+            "trades": [_describe_trade(trade) for trade in trades[signal.id]],
+            "errors": errors[signal.id],
+        }
+
+    return [{"signal_id": signal.id, **outcomes[signal.id]} for signal in signals]
+
+
+def signal_batch_results(
+    parsed_signals: List[Union[ParsedSignal, SignalParseError]],
+    place: Callable[[List[Signal]], List[dict]] = place_signal_batch,
+) -> List[dict]:
+    """Save the signals of a parsed batch and place them.
+
+    Args:
+        parsed_signals (list): ``parse_signal_batch`` output, parse errors
+            included.
+        place (callable): Takes the saved signals and returns their outcomes
+            in order, ``place_signal_batch`` or a queueing of them.
+
+    Returns:
+        [dict]: The result of each input entry, in input order, with its
+        ``index``; the parse errors stay at their position.
+    """
+    signals = [
+        parsed.to_signal()
+        for parsed in parsed_signals
+        if not isinstance(parsed, SignalParseError)
+    ]
+    db.session.add_all(signals)
+    db.session.commit()
+
+    outcomes = iter(place(signals))
+    results = []
+    for index, parsed in enumerate(parsed_signals):
+        if isinstance(parsed, SignalParseError):
+            result = {"status": "error", "errors": [str(parsed)]}
+        else:
+            result = next(outcomes)
+        results.append({"index": index, **result})
+    return results
 
 
 @bp.route("/", methods=["GET", "POST", "PUT"])
 def trades_association():
     """Handle GET, POST, and PUT requests for trade associations.
 
-    GET: Retrieve all trades associated with prop firms.
+    GET: Retrieve a page of trades associated with prop firms. Accepts
+    ``cursor``, ``limit``, ``prop_firm_id``, ``strategy``, ``ticker``,
+    ``created_after`` and ``created_before``.
     POST: Create new trade associations from the provided data.
     PUT: Update existing trade associations based on the provided JSON data.
 
     Returns:
-        JSON response containing trade association data or status messages.
+        JSON response containing trade association data and the cursor of
+        the next page, or status messages.
     """
     if request.method == "GET":
         # Query trades through Trades table
-        trades_with_firms = (
-            db.session.query(Signal, PropFirm)
-            .select_from(Signal)
-            .join(Trade, Signal.id == Trade.signal_id)
-            .join(PropFirm, PropFirm.id == Trade.prop_firm_id)
-            .order_by(Signal.created_at.desc())
-            .all()
-        )
+        try:
+            page = paginate(
+                filter_listing(
+                    db.session.query(Signal, PropFirm)
+                    .select_from(Signal)
+                    .join(Trade, Signal.id == Trade.signal_id)
+                    .join(PropFirm, PropFirm.id == Trade.prop_firm_id),
+                    request.args,
+                    Signal.created_at,
+                ),
+                request.args,
+                [Signal.created_at, Signal.id, Trade.prop_firm_id],
+                lambda row: (row[0].created_at, row[0].id, row[1].id),
+            )
+        except PaginationError as e:
+            return jsonify({"error": str(e)}), 400
 
         # Format the response to include both trade and prop firm info
         return jsonify(
-            [
-                {
-                    **trade.to_dict(),
-                    "prop_firm": {"id": prop_firm.id, "name": prop_firm.name},
-                }
-                for trade, prop_firm in trades_with_firms
-            ]
+            {
+                "trades": [
+                    {
+                        **trade.to_dict(),
+                        "prop_firm": {"id": prop_firm.id, "name": prop_firm.name},
+                    }
+                    for trade, prop_firm in page.items
+                ],
+                "next_cursor": page.next_cursor,
+            }
         )
     elif request.method == "POST":
         try:
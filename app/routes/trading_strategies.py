@@ -3,6 +3,7 @@ from app import db
 from app.models.trading_strategy import TradingStrategy
 from app.models.user import User
 from app.routes.auth import login_required
+from app.services.strategy_matcher import strategy_matcher
 
 bp = Blueprint("trading_strategies", __name__)
 
@@ -57,6 +58,7 @@ def create_trading_strategy():
 
         db.session.add(strategy)
         db.session.commit()
+        strategy_matcher.invalidate()
 
         return (
             jsonify(
@@ -102,6 +104,7 @@ def update_trading_strategy(strategy_id):
             strategy.description = data["description"]
 
         db.session.commit()
+        strategy_matcher.invalidate()
 
         return jsonify(
             {
@@ -127,6 +130,7 @@ def delete_trading_strategy(strategy_id):
 
         db.session.delete(strategy)
         db.session.commit()
+        strategy_matcher.invalidate()
 
         return jsonify(
             {"status": "success", "message": "Trading strategy deleted successfully"}
@@ -3,6 +3,7 @@ from app import db
 from app.models.user import User
 from app.models.prop_firm import PropFirm
 from app.routes.auth import login_required
+from app.services.routing import routing_table
 
 user_prop_firms_bp = Blueprint("user_prop_firms", __name__)
 
@@ -29,6 +30,7 @@ def add_prop_firm_to_user(prop_firm_id):
 
     if user.add_prop_firm(prop_firm):
         db.session.commit()
+        routing_table.invalidate()
         return jsonify({"message": "Prop firm added to user successfully"}), 200
     else:
         return jsonify({"message": "Prop firm already associated with user"}), 200
@@ -46,6 +48,7 @@ def remove_prop_firm_from_user(prop_firm_id):
 
     if user.remove_prop_firm(prop_firm):
         db.session.commit()
+        routing_table.invalidate()
         return jsonify({"message": "Prop firm removed from user successfully"}), 200
     else:
         return jsonify({"message": "Prop firm not associated with user"}), 404
@@ -0,0 +1,246 @@
+"""Concurrent per-terminal dispatch used to fan a signal out to prop firms."""
+
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+)
+
+from flask import current_app
+from sqlalchemy import delete, insert, select
+
+logger = logging.getLogger(__name__)
+
+
+class FanOutTimeout(Exception):
+    """Raised (as a result value) for a task that exceeded its timeout."""
+
+
+class FanOutExecutor:
+    def __init__(self, max_workers: int = 8):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="fanout"
+        )
+        # One lock per terminal so a firm never has two orders in flight
+        self._terminal_locks: Dict[Hashable, threading.Lock] = defaultdict(
+            threading.Lock
+        )
+        self._locks_guard = threading.Lock()
+
+    def terminal_lock(self, key: Hashable) -> threading.Lock:
+        with self._locks_guard:
+            return self._terminal_locks[key]
+
+    def run(
+        self,
+        tasks: Dict[Hashable, Callable[[], Any]],
+        timeout: Optional[float] = None,
+    ) -> Dict[Hashable, Any]:
+        """
+        Run one callable per terminal concurrently and gather the results.
+
+        Args:
+            tasks: Callables keyed by terminal (prop firm id)
+            timeout: Seconds the tasks may take from their submission,
+                waiting for a busy terminal or a free worker included
+
+        Returns:
+            The value returned by each task, keyed like ``tasks``. A task that
+            raised is reported with its exception, one that ran out of time
+            with a ``FanOutTimeout``: a task still waiting for its terminal
+            gives up, one not started is cancelled and one already running
+            keeps going (a broker call cannot be interrupted).
+        """
+        app = current_app._get_current_object()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        # Tasks holding their terminal, the others are still waiting for it
+        holding = set()
+
+        def run_task(key, task):
+            lock = self.terminal_lock(key)
+            if deadline is None:
+                lock.acquire()
+            elif not lock.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                # An earlier task that timed out still holds the terminal
+                raise FanOutTimeout(f"Terminal still busy after {timeout}s")
+            holding.add(key)
+            try:
+                with app.app_context():
+                    return task()
+            finally:
+                lock.release()
+
+        futures = {
+            self._executor.submit(run_task, key, task): key
+            for key, task in tasks.items()
+        }
+        results: Dict[Hashable, Any] = {}
+        pending = set(futures)
+
+        while pending:
+            wait_for = (
+                None if deadline is None else max(0.0, deadline - time.monotonic())
+            )
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = futures[future]
+                try:
+                    results[key] = future.result()
+                except Exception as e:
+                    results[key] = e
+            if pending and deadline is not None and time.monotonic() >= deadline:
+                for future in pending:
+                    key = futures[future]
+                    logger.warning("Fan-out task %s timed out", key)
+                    if future.cancel():
+                        results[key] = FanOutTimeout(f"Not started after {timeout}s")
+                    elif key not in holding:
+                        results[key] = FanOutTimeout(
+                            f"Terminal still busy after {timeout}s"
+                        )
+                    else:
+                        results[key] = FanOutTimeout(
+                            f"No result after {timeout}s, still running"
+                        )
+                break
+
+        return results
+
+
+class InFlightSignals:
+    """
+    Signals a fan-out is placing orders for, by prop firm, until the trades
+    of those orders are committed. A sync running meanwhile sees the new
+    positions before their trades exist and must leave them to the fan-out.
+
+    The syncs of other workers (the scheduler runs in one of them) see them
+    through a ``sync_leases`` row per prop firm and worker, holding the
+    signal ids; it expires after ``ttl`` should the worker die.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._signals: Dict[Hashable, Counter] = defaultdict(Counter)
+
+    @contextmanager
+    def track(
+        self, orders: Dict[Hashable, Iterable[int]], ttl: float
+    ) -> Iterator[None]:
+        """Mark the signal ids of each prop firm as in flight for the block."""
+        orders = {key: list(signal_ids) for key, signal_ids in orders.items()}
+        with self._lock:
+            for key, signal_ids in orders.items():
+                self._signals[key].update(signal_ids)
+        self._publish(orders, ttl)
+        try:
+            yield
+        finally:
+            with self._lock:
+                for key, signal_ids in orders.items():
+                    counts = self._signals[key]
+                    for signal_id in signal_ids:
+                        counts[signal_id] -= 1
+                        if counts[signal_id] <= 0:
+                            del counts[signal_id]
+                    if not counts:
+                        del self._signals[key]
+            self._publish(orders, ttl)
+
+    def of(self, key: Hashable) -> Set[int]:
+        """Signal ids in flight on a prop firm, in any worker (app context)."""
+        with self._lock:
+            signal_ids = set(self._signals.get(key, ()))
+        for published in self._published(key):
+            signal_ids.update(published)
+        return signal_ids
+
+    def busy(self, key: Hashable) -> bool:
+        """Whether a fan-out of any worker is placing orders on a prop firm."""
+        with self._lock:
+            if key in self._signals:
+                return True
+        return bool(self._published(key))
+
+    @staticmethod
+    def _row_prefix(key: Hashable) -> str:
+        return f"in_flight:{key}:"
+
+    def _publish(self, keys: Iterable[Hashable], ttl: float):
+        """Write the signals of this worker on ``keys`` to their rows."""
+        from app import db
+        from app.models.sync_lease import SyncLease
+        from app.services.single_flight import lease_owner
+
+        owner = lease_owner()
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            rows = {
+                self._row_prefix(key) + owner: sorted(self._signals.get(key, ()))
+                for key in keys
+            }
+        try:
+            # Own connection, the request's session may hold pending changes
+            with db.engine.begin() as connection:
+                connection.execute(
+                    delete(SyncLease).where(SyncLease.name.in_(list(rows)))
+                )
+                values = [
+                    {
+                        "name": name,
+                        "owner": owner,
+                        "started_at": now,
+                        "expires_at": now + timedelta(seconds=ttl),
+                        "result": signal_ids,
+                        "coalesced": 0,
+                    }
+                    for name, signal_ids in rows.items()
+                    if signal_ids
+                ]
+                if values:
+                    connection.execute(insert(SyncLease), values)
+        except Exception as e:
+            # The syncs of this worker still see the signals
+            logger.error("Could not publish the signals in flight: %s", e)
+
+    def _published(self, key: Hashable) -> List[List[int]]:
+        from app import db
+        from app.models.sync_lease import SyncLease
+
+        return list(
+            db.session.scalars(
+                select(SyncLease.result).where(
+                    SyncLease.name.startswith(self._row_prefix(key), autoescape=True),
+                    SyncLease.expires_at > datetime.now(timezone.utc),
+                )
+            )
+        )
+
+
+in_flight_signals = InFlightSignals()
+
+_executor: Optional[FanOutExecutor] = None
+_executor_guard = threading.Lock()
+
+
+def get_fanout_executor() -> FanOutExecutor:
+    """Process-wide executor sized from ``FANOUT_MAX_WORKERS``."""
+    global _executor
+    with _executor_guard:
+        if _executor is None:
+            _executor = FanOutExecutor(
+                max_workers=current_app.config.get("FANOUT_MAX_WORKERS", 8)
+            )
+        return _executor
@@ -0,0 +1,80 @@
+"""Filling type learned per (prop firm, symbol) from accepted orders.
+
+Brokers reject an order whose filling type the symbol does not support with
+``TRADE_RETCODE_INVALID_FILL``; discovering the right one costs a rejected
+``order_send`` per wrong guess. The first type that gets an order accepted is
+remembered (in memory and in ``symbol_specifications.learned_filling_type``)
+and tried first from then on. Counters measure the sends wasted on
+discovery and the ones the learned type saved.
+"""
+
+import logging
+import threading
+from collections import defaultdict
+from typing import Dict, Optional, Tuple
+
+from app import db
+from app.models.symbol_specification import SymbolSpecification
+
+logger = logging.getLogger(__name__)
+
+Key = Tuple[int, str]
+
+
+class FillingModeCache:
+    def __init__(self):
+        self._learned: Optional[Dict[Key, int]] = None
+        self._lock = threading.Lock()
+        self._counters: Dict[Key, Dict[str, int]] = defaultdict(
+            lambda: {"orders": 0, "sends": 0, "wasted_sends": 0, "saved_sends": 0}
+        )
+
+    def get(self, prop_firm_id: int, symbol: str) -> Optional[int]:
+        return self._load().get((prop_firm_id, symbol))
+
+    def learn(self, prop_firm_id: int, symbol: str, filling_type: int):
+        """Remember the filling type an order was accepted with."""
+        key = (prop_firm_id, symbol)
+        with self._lock:
+            if self._learned is not None:
+                self._learned[key] = filling_type
+
+        row = db.session.get(SymbolSpecification, key)
+        if row is not None and row.learned_filling_type != filling_type:
+            row.learned_filling_type = filling_type
+            db.session.commit()
+        logger.info("Learned filling type %s for %s", filling_type, symbol)
+
+    def record(
+        self, prop_firm_id: int, symbol: str, sends: int, wasted: int, saved: int
+    ):
+        """Count the sends of one order, rejected fills and avoided guesses."""
+        with self._lock:
+            counters = self._counters[(prop_firm_id, symbol)]
+            counters["orders"] += 1
+            counters["sends"] += sends
+            counters["wasted_sends"] += wasted
+            counters["saved_sends"] += saved
+
+    def stats(self, prop_firm_id: Optional[int] = None) -> Dict[str, Dict[str, int]]:
+        """Counters since the process started, keyed by symbol."""
+        with self._lock:
+            return {
+                symbol: dict(counters)
+                for (firm_id, symbol), counters in self._counters.items()
+                if prop_firm_id is None or firm_id == prop_firm_id
+            }
+
+    def _load(self) -> Dict[Key, int]:
+        with self._lock:
+            if self._learned is None:
+                self._learned = {
+                    (row.prop_firm_id, row.symbol): row.learned_filling_type
+                    for row in SymbolSpecification.query.filter(
+                        SymbolSpecification.learned_filling_type.isnot(None)
+                    )
+                }
+            return self._learned
+
+
+filling_modes = FillingModeCache()
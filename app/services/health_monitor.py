@@ -0,0 +1,267 @@
+"""Background heartbeat of the trading terminals.
+
+Checking a connection means a round trip to the terminal (``account_info``),
+and ``/health`` used to do that for every prop firm, one after the other, on
+each call. A heartbeat thread now probes the terminal of every active prop
+firm with credentials concurrently at a fixed interval and keeps a snapshot
+of the result: status, the last time the terminal answered, the round-trip
+latency and the last error. ``/health`` and ``is_connected`` read the
+snapshot and do no broker I/O; an entry that has not been refreshed for too
+long is reported as stale.
+
+Only the gunicorn worker holding the ``"health_monitor"`` lease of
+``sync_leases`` probes; it stores the snapshot in the lease row and the other
+workers read it from there. Without the heartbeat
+(``HEALTH_CHECK_INTERVAL_SECONDS = 0``) a connection is probed when asked.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import select, update
+
+from app import db
+
+logger = logging.getLogger(__name__)
+
+LEADER_LEASE = "health_monitor"
+
+STATUS_UP = "up"
+STATUS_DOWN = "down"
+STATUS_STALE = "stale"
+
+
+class TerminalHealth(NamedTuple):
+    connected: bool
+    # time.time() of the last probe and of the last successful one
+    checked_at: float
+    last_seen: Optional[float]
+    latency_ms: float
+    error: Optional[str]
+    consecutive_failures: int
+
+
+def _timestamp(value: Optional[float]) -> Optional[str]:
+    if value is None:
+        return None
+    return datetime.fromtimestamp(value, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class HealthMonitor:
+    def __init__(self):
+        self._health: Dict[int, TerminalHealth] = {}
+        self._lock = threading.Lock()
+        self._app = None
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._leader = False
+        self.interval = 15.0
+        self.stale_after = 45.0
+
+    def init_app(self, app):
+        """Start the heartbeat when an interval is configured."""
+        self._app = app
+        self.interval = app.config.get("HEALTH_CHECK_INTERVAL_SECONDS", 15)
+        self.stale_after = app.config.get(
+            "HEALTH_STALE_AFTER_SECONDS", 3 * self.interval
+        )
+        if self.interval > 0 and self._thread is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=app.config.get("HEALTH_CHECK_WORKERS", 4),
+                thread_name_prefix="health-probe",
+            )
+            self._thread = threading.Thread(
+                target=self._heartbeat_loop, name="health-monitor", daemon=True
+            )
+            self._thread.start()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    @property
+    def leader(self) -> bool:
+        return self._leader
+
+    def get(self, prop_firm_id: int) -> Optional[TerminalHealth]:
+        with self._lock:
+            return self._health.get(prop_firm_id)
+
+    def is_stale(self, health: TerminalHealth) -> bool:
+        # Without the heartbeat entries are only refreshed on demand
+        return self.running and time.time() - health.checked_at > self.stale_after
+
+    def is_connected(self, prop_firm) -> bool:
+        """Whether the last heartbeat reached the terminal, no I/O"""
+        health = self._health_of(prop_firm)
+        return health is not None and health.connected and not self.is_stale(health)
+
+    def status(self, prop_firm) -> Dict[str, Any]:
+        """Snapshot entry of a prop firm, ready to be serialized"""
+        health = self._health_of(prop_firm)
+        if health is None:
+            return {"status": None, "connected": False}
+        if self.is_stale(health):
+            status = STATUS_STALE
+        else:
+            status = STATUS_UP if health.connected else STATUS_DOWN
+        return {
+            "status": status,
+            "connected": status == STATUS_UP,
+            "last_checked": _timestamp(health.checked_at),
+            "last_seen": _timestamp(health.last_seen),
+            "latency_ms": round(health.latency_ms, 2),
+            "error": health.error,
+            "consecutive_failures": health.consecutive_failures,
+        }
+
+    def _health_of(self, prop_firm) -> Optional[TerminalHealth]:
+        """The snapshot entry, or without the heartbeat a probe made now"""
+        if self.running:
+            return self.get(prop_firm.id)
+        if not prop_firm.has_complete_credentials():
+            return None
+        trading = prop_firm.trading
+        if trading is None:
+            return None
+        return self.probe(prop_firm.id, trading)
+
+    def probe(self, prop_firm_id: int, trading) -> TerminalHealth:
+        """Check one terminal now and store the result"""
+        started = time.perf_counter()
+        error = None
+        try:
+            connected = bool(trading.check_connection())
+            if not connected:
+                error = "Terminal did not answer"
+        except Exception as e:
+            connected = False
+            error = str(e)
+        latency_ms = (time.perf_counter() - started) * 1000
+        now = time.time()
+
+        with self._lock:
+            previous = self._health.get(prop_firm_id)
+            health = TerminalHealth(
+                connected=connected,
+                checked_at=now,
+                last_seen=now if connected else (previous and previous.last_seen),
+                latency_ms=latency_ms,
+                error=error,
+                consecutive_failures=(
+                    0
+                    if connected
+                    else (previous.consecutive_failures if previous else 0) + 1
+                ),
+            )
+            self._health[prop_firm_id] = health
+        return health
+
+    def probe_all(self):
+        """
+        Probe the terminal of every active prop firm with credentials
+        concurrently (app context).
+        """
+        from app.models.prop_firm import PropFirm
+        from app.models.user import user_prop_firm
+
+        targets: List = []
+        # Active as in refresh_active(): at least one user has the prop firm
+        prop_firms = PropFirm.query.filter(
+            PropFirm.id.in_(select(user_prop_firm.c.prop_firm_id))
+        )
+        for prop_firm in prop_firms:
+            if not prop_firm.has_complete_credentials():
+                continue
+            try:
+                trading = prop_firm.trading
+            except Exception as e:
+                logger.error("No trading adapter for %s: %s", prop_firm.name, e)
+                trading = None
+            if trading is not None:
+                targets.append((prop_firm.id, trading))
+
+        with self._lock:
+            # Prop firms deleted or deactivated since the last round
+            known = {prop_firm_id for prop_firm_id, _ in targets}
+            for prop_firm_id in set(self._health) - known:
+                del self._health[prop_firm_id]
+
+        if self._executor is None:
+            for prop_firm_id, trading in targets:
+                self.probe(prop_firm_id, trading)
+            return
+        futures = [
+            self._executor.submit(self.probe, prop_firm_id, trading)
+            for prop_firm_id, trading in targets
+        ]
+        for future in futures:
+            future.result()
+
+    def _hold_lease(self) -> bool:
+        """Take or renew the leader lease, once per heartbeat."""
+        from app.services.single_flight import single_flight
+
+        leader = single_flight.acquire(LEADER_LEASE, self.stale_after)
+        if leader != self._leader:
+            logger.info(
+                "Health monitor %s", "elected" if leader else "lost the leadership"
+            )
+        self._leader = leader
+        return leader
+
+    def _publish(self):
+        """Store the snapshot in the lease row for the other workers."""
+        from app.models.sync_lease import SyncLease
+        from app.services.single_flight import lease_owner
+
+        with self._lock:
+            snapshot = {
+                str(prop_firm_id): health._asdict()
+                for prop_firm_id, health in self._health.items()
+            }
+        db.session.execute(
+            update(SyncLease)
+            .where(SyncLease.name == LEADER_LEASE, SyncLease.owner == lease_owner())
+            .values(result=snapshot)
+        )
+        db.session.commit()
+
+    def _load(self):
+        """Replace the snapshot with the one the leader stored."""
+        from app.models.sync_lease import SyncLease
+
+        snapshot = db.session.scalar(
+            select(SyncLease.result).where(SyncLease.name == LEADER_LEASE)
+        )
+        with self._lock:
+            self._health = {
+                int(prop_firm_id): TerminalHealth(**health)
+                for prop_firm_id, health in (snapshot or {}).items()
+            }
+
+    def _heartbeat_loop(self):
+        while True:
+            with self._app.app_context():
+                try:
+                    if self._hold_lease():
+                        self.probe_all()
+                        self._publish()
+                    else:
+                        self._load()
+                except RuntimeError:
+                    # The probe executor is shut down when the interpreter exits
+                    return
+                except Exception as e:
+                    logger.error("Health check failed: %s", e)
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+            time.sleep(self.interval)
+
+
+health_monitor = HealthMonitor()
@@ -0,0 +1,173 @@
+"""Idempotent handling of retried webhook deliveries.
+
+A delivery is identified by the ``Idempotency-Key`` header when the sender
+provides one, otherwise by a hash of the normalized signal and the route.
+The first delivery claims the key (a primary-key insert, so concurrent
+retries across gunicorn workers cannot both win) and, when it succeeds,
+stores its response; repeats inside ``IDEMPOTENCY_WINDOW_SECONDS`` get that
+response back without touching the brokers. A failed delivery gives the key
+up so the retry is processed. Recent outcomes are also kept in an
+in-process LRU.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+from typing import Optional, Tuple
+
+from flask import current_app, jsonify, make_response, request
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models.idempotency_key import IdempotencyKey
+from app.services.signal_parser import SignalParseError, parse_request_signal
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+# (stored at, status code, response body)
+Outcome = Tuple[float, int, object]
+
+
+class IdempotencyStore:
+    def __init__(self):
+        self._cache: "OrderedDict[str, Outcome]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def request_key() -> str:
+        """Key of the current delivery, scoped to the route it was sent to."""
+        explicit_key = request.headers.get(IDEMPOTENCY_HEADER)
+        if explicit_key:
+            material = f"header|{request.path}|{explicit_key}"
+        else:
+            parsed = parse_request_signal()
+            material = "|".join([request.path, *(str(field) for field in parsed)])
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def lookup(self, key: str, window: float) -> Optional[IdempotencyKey]:
+        """Stored delivery for ``key`` if it is still inside the window."""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=window)
+        return IdempotencyKey.query.filter(
+            IdempotencyKey.key == key,
+            IdempotencyKey.created_at >= cutoff,
+        ).first()
+
+    def cached(self, key: str, window: float) -> Optional[Outcome]:
+        with self._lock:
+            outcome = self._cache.get(key)
+            if outcome is None:
+                return None
+            if time.time() - outcome[0] > window:
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+            return outcome
+
+    def claim(self, key: str, window: float) -> bool:
+        """Reserve ``key`` for this delivery, False if another one holds it."""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=window)
+        IdempotencyKey.query.filter(
+            IdempotencyKey.key == key,
+            IdempotencyKey.created_at < cutoff,
+        ).delete()
+        db.session.add(IdempotencyKey(key=key, path=request.path))
+        try:
+            db.session.commit()
+            return True
+        except IntegrityError:
+            db.session.rollback()
+            return False
+
+    def complete(self, key: str, status_code: int, body):
+        record = db.session.get(IdempotencyKey, key)
+        if record is None:
+            return
+        record.status_code = status_code
+        record.response = body
+        db.session.commit()
+        self._remember(key, status_code, body)
+
+    def release(self, key: str):
+        """Forget a failed delivery so the sender's retry is processed."""
+        db.session.rollback()
+        IdempotencyKey.query.filter_by(key=key, status_code=None).delete()
+        db.session.commit()
+
+    def _remember(self, key: str, status_code: int, body):
+        max_size = current_app.config.get("IDEMPOTENCY_CACHE_SIZE", 1024)
+        with self._lock:
+            self._cache[key] = (time.time(), status_code, body)
+            self._cache.move_to_end(key)
+            while len(self._cache) > max_size:
+                self._cache.popitem(last=False)
+
+
+idempotency_store = IdempotencyStore()
+
+
+def _replay(status_code: int, body):
+    response = make_response(jsonify(body), status_code)
+    response.headers[REPLAYED_HEADER] = "true"
+    return response
+
+
+def _in_progress():
+    return (
+        jsonify(
+            {
+                "status": "in_progress",
+                "message": "This signal is already being processed",
+            }
+        ),
+        409,
+    )
+
+
+def idempotent(view):
+    """Answer repeated deliveries of a webhook with the original outcome."""
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        window = current_app.config.get("IDEMPOTENCY_WINDOW_SECONDS", 0)
+        if window <= 0:
+            return view(*args, **kwargs)
+
+        try:
+            key = idempotency_store.request_key()
+        except SignalParseError:
+            # Let the view report the invalid body as it always did
+            return view(*args, **kwargs)
+
+        outcome = idempotency_store.cached(key, window)
+        if outcome is not None:
+            return _replay(outcome[1], outcome[2])
+
+        if not idempotency_store.claim(key, window):
+            record = idempotency_store.lookup(key, window)
+            if record is None or record.status_code is None:
+                return _in_progress()
+            return _replay(record.status_code, record.response)
+
+        try:
+            response = make_response(view(*args, **kwargs))
+        except Exception:
+            idempotency_store.release(key)
+            raise
+
+        # Only an accepted signal is replayed: after a failure (a 400 when
+        # the fan-out raised) the sender's retry must reach the brokers
+        body = response.get_json(silent=True)
+        if 200 <= response.status_code < 300 and body is not None:
+            idempotency_store.complete(key, response.status_code, body)
+        else:
+            idempotency_store.release(key)
+        return response
+
+    return wrapper
@@ -0,0 +1,153 @@
+"""Keyset pagination of the trade and signal listings.
+
+The listings used to return every row of their table in one response. They
+now return at most ``limit`` rows (``PAGE_SIZE_DEFAULT`` when not given,
+never more than ``PAGE_SIZE_MAX``) and a ``next_cursor``: an opaque token
+holding the sort key of the last row, passed back as ``cursor`` to get the
+rows after it. The next page is a range condition on the sort key, so it
+costs the same however deep the client pages, and rows added meanwhile
+don't shift the pages.
+
+Every listing accepts the same filters: ``prop_firm_id``, ``strategy``,
+``ticker`` and a ``created_after``/``created_before`` range (ISO 8601,
+UTC unless the date has an offset).
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime, timezone
+from typing import Any, Callable, List, NamedTuple, Optional, Sequence
+
+from flask import current_app
+from sqlalchemy import exists, tuple_
+
+from app.models.signal import Signal
+from app.models.trade import Trade
+
+
+class PaginationError(ValueError):
+    """Invalid cursor, limit or filter"""
+
+
+class Page(NamedTuple):
+    items: List[Any]
+    next_cursor: Optional[str]
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = json.dumps(
+        [
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in values
+        ]
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, keys: Sequence[Any]) -> List[Any]:
+    """Sort key values of a cursor, typed after the key columns."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError
+        return [
+            datetime.fromisoformat(value)
+            if value is not None and key.type.python_type is datetime
+            else value
+            for key, value in zip(keys, values)
+        ]
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise PaginationError("Invalid cursor")
+
+
+def _page_size(args) -> int:
+    default = current_app.config.get("PAGE_SIZE_DEFAULT", 100)
+    maximum = current_app.config.get("PAGE_SIZE_MAX", 1000)
+    try:
+        limit = int(args.get("limit", default))
+    except ValueError:
+        raise PaginationError("limit must be an integer")
+    if limit < 1:
+        raise PaginationError("limit must be positive")
+    return min(limit, maximum)
+
+
+def _date(args, name: str) -> Optional[datetime]:
+    value = args.get(name)
+    if not value:
+        return None
+    try:
+        date = datetime.fromisoformat(value)
+    except ValueError:
+        raise PaginationError(f"{name} must be an ISO 8601 date")
+    # Stored dates are naive UTC
+    if date.tzinfo is not None:
+        date = date.astimezone(timezone.utc).replace(tzinfo=None)
+    return date
+
+
+def filter_listing(query, args, created_at, trades: bool = True, signals: bool = True):
+    """
+    Apply the listing filters of the request to ``query``.
+
+    Args:
+        query: Query over trades and/or signals
+        args: Request arguments
+        created_at: Column the date range applies to
+        trades: ``Trade`` is in the query, otherwise the prop firm filter
+            looks for a trade of the signal
+        signals: ``Signal`` is in the query, otherwise the strategy and
+            ticker filters apply to the signal of the trade
+    """
+    prop_firm_id = args.get("prop_firm_id", type=int)
+    if prop_firm_id is not None:
+        condition = Trade.prop_firm_id == prop_firm_id
+        if not trades:
+            condition = exists().where(Trade.signal_id == Signal.id, condition)
+        query = query.filter(condition)
+
+    signal_filters = []
+    if args.get("strategy"):
+        signal_filters.append(Signal.strategy == args["strategy"])
+    if args.get("ticker"):
+        signal_filters.append(Signal.ticker == args["ticker"])
+    if signal_filters and not signals:
+        signal_filters = [exists().where(Signal.id == Trade.signal_id, *signal_filters)]
+    query = query.filter(*signal_filters)
+
+    created_after = _date(args, "created_after")
+    if created_after is not None:
+        query = query.filter(created_at >= created_after)
+    created_before = _date(args, "created_before")
+    if created_before is not None:
+        query = query.filter(created_at < created_before)
+    return query
+
+
+def paginate(
+    query, args, keys: Sequence[Any], key_of: Callable[[Any], Sequence[Any]]
+) -> Page:
+    """
+    One page of ``query``, newest first.
+
+    Args:
+        query: Filtered query, without ordering
+        args: Request arguments (``cursor``, ``limit``)
+        keys: Columns of the sort key, unique together
+        key_of: Sort key values of a result row
+
+    Raises:
+        PaginationError: The cursor or the limit is invalid
+    """
+    limit = _page_size(args)
+    cursor = args.get("cursor")
+    if cursor:
+        query = query.filter(tuple_(*keys) < tuple_(*decode_cursor(cursor, keys)))
+
+    rows = query.order_by(*[key.desc() for key in keys]).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return Page(rows, None)
+    rows = rows[:limit]
+    return Page(rows, encode_cursor(key_of(rows[-1])))
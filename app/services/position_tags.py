@@ -0,0 +1,54 @@
+"""Signal id carried by the orders, to recognise their positions later.
+
+Every order used to be sent with the same ``magic`` (234000), so a position
+found by the sync without a stored trade could only be matched to a
+strategy by guessing from its symbol. Orders now carry the id of the signal
+they execute twice: in the magic number (``234 * 10**12 + signal id``,
+well inside the 64 bits MT5 allows) and in the order comment
+(``"STF <signal id> <strategy>"``, cut to the 31 characters MT5 keeps),
+for brokers or bridges that reset one of them. Positions opened by hand
+decode to None and are matched the old way.
+"""
+
+import re
+from typing import Any, Optional
+
+# Magic number of the orders sent before signal ids were encoded
+LEGACY_MAGIC = 234000
+
+MAGIC_PREFIX = 234
+MAGIC_SPAN = 10**12
+
+COMMENT_PREFIX = "STF"
+# MT5 truncates longer comments
+COMMENT_MAX_LENGTH = 31
+
+_COMMENT_PATTERN = re.compile(rf"^{COMMENT_PREFIX} (\d+)(?: |$)")
+
+
+def magic_for(signal_id: Optional[int]) -> int:
+    if not signal_id:
+        return LEGACY_MAGIC
+    return MAGIC_PREFIX * MAGIC_SPAN + signal_id
+
+
+def comment_for(signal_id: Optional[int], strategy: Optional[str] = None) -> str:
+    if not signal_id:
+        return ""
+    comment = f"{COMMENT_PREFIX} {signal_id}"
+    if strategy:
+        # Terminals only keep plain ASCII comments
+        comment = f"{comment} {strategy.encode('ascii', 'ignore').decode()}"
+    return comment[:COMMENT_MAX_LENGTH]
+
+
+def signal_id_of(position: Any) -> Optional[int]:
+    """Signal id encoded in a position (or deal), None if it has none."""
+    magic = getattr(position, "magic", 0) or 0
+    if magic // MAGIC_SPAN == MAGIC_PREFIX and magic % MAGIC_SPAN:
+        return magic % MAGIC_SPAN
+
+    match = _COMMENT_PATTERN.match(getattr(position, "comment", "") or "")
+    if match:
+        return int(match.group(1))
+    return None
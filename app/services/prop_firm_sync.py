@@ -0,0 +1,134 @@
+"""Concurrent synchronization of the prop firm accounts.
+
+Every terminal is synced by its own worker, so a cycle takes as long as the
+slowest account instead of the sum of all of them. The cycle has a global
+deadline: when it passes, the firms already synced are returned and the
+others are reported as pending (a broker call cannot be interrupted, they
+finish in the background). Each firm's result comes with its timing. A
+firm already being synced by another request is joined, not synced twice.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import select, update
+
+from app import db
+from app.models.prop_firm import PropFirm
+from app.models.user import user_prop_firm
+from app.services.single_flight import prop_firm_flight, single_flight
+
+logger = logging.getLogger(__name__)
+
+
+class PropFirmSynchronizer:
+    def __init__(self):
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=current_app.config.get("SYNC_MAX_WORKERS", 16),
+                    thread_name_prefix="prop-firm-sync",
+                )
+            return self._executor
+
+    def refresh_active(self):
+        """
+        A prop firm is active while at least one user has it, recomputed for
+        every prop firm with a single UPDATE.
+        """
+        db.session.execute(
+            update(PropFirm).values(
+                is_active=PropFirm.id.in_(select(user_prop_firm.c.prop_firm_id))
+            )
+        )
+        db.session.commit()
+
+    def sync(
+        self,
+        prop_firm_ids: Iterable[int],
+        force: bool = False,
+        deadline: Optional[float] = None,
+    ) -> Tuple[Dict[int, Any], Dict[int, Dict[str, Any]]]:
+        """
+        Sync the given prop firms concurrently (needs an app context).
+
+        Args:
+            prop_firm_ids: Prop firms to sync
+            force: Full reconciliation even for unchanged accounts
+            deadline: Seconds the whole cycle may take, defaults to
+                ``SYNC_DEADLINE_SECONDS``
+
+        Returns:
+            The sync result of each prop firm and its timing, both keyed by
+            prop firm id. Failed syncs are reported as
+            ``{"success": False, "error": ...}``.
+        """
+        app = current_app._get_current_object()
+        if deadline is None:
+            deadline = app.config.get("SYNC_DEADLINE_SECONDS", 4.5)
+
+        started = time.monotonic()
+        timings: Dict[int, Dict[str, Any]] = {}
+
+        def sync_one(prop_firm_id: int):
+            firm_started = time.monotonic()
+            timings[prop_firm_id] = {
+                "queued_seconds": round(firm_started - started, 4),
+                "status": "running",
+            }
+            try:
+                with app.app_context():
+                    prop_firm = db.session.get(PropFirm, prop_firm_id)
+                    result, coalesced = single_flight.run(
+                        prop_firm_flight(prop_firm_id),
+                        lambda: prop_firm.trading.sync_prop_firm(
+                            prop_firm, force=force
+                        ),
+                    )
+                    timings[prop_firm_id]["coalesced"] = coalesced
+                    return result
+            finally:
+                timings[prop_firm_id]["seconds"] = round(
+                    time.monotonic() - firm_started, 4
+                )
+
+        executor = self._get_executor()
+        futures = {
+            executor.submit(sync_one, prop_firm_id): prop_firm_id
+            for prop_firm_id in prop_firm_ids
+        }
+        wait(futures, timeout=deadline)
+
+        results: Dict[int, Any] = {}
+        report: Dict[int, Dict[str, Any]] = {}
+        for future, prop_firm_id in futures.items():
+            # Copied, late workers keep writing to their own entry
+            timing = dict(timings.get(prop_firm_id, {"status": "queued"}))
+            report[prop_firm_id] = timing
+            if not future.done():
+                timing["status"] = "pending"
+                timing["seconds"] = round(time.monotonic() - started, 4)
+                results[prop_firm_id] = {
+                    "success": False,
+                    "error": f"Not synced within the {deadline}s deadline",
+                }
+                continue
+            try:
+                results[prop_firm_id] = future.result()
+                timing["status"] = "done"
+            except Exception as e:
+                logger.error("Error syncing prop firm %s: %s", prop_firm_id, e)
+                results[prop_firm_id] = {"success": False, "error": str(e)}
+                timing["status"] = "error"
+        return results, report
+
+
+prop_firm_synchronizer = PropFirmSynchronizer()
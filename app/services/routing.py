@@ -0,0 +1,80 @@
+"""In-memory routing index from a signal ticker to the prop firms trading it."""
+
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from flask import current_app
+
+from app import db
+from app.models.prop_firm_trade_pair_association import PropFirmTradePairAssociation
+from app.models.trade_pairs import TradePairs
+from app.models.user import user_prop_firm
+
+logger = logging.getLogger(__name__)
+
+Route = Tuple[int, str]
+
+
+class RoutingTable:
+    """
+    ``ticker -> [(prop_firm_id, label)]`` for every prop firm associated with
+    at least one user.
+
+    The index is rebuilt lazily after ``invalidate()`` (called by the routes
+    that change trade pairs or user/prop firm associations) and, because other
+    gunicorn workers cannot invalidate it, after ``ROUTING_TABLE_TTL_SECONDS``.
+    """
+
+    def __init__(self):
+        self._routes: Optional[Dict[str, List[Route]]] = None
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+
+    def lookup(self, ticker: str) -> List[Route]:
+        return self._get_routes().get(ticker, [])
+
+    def invalidate(self):
+        with self._lock:
+            self._routes = None
+
+    def _get_routes(self) -> Dict[str, List[Route]]:
+        ttl = current_app.config.get("ROUTING_TABLE_TTL_SECONDS", 60)
+        with self._lock:
+            if self._routes is None or time.monotonic() - self._built_at > ttl:
+                self._routes = self._build()
+                self._built_at = time.monotonic()
+            return self._routes
+
+    @staticmethod
+    def _build() -> Dict[str, List[Route]]:
+        rows = (
+            db.session.query(
+                TradePairs.name,
+                PropFirmTradePairAssociation.prop_firm_id,
+                PropFirmTradePairAssociation.label,
+            )
+            .join(
+                PropFirmTradePairAssociation,
+                PropFirmTradePairAssociation.trade_pair_id == TradePairs.id,
+            )
+            .filter(
+                PropFirmTradePairAssociation.prop_firm_id.in_(
+                    db.session.query(user_prop_firm.c.prop_firm_id)
+                )
+            )
+            .order_by(PropFirmTradePairAssociation.prop_firm_id)
+            .all()
+        )
+
+        labels: Dict[str, Dict[int, str]] = {}
+        for ticker, prop_firm_id, label in rows:
+            labels.setdefault(ticker, {}).setdefault(prop_firm_id, label)
+        routes = {ticker: list(firms.items()) for ticker, firms in labels.items()}
+
+        logger.info("Routing table rebuilt with %s tickers", len(routes))
+        return routes
+
+
+routing_table = RoutingTable()
@@ -0,0 +1,213 @@
+"""Durable queue that decouples webhook ingestion from the prop firm fan-out.
+
+The webhook routes only persist the ``Signal`` and a ``SignalIngestion`` row
+and answer immediately. A small pool of worker threads claims queued rows
+(atomically, so several gunicorn workers can share the same table) and runs
+the usual ``handle_trade_with_parameters`` flow, storing the outcome on the
+ingestion row so callers can poll it.
+"""
+
+import logging
+import queue
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from flask import current_app
+from sqlalchemy import update
+
+from app import db
+from app.models.signal import Signal
+from app.models.signal_ingestion import SignalIngestion
+
+logger = logging.getLogger(__name__)
+
+
+class SignalQueue:
+    def __init__(self):
+        self._app = None
+        self._wakeup: "queue.Queue[Optional[int]]" = queue.Queue()
+        self._workers: list[threading.Thread] = []
+        self._running = False
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def init_app(self, app):
+        """Start the workers right away when the app runs in async mode."""
+        self._app = app
+        if app.config.get("SIGNAL_INGESTION_MODE") == "async":
+            self.start(app)
+
+    def start(self, app=None):
+        """Start the worker pool (no-op if it is already running)."""
+        with self._lock:
+            if self._running:
+                return
+            self._app = app or self._app or current_app._get_current_object()
+            self._running = True
+
+            with self._app.app_context():
+                self._fail_interrupted_jobs()
+
+            worker_count = self._app.config.get("SIGNAL_QUEUE_WORKERS", 4)
+            for index in range(worker_count):
+                worker = threading.Thread(
+                    target=self._worker_loop,
+                    name=f"signal-queue-{index}",
+                    daemon=True,
+                )
+                worker.start()
+                self._workers.append(worker)
+            logger.info("Signal queue started with %s workers", worker_count)
+
+    def stop(self):
+        """Stop the worker pool, letting in-flight jobs finish."""
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+            for _ in self._workers:
+                self._wakeup.put(None)
+            for worker in self._workers:
+                worker.join(timeout=5)
+            self._workers = []
+
+    def enqueue(self, signal: Signal) -> SignalIngestion:
+        """Durably queue an already saved signal for fan-out."""
+        return self.enqueue_many([signal])[0]
+
+    def enqueue_many(self, signals: list[Signal]) -> list[SignalIngestion]:
+        """Queue several saved signals in a single transaction."""
+        jobs = [
+            SignalIngestion(signal_id=signal.id, status=SignalIngestion.QUEUED)
+            for signal in signals
+        ]
+        db.session.add_all(jobs)
+        db.session.commit()
+
+        self.start()
+        for job in jobs:
+            self._wakeup.put(job.id)
+        return jobs
+
+    @staticmethod
+    def latest_for_signal(signal_id: int) -> Optional[SignalIngestion]:
+        return (
+            SignalIngestion.query.filter_by(signal_id=signal_id)
+            .order_by(SignalIngestion.id.desc())
+            .first()
+        )
+
+    def _worker_loop(self):
+        poll_interval = self._app.config.get("SIGNAL_QUEUE_POLL_SECONDS", 2)
+        while self._running:
+            try:
+                job_id = self._wakeup.get(timeout=poll_interval)
+            except queue.Empty:
+                job_id = None
+
+            if not self._running:
+                return
+
+            with self._app.app_context():
+                try:
+                    # Drain everything that is queued, including rows written
+                    # by other processes, before going back to sleep.
+                    claimed_id = self._claim(job_id)
+                    while claimed_id is not None:
+                        self._process(claimed_id)
+                        claimed_id = self._claim()
+                except Exception as e:
+                    logger.error("Signal queue worker error: %s", e)
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+
+    def _claim(self, job_id: Optional[int] = None) -> Optional[int]:
+        """Atomically move a queued job to processing and return its id."""
+        candidates = (
+            [job_id]
+            if job_id is not None
+            else [
+                row.id
+                for row in db.session.query(SignalIngestion.id)
+                .filter_by(status=SignalIngestion.QUEUED)
+                .order_by(SignalIngestion.id)
+                .limit(10)
+            ]
+        )
+
+        for candidate in candidates:
+            result = db.session.execute(
+                update(SignalIngestion)
+                .where(
+                    SignalIngestion.id == candidate,
+                    SignalIngestion.status == SignalIngestion.QUEUED,
+                )
+                .values(
+                    status=SignalIngestion.PROCESSING,
+                    started_at=datetime.now(timezone.utc),
+                    attempts=SignalIngestion.attempts + 1,
+                )
+            )
+            db.session.commit()
+            if result.rowcount == 1:
+                return candidate
+
+        return None
+
+    def _process(self, job_id: int):
+        from app.routes.trades import handle_trade_with_parameters
+
+        job = db.session.get(SignalIngestion, job_id)
+        signal = db.session.get(Signal, job.signal_id)
+
+        try:
+            trades = handle_trade_with_parameters(signal)
+            job.result = {
+                "trades": [
+                    {
+                        "prop_firm_id": trade.prop_firm_id,
+                        "signal_id": trade.signal_id,
+                        "platform_id": trade.platform_id,
+                    }
+                    for trade in trades
+                ]
+            }
+            job.status = SignalIngestion.DONE
+        except Exception as e:
+            logger.error("Error processing signal %s: %s", job.signal_id, e)
+            db.session.rollback()
+            job = db.session.get(SignalIngestion, job_id)
+            job.status = SignalIngestion.FAILED
+            job.error = str(e)
+
+        job.finished_at = datetime.now(timezone.utc)
+        db.session.commit()
+
+    def _fail_interrupted_jobs(self):
+        """
+        Jobs left in processing by a dead worker are not retried, because the
+        broker may already have filled them; they are marked failed instead.
+        """
+        stale_seconds = self._app.config.get("SIGNAL_QUEUE_STALE_SECONDS", 600)
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=stale_seconds)
+        db.session.execute(
+            update(SignalIngestion)
+            .where(
+                SignalIngestion.status == SignalIngestion.PROCESSING,
+                SignalIngestion.started_at < cutoff,
+            )
+            .values(
+                status=SignalIngestion.FAILED,
+                error="Interrupted before completion",
+                finished_at=datetime.now(timezone.utc),
+            )
+        )
+        db.session.commit()
+
+
+signal_queue = SignalQueue()
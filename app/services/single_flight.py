@@ -0,0 +1,267 @@
+"""Single-flight runs of the prop firm syncs.
+
+The scheduler script, the tradesSync app, the frontend auto-sync and manual
+calls can all ask for a sync at the same time, and when a cycle outlasts the
+interval the requests pile up on the same terminals. A sync is now run by
+one caller at a time per name (``"all"`` or ``"prop_firm:<id>"``); whoever
+asks while it is running joins it and gets its result.
+
+Callers of the same process wait on the in-memory flight. Across gunicorn
+workers the run is guarded by a lease row in ``sync_leases``: the worker
+that takes the lease runs the job and stores the result in the row, the
+others poll the row until a result newer than their request shows up. A
+run that failed is stored as such and raised again in the waiting workers.
+The leader renews the lease every third of ``SYNC_LEASE_SECONDS`` while the
+job runs, so only a lease left behind by a crashed worker expires.
+"""
+
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models.sync_lease import SyncLease
+
+logger = logging.getLogger(__name__)
+
+
+def lease_owner() -> str:
+    """This worker process as a lease holder (read late, workers are forks)"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+SYNC_ALL = "all"
+
+# Key of the stored result of a run that raised
+_FAILED = "single_flight_error"
+
+
+class SingleFlightError(Exception):
+    """The run joined in another worker failed."""
+
+
+def prop_firm_flight(prop_firm_id: int) -> str:
+    return f"prop_firm:{prop_firm_id}"
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[Exception] = None
+        self.joined = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"runs": 0, "coalesced": 0, "coalesced_remote": 0}
+        )
+
+    def run(self, name: str, job: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run ``job`` unless a run of ``name`` is in progress, in which case
+        wait for that one (needs an app context).
+
+        Returns:
+            The result of the run and whether this call joined another one.
+            The result of a run made by another worker is its JSON form.
+        """
+        with self._lock:
+            flight = self._flights.get(name)
+            leader = flight is None
+            if leader:
+                flight = self._flights[name] = _Flight()
+            else:
+                flight.joined += 1
+                self._counters[name]["coalesced"] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+
+        try:
+            flight.result, coalesced = self._run_leased(name, job, flight)
+            return flight.result, coalesced
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[name]
+            flight.done.set()
+
+    def acquire(self, name: str, ttl: float) -> bool:
+        """Take (or extend) the lease ``name`` for ``ttl`` seconds."""
+        now = datetime.now(timezone.utc)
+        owner = lease_owner()
+        taken = db.session.execute(
+            update(SyncLease)
+            .where(
+                SyncLease.name == name,
+                or_(
+                    SyncLease.owner.is_(None),
+                    SyncLease.owner == owner,
+                    SyncLease.expires_at < now,
+                ),
+            )
+            .values(
+                owner=owner,
+                started_at=now,
+                expires_at=now + timedelta(seconds=ttl),
+            )
+        ).rowcount
+        if taken:
+            db.session.commit()
+            return True
+
+        db.session.add(
+            SyncLease(
+                name=name,
+                owner=owner,
+                expires_at=now + timedelta(seconds=ttl),
+                coalesced=0,
+            )
+        )
+        try:
+            db.session.commit()
+            return True
+        except IntegrityError:
+            # Held by another worker
+            db.session.rollback()
+            return False
+
+    def release(self, name: str, result: Any = None, joined: int = 0):
+        """Give the lease up, storing the result for the waiting workers."""
+        db.session.execute(
+            update(SyncLease)
+            .where(SyncLease.name == name, SyncLease.owner == lease_owner())
+            .values(
+                owner=None,
+                expires_at=None,
+                finished_at=datetime.now(timezone.utc),
+                result=result,
+                coalesced=SyncLease.coalesced + joined,
+            )
+        )
+        db.session.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Runs and coalesced requests of this process, and of all workers."""
+        with self._lock:
+            process = {name: dict(counters) for name, counters in self._counters.items()}
+        all_workers = dict(db.session.query(SyncLease.name, SyncLease.coalesced))
+        return {
+            "coalesced": sum(
+                counters["coalesced"] + counters["coalesced_remote"]
+                for counters in process.values()
+            ),
+            "by_name": process,
+            "coalesced_all_workers": all_workers,
+        }
+
+    def _run_leased(
+        self, name: str, job: Callable[[], Any], flight: _Flight
+    ) -> Tuple[Any, bool]:
+        ttl = current_app.config.get("SYNC_LEASE_SECONDS", 30)
+        poll = current_app.config.get("SYNC_LEASE_POLL_SECONDS", 0.1)
+        requested_at = datetime.now(timezone.utc)
+
+        if not self.acquire(name, ttl):
+            # Another worker runs it: wait for a result newer than the
+            # request, or take the lease over once it is released or expired
+            while True:
+                time.sleep(poll)
+                stored = self._finished_since(name, requested_at)
+                if stored is None and self.acquire(name, ttl):
+                    # The run may have ended between the two reads
+                    stored = self._finished_since(name, requested_at)
+                    if stored is None:
+                        break
+                    db.session.execute(
+                        update(SyncLease)
+                        .where(SyncLease.name == name, SyncLease.owner == lease_owner())
+                        .values(owner=None, expires_at=None)
+                    )
+                if stored is not None:
+                    with self._lock:
+                        self._counters[name]["coalesced_remote"] += 1
+                    db.session.execute(
+                        update(SyncLease)
+                        .where(SyncLease.name == name)
+                        .values(coalesced=SyncLease.coalesced + 1 + flight.joined)
+                    )
+                    db.session.commit()
+                    if isinstance(stored.result, dict) and _FAILED in stored.result:
+                        raise SingleFlightError(stored.result[_FAILED])
+                    return stored.result, True
+
+        with self._lock:
+            self._counters[name]["runs"] += 1
+        stop = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._renew,
+            args=(current_app._get_current_object(), name, ttl, stop),
+            name=f"lease-{name}",
+            daemon=True,
+        )
+        heartbeat.start()
+        try:
+            result = job()
+        except Exception as e:
+            db.session.rollback()
+            self.release(name, {_FAILED: str(e)}, flight.joined)
+            raise
+        finally:
+            stop.set()
+            heartbeat.join()
+        self.release(name, _to_json(result), flight.joined)
+        return result, False
+
+    @staticmethod
+    def _finished_since(name: str, requested_at: datetime):
+        return (
+            db.session.query(SyncLease.result)
+            .filter(SyncLease.name == name, SyncLease.finished_at >= requested_at)
+            .first()
+        )
+
+    def _renew(self, app, name: str, ttl: float, stop: threading.Event):
+        """Keep the lease of a running job from expiring"""
+        while not stop.wait(ttl / 3):
+            with app.app_context():
+                try:
+                    if not self.acquire(name, ttl):
+                        logger.warning("Lease %s was taken over by another worker", name)
+                        return
+                except Exception as e:
+                    db.session.rollback()
+                    logger.warning("Could not renew the lease %s: %s", name, e)
+                finally:
+                    db.session.remove()
+
+
+def _to_json(result: Any) -> Any:
+    """The result as the waiting workers will read it back"""
+    try:
+        return json.loads(current_app.json.dumps(result))
+    except (TypeError, ValueError) as e:
+        logger.warning("Sync result cannot be shared: %s", e)
+        return None
+
+
+single_flight = SingleFlight()
@@ -0,0 +1,132 @@
+"""Strategy guessed for the positions the sync cannot attribute to a signal.
+
+The guess is the strategy whose name contains the most characters of the
+symbol (each character of the symbol counted as many times as it appears
+in it), if that covers at least a fifth of the symbol; the first strategy
+wins ties. It used to load every strategy and compare the names character
+by character for each unknown position.
+
+The matcher loads the names once and keeps each one as a bitmask of its
+characters. Names with the same mask are the same candidate, so a symbol is
+scored against the distinct masks only, with a few integer operations each,
+and its answer is memoized. The create, update and delete routes of the
+trading strategies invalidate it; other workers reload it after
+``STRATEGY_MATCHER_REFRESH_SECONDS``.
+"""
+
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+from flask import current_app, has_app_context
+
+from app import db
+from app.models.trading_strategy import TradingStrategy
+
+NO_STRATEGY = "NO_STRATEGY"
+
+# Share of the symbol a strategy name must cover to be picked
+MIN_SCORE = 0.2
+
+
+class StrategyMatcher:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._names: Optional[List[str]] = None
+        self._bits: Dict[str, int] = {}
+        # Distinct character masks, each with the first name that has it
+        self._masks: Dict[int, str] = {}
+        self._matches: Dict[str, str] = {}
+        self._loaded_at = 0.0
+
+    def invalidate(self):
+        """Forget the strategies, they are reloaded on the next match."""
+        with self._lock:
+            self._names = None
+            self._matches.clear()
+
+    def load(self, names: Iterable[str]):
+        """Index the strategy names, in the order they are to be tried."""
+        names = list(names)
+        bits: Dict[str, int] = {}
+        masks: Dict[int, str] = {}
+        for name in names:
+            mask = 0
+            for char in set(name.lower()):
+                mask |= 1 << bits.setdefault(char, len(bits))
+            masks.setdefault(mask, name)
+
+        with self._lock:
+            self._names = names
+            self._bits = bits
+            self._masks = masks
+            self._matches = {}
+            self._loaded_at = time.monotonic()
+
+    def match(self, symbol: str) -> str:
+        """
+        Best matching strategy name for ``symbol``, loading the strategies
+        first if they are not (needs an app context then).
+        """
+        refresh = 0
+        if has_app_context():
+            refresh = current_app.config.get("STRATEGY_MATCHER_REFRESH_SECONDS", 60)
+        with self._lock:
+            loaded = self._names is not None and (
+                not refresh or time.monotonic() - self._loaded_at < refresh
+            )
+            if loaded and symbol in self._matches:
+                return self._matches[symbol]
+        if not loaded:
+            self._load_strategies()
+
+        with self._lock:
+            match = self._matches.get(symbol)
+            if match is None:
+                match = self._matches[symbol] = self._best_match(symbol)
+            return match
+
+    def _load_strategies(self):
+        self.load(
+            name
+            for (name,) in db.session.query(TradingStrategy.name).order_by(
+                TradingStrategy.id
+            )
+        )
+
+    def _best_match(self, symbol: str) -> str:
+        symbol_lower = symbol.lower()
+        if not self._names or not symbol_lower:
+            return NO_STRATEGY
+
+        # Characters of the symbol found in some name, as (bit, occurrences)
+        weights = {
+            1 << self._bits[char]: count
+            for char, count in Counter(symbol_lower).items()
+            if char in self._bits
+        }
+        wanted = sum(weights)
+
+        best_match = None
+        best_common = 0
+        scores: Dict[int, int] = {}
+        for mask, name in self._masks.items():
+            found = mask & wanted
+            if found in scores:
+                continue
+            scores[found] = common = sum(
+                count for bit, count in weights.items() if found & bit
+            )
+            if common > best_common:
+                best_common = common
+                best_match = name
+                if found == wanted:
+                    break
+
+        if best_match and best_common / len(symbol_lower) >= MIN_SCORE:
+            return best_match
+        return NO_STRATEGY
+
+
+strategy_matcher = StrategyMatcher()
@@ -0,0 +1,224 @@
+"""Per prop firm catalog of broker symbol specifications.
+
+``symbol_info`` used to be queried on every order and volumes were found by
+shrinking ``contracts`` until the broker accepted one. The catalog keeps the
+specification of every (prop firm, symbol) pair in memory, persisted in
+``symbol_specifications`` so it survives restarts, and refreshes it from the
+terminals in the background. Orders are rounded to the volume step and
+clamped to the volume limits before the first send.
+
+Only the worker holding the ``symbol_catalog`` lease refreshes the
+terminals, skipping the prop firms that are placing orders; the other
+workers reload the rows it stored.
+"""
+
+import logging
+import math
+import threading
+import time
+from decimal import Decimal
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from app import db
+from app.models.prop_firm import PropFirm
+from app.models.prop_firm_trade_pair_association import PropFirmTradePairAssociation
+from app.models.symbol_specification import SymbolSpecification
+from app.models.user import user_prop_firm
+
+logger = logging.getLogger(__name__)
+
+LEADER_LEASE = "symbol_catalog"
+
+# Same values as the MetaTrader5 SYMBOL_TRADE_MODE_* constants
+TRADE_MODE_DISABLED = 0
+TRADE_MODE_LONGONLY = 1
+TRADE_MODE_SHORTONLY = 2
+TRADE_MODE_CLOSEONLY = 3
+TRADE_MODE_FULL = 4
+
+
+class SymbolSpec(NamedTuple):
+    volume_min: float
+    volume_max: float
+    volume_step: float
+    digits: int
+    trade_contract_size: Optional[float]
+    trade_mode: int
+    filling_mode: int
+    visible: bool
+
+    def normalize_volume(self, volume: float) -> float:
+        """Round down to the volume step, then clamp to the volume limits."""
+        step = self.volume_step or 0.01
+        decimals = max(0, -Decimal(str(step)).as_tuple().exponent)
+        volume = math.floor(volume / step + 1e-9) * step
+        return round(min(max(volume, self.volume_min), self.volume_max), decimals)
+
+    def rejects(self, order_type: str) -> Optional[str]:
+        """Why an order of this side cannot be opened, None if it can."""
+        if self.trade_mode in (TRADE_MODE_DISABLED, TRADE_MODE_CLOSEONLY):
+            return "Trading is disabled for this symbol"
+        if self.trade_mode == TRADE_MODE_LONGONLY and order_type.upper() != "BUY":
+            return "Only long positions are allowed for this symbol"
+        if self.trade_mode == TRADE_MODE_SHORTONLY and order_type.upper() == "BUY":
+            return "Only short positions are allowed for this symbol"
+        return None
+
+
+def _spec_from_row(row: SymbolSpecification) -> SymbolSpec:
+    return SymbolSpec(
+        volume_min=row.volume_min,
+        volume_max=row.volume_max,
+        volume_step=row.volume_step,
+        digits=row.digits,
+        trade_contract_size=row.trade_contract_size,
+        trade_mode=row.trade_mode,
+        filling_mode=row.filling_mode,
+        visible=row.visible,
+    )
+
+
+def spec_from_symbol_info(symbol_info: Any) -> SymbolSpec:
+    """Build a spec from an ``mt5.symbol_info()`` result."""
+    return SymbolSpec(
+        volume_min=symbol_info.volume_min,
+        volume_max=symbol_info.volume_max,
+        volume_step=symbol_info.volume_step,
+        digits=symbol_info.digits,
+        trade_contract_size=getattr(symbol_info, "trade_contract_size", None),
+        trade_mode=symbol_info.trade_mode,
+        filling_mode=symbol_info.filling_mode,
+        visible=bool(symbol_info.visible),
+    )
+
+
+class SymbolCatalog:
+    def __init__(self):
+        self._specs: Optional[Dict[Tuple[int, str], SymbolSpec]] = None
+        self._lock = threading.Lock()
+        self._app = None
+        self._refresh_thread: Optional[threading.Thread] = None
+
+    def init_app(self, app):
+        """Start the background refresh when an interval is configured."""
+        self._app = app
+        interval = app.config.get("SYMBOL_CATALOG_REFRESH_SECONDS", 0)
+        if interval > 0 and self._refresh_thread is None:
+            self._refresh_thread = threading.Thread(
+                target=self._refresh_loop,
+                args=(interval,),
+                name="symbol-catalog",
+                daemon=True,
+            )
+            self._refresh_thread.start()
+
+    def get(self, prop_firm_id: int, symbol: str) -> Optional[SymbolSpec]:
+        return self._load().get((prop_firm_id, symbol))
+
+    def all_for(self, prop_firm_id: int) -> Dict[str, SymbolSpec]:
+        return {
+            symbol: spec
+            for (firm_id, symbol), spec in self._load().items()
+            if firm_id == prop_firm_id
+        }
+
+    def store(self, prop_firm_id: int, symbol: str, spec: SymbolSpec) -> SymbolSpec:
+        """Save a spec fetched from the platform (needs an app context)."""
+        row = db.session.get(SymbolSpecification, (prop_firm_id, symbol))
+        if row is None:
+            row = SymbolSpecification(prop_firm_id=prop_firm_id, symbol=symbol)
+            db.session.add(row)
+        for field, value in spec._asdict().items():
+            setattr(row, field, value)
+        db.session.commit()
+
+        with self._lock:
+            if self._specs is not None:
+                self._specs[(prop_firm_id, symbol)] = spec
+        return spec
+
+    def forget(self, prop_firm_id: int, symbol: str):
+        """Drop a spec the broker disagreed with, the next order refetches it."""
+        with self._lock:
+            if self._specs is not None:
+                self._specs.pop((prop_firm_id, symbol), None)
+
+    def invalidate(self):
+        with self._lock:
+            self._specs = None
+
+    def _load(self) -> Dict[Tuple[int, str], SymbolSpec]:
+        with self._lock:
+            if self._specs is None:
+                self._specs = {
+                    (row.prop_firm_id, row.symbol): _spec_from_row(row)
+                    for row in SymbolSpecification.query.all()
+                }
+            return self._specs
+
+    def refresh(self):
+        """Refetch the spec of every symbol of the prop firms in use."""
+        rows = (
+            db.session.query(
+                PropFirmTradePairAssociation.prop_firm_id,
+                PropFirmTradePairAssociation.label,
+            )
+            .filter(
+                PropFirmTradePairAssociation.prop_firm_id.in_(
+                    db.session.query(user_prop_firm.c.prop_firm_id)
+                )
+            )
+            .all()
+        )
+        labels: Dict[int, List[str]] = {}
+        for prop_firm_id, label in rows:
+            labels.setdefault(prop_firm_id, []).append(label)
+
+        for prop_firm_id, firm_labels in labels.items():
+            if self._placing_orders(prop_firm_id):
+                # Left for the next refresh rather than queued behind orders
+                logger.info("Skipped the symbols of %s, busy", prop_firm_id)
+                continue
+            prop_firm = db.session.get(PropFirm, prop_firm_id)
+            trading = prop_firm.trading if prop_firm else None
+            refresh_symbols = getattr(trading, "refresh_symbol_specs", None)
+            if refresh_symbols is None:
+                continue
+            try:
+                refreshed = refresh_symbols(firm_labels)
+                logger.info(
+                    "Refreshed %s symbols of %s", len(refreshed), prop_firm.name
+                )
+            except Exception as e:
+                logger.error("Error refreshing symbols of %s: %s", prop_firm_id, e)
+
+    @staticmethod
+    def _placing_orders(prop_firm_id: int) -> bool:
+        from app.services.fanout import in_flight_signals
+        from app.trade_actions.order_scheduler import order_scheduler
+
+        return in_flight_signals.busy(prop_firm_id) or order_scheduler.has_orders(
+            prop_firm_id
+        )
+
+    def _refresh_loop(self, interval: float):
+        from app.services.single_flight import single_flight
+
+        while True:
+            time.sleep(interval)
+            with self._app.app_context():
+                try:
+                    # Held over the next interval, taken over when the
+                    # leader stops renewing it
+                    if single_flight.acquire(LEADER_LEASE, interval * 2):
+                        self.refresh()
+                    else:
+                        self.invalidate()
+                except Exception as e:
+                    logger.error("Symbol catalog refresh failed: %s", e)
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+
+
+symbol_catalog = SymbolCatalog()
@@ -0,0 +1,213 @@
+"""Periodic prop firm sync, run inside the app.
+
+The periodic sync used to be a separate process (``sync_scheduler.py``,
+``tradesSync``) posting to ``/sync_public`` every 5 seconds. This scheduler
+runs in one gunicorn worker, elected through the ``"sync_scheduler"`` lease
+of ``sync_leases``, and calls the synchronizer directly. It is off unless
+``SYNC_SCHEDULER_ENABLED`` is set, and replaces the external pollers when it
+is: run one or the other.
+
+A prop firm with orders being placed by a fan-out of any worker, or queued
+in this one, is not synced: the fan-out records those orders itself. It is
+synced once they are done, ``SYNC_INTERVAL_MIN_SECONDS`` after its last sync
+at the earliest. Otherwise each prop firm has its own interval, which starts
+at ``SYNC_INTERVAL_SECONDS``:
+
+* ``SYNC_INTERVAL_MIN_SECONDS`` after its positions changed (one was
+  opened, closed or resized; profit moving with the price does not count);
+* doubling up to ``SYNC_INTERVAL_MAX_SECONDS`` while its positions stay the
+  same or the sync fails;
+* ``SYNC_INTERVAL_MAX_SECONDS`` while the broker reports the market closed.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from app import db
+
+logger = logging.getLogger(__name__)
+
+LEADER_LEASE = "sync_scheduler"
+
+
+class _FirmSchedule:
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.next_due = 0.0
+        self.last_run = 0.0
+        self.positions_key: Optional[str] = None
+        self.last_status: Optional[str] = None
+
+
+class SyncScheduler:
+    def __init__(self):
+        self._app = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._schedules: Dict[int, _FirmSchedule] = {}
+        self._leader = False
+        self._lease_renewed = 0.0
+        self._active_refreshed = 0.0
+        self._cycles = 0
+
+    def init_app(self, app):
+        """Start the scheduler thread when it is enabled."""
+        self._app = app
+        if app.config.get("SYNC_SCHEDULER_ENABLED") and self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="sync-scheduler", daemon=True
+            )
+            self._thread.start()
+
+    @property
+    def leader(self) -> bool:
+        return self._leader
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "running": self._thread is not None,
+                "leader": self._leader,
+                "cycles": self._cycles,
+                "prop_firms": {
+                    prop_firm_id: {
+                        "interval_seconds": schedule.interval,
+                        "next_sync_in_seconds": round(
+                            max(schedule.next_due - now, 0.0), 2
+                        ),
+                        "last_status": schedule.last_status,
+                    }
+                    for prop_firm_id, schedule in self._schedules.items()
+                },
+            }
+
+    def _run(self):
+        tick = self._app.config.get("SYNC_SCHEDULER_TICK_SECONDS", 0.5)
+        while True:
+            with self._app.app_context():
+                try:
+                    if self._hold_lease():
+                        self.run_due()
+                except Exception as e:
+                    logger.error("Sync scheduler cycle failed: %s", e)
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+            time.sleep(tick)
+
+    def _hold_lease(self) -> bool:
+        """Take or renew the leader lease, renewed at half its lifetime."""
+        from app.services.single_flight import single_flight
+
+        ttl = self._app.config.get("SYNC_SCHEDULER_LEASE_SECONDS", 15)
+        now = time.monotonic()
+        if self._leader and now - self._lease_renewed < ttl / 2:
+            return True
+
+        leader = single_flight.acquire(LEADER_LEASE, ttl)
+        if leader != self._leader:
+            logger.info(
+                "Sync scheduler %s", "elected" if leader else "lost the leadership"
+            )
+        self._leader = leader
+        if leader:
+            self._lease_renewed = now
+        return leader
+
+    def run_due(self):
+        """Sync the prop firms whose interval elapsed (app context)."""
+        from app.models.prop_firm import PropFirm
+        from app.services.prop_firm_sync import prop_firm_synchronizer
+
+        config = self._app.config
+        base = config.get("SYNC_INTERVAL_SECONDS", 5)
+        fastest = config.get("SYNC_INTERVAL_MIN_SECONDS", 1)
+        now = time.monotonic()
+
+        if now - self._active_refreshed >= base:
+            prop_firm_synchronizer.refresh_active()
+            self._active_refreshed = now
+        active_ids = {
+            prop_firm_id
+            for (prop_firm_id,) in db.session.query(PropFirm.id).filter_by(
+                is_active=True
+            )
+        }
+        with self._lock:
+            for prop_firm_id in set(self._schedules) - active_ids:
+                del self._schedules[prop_firm_id]
+            for prop_firm_id in active_ids - set(self._schedules):
+                self._schedules[prop_firm_id] = _FirmSchedule(base)
+            due = []
+            for prop_firm_id, schedule in self._schedules.items():
+                if self._placing_orders(prop_firm_id):
+                    # Synced as soon as its orders are done
+                    schedule.last_status = "orders_in_flight"
+                    schedule.next_due = min(
+                        schedule.next_due, schedule.last_run + fastest
+                    )
+                elif schedule.next_due <= now:
+                    due.append(prop_firm_id)
+        if not due:
+            return
+
+        results, _ = prop_firm_synchronizer.sync(due)
+        finished = time.monotonic()
+        with self._lock:
+            self._cycles += 1
+            for prop_firm_id, result in results.items():
+                schedule = self._schedules.get(prop_firm_id)
+                if schedule is None:
+                    continue
+                schedule.interval = self._next_interval(prop_firm_id, schedule, result)
+                schedule.last_run = finished
+                schedule.next_due = finished + schedule.interval
+
+    @staticmethod
+    def _placing_orders(prop_firm_id: int) -> bool:
+        from app.services.fanout import in_flight_signals
+        from app.trade_actions.order_scheduler import order_scheduler
+
+        return in_flight_signals.busy(prop_firm_id) or order_scheduler.has_orders(
+            prop_firm_id
+        )
+
+    def _next_interval(
+        self, prop_firm_id: int, schedule: _FirmSchedule, result: Any
+    ) -> float:
+        from app.trade_actions.registry import trading_registry
+
+        config = self._app.config
+        base = config.get("SYNC_INTERVAL_SECONDS", 5)
+        fastest = config.get("SYNC_INTERVAL_MIN_SECONDS", 1)
+        slowest = config.get("SYNC_INTERVAL_MAX_SECONDS", 60)
+
+        if not isinstance(result, dict) or result.get("success") is False:
+            schedule.last_status = "error"
+            return min(max(schedule.interval, base) * 2, slowest)
+
+        positions_key = result.get("positions_key")
+        changed = (
+            schedule.positions_key is not None
+            and positions_key != schedule.positions_key
+        )
+        schedule.positions_key = positions_key
+
+        adapter = trading_registry.peek(prop_firm_id)
+        closed_at = getattr(adapter, "market_closed_at", None)
+        if closed_at is not None and time.monotonic() - closed_at < slowest:
+            schedule.last_status = "market_closed"
+            return slowest
+
+        if changed:
+            schedule.last_status = "changing"
+            return fastest
+
+        schedule.last_status = "idle"
+        return min(max(schedule.interval * 2, fastest), slowest)
+
+
+sync_scheduler = SyncScheduler()
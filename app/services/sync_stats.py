@@ -0,0 +1,45 @@
+"""Counters of the prop firm synchronization.
+
+The periodic sync mostly finds accounts exactly as it left them. Each
+``sync_prop_firm`` reports whether it did the full reconciliation or took
+the fast path because the account fingerprint had not changed, so the share
+of skipped work can be watched from ``/health`` and the sync responses.
+"""
+
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Optional
+
+
+class SyncStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[int, Dict[str, int]] = defaultdict(
+            lambda: {"syncs": 0, "skipped": 0}
+        )
+
+    def record(self, prop_firm_id: int, skipped: bool):
+        with self._lock:
+            counters = self._counters[prop_firm_id]
+            counters["syncs"] += 1
+            counters["skipped"] += int(skipped)
+
+    def stats(self, prop_firm_id: Optional[int] = None) -> Dict[str, Any]:
+        """Totals since the process started and the counters per prop firm."""
+        with self._lock:
+            by_prop_firm = {
+                firm_id: dict(counters)
+                for firm_id, counters in self._counters.items()
+                if prop_firm_id is None or firm_id == prop_firm_id
+            }
+        syncs = sum(counters["syncs"] for counters in by_prop_firm.values())
+        skipped = sum(counters["skipped"] for counters in by_prop_firm.values())
+        return {
+            "syncs": syncs,
+            "skipped": skipped,
+            "skip_ratio": round(skipped / syncs, 4) if syncs else 0.0,
+            "by_prop_firm": by_prop_firm,
+        }
+
+
+sync_stats = SyncStats()
@@ -0,0 +1,628 @@
+"""Offline stand-in for the ``MetaTrader5`` module.
+
+It implements the part of the API used by ``MT5Trading`` (functions, named
+tuple results, retcodes and constants with the real values) on top of an
+in-memory broker, so the order path can run and be benchmarked on machines
+without a terminal. Each login has its own balance and position book; prices
+follow a small random walk per symbol.
+
+Latency, rejections and requotes are set with ``configure()``, which is a
+module function like the others so a terminal worker process can be
+configured through its proxy too. Example::
+
+    from app.trade_actions import mt5_simulator as mt5
+
+    mt5.configure(order_latency_ms=40, latency_distribution="lognormal",
+                  reject_rate=0.01, requote_rate=0.02, seed=7)
+    mt5.initialize(login=1234, password="x", server="Demo")
+"""
+
+import itertools
+import math
+import random
+import threading
+import time
+from collections import namedtuple
+from typing import Any, Dict, Optional, Tuple
+
+# Constants, same values as the MetaTrader5 package
+ORDER_TYPE_BUY = 0
+ORDER_TYPE_SELL = 1
+
+TRADE_ACTION_DEAL = 1
+TRADE_ACTION_PENDING = 5
+TRADE_ACTION_SLTP = 6
+TRADE_ACTION_MODIFY = 7
+TRADE_ACTION_REMOVE = 8
+
+ORDER_FILLING_FOK = 0
+ORDER_FILLING_IOC = 1
+ORDER_FILLING_RETURN = 2
+ORDER_FILLING_BOC = 3
+
+ORDER_TIME_GTC = 0
+
+SYMBOL_FILLING_FOK = 1
+SYMBOL_FILLING_IOC = 2
+SYMBOL_FILLING_BOC = 4
+
+SYMBOL_TRADE_MODE_DISABLED = 0
+SYMBOL_TRADE_MODE_LONGONLY = 1
+SYMBOL_TRADE_MODE_SHORTONLY = 2
+SYMBOL_TRADE_MODE_CLOSEONLY = 3
+SYMBOL_TRADE_MODE_FULL = 4
+
+DEAL_TYPE_BUY = 0
+DEAL_TYPE_SELL = 1
+DEAL_ENTRY_IN = 0
+DEAL_ENTRY_OUT = 1
+
+TRADE_RETCODE_REQUOTE = 10004
+TRADE_RETCODE_REJECT = 10006
+TRADE_RETCODE_CANCEL = 10007
+TRADE_RETCODE_PLACED = 10008
+TRADE_RETCODE_DONE = 10009
+TRADE_RETCODE_DONE_PARTIAL = 10010
+TRADE_RETCODE_ERROR = 10011
+TRADE_RETCODE_TIMEOUT = 10012
+TRADE_RETCODE_INVALID = 10013
+TRADE_RETCODE_INVALID_VOLUME = 10014
+TRADE_RETCODE_INVALID_PRICE = 10015
+TRADE_RETCODE_INVALID_STOPS = 10016
+TRADE_RETCODE_TRADE_DISABLED = 10017
+TRADE_RETCODE_MARKET_CLOSED = 10018
+TRADE_RETCODE_NO_MONEY = 10019
+TRADE_RETCODE_PRICE_CHANGED = 10020
+TRADE_RETCODE_PRICE_OFF = 10021
+TRADE_RETCODE_POSITION_CLOSED = 10036
+TRADE_RETCODE_INVALID_FILL = 10030
+TRADE_RETCODE_CONNECTION = 10031
+
+RES_S_OK = 1
+RES_E_FAIL = -1
+RES_E_INVALID_PARAMS = -2
+RES_E_NOT_FOUND = -4
+RES_E_AUTH_FAILED = -6
+RES_E_NO_IPC = -10000
+
+# Result types, with the field names of the MetaTrader5 package
+AccountInfo = namedtuple(
+    "AccountInfo",
+    "login trade_mode leverage balance credit profit equity margin margin_free "
+    "margin_level name server currency company",
+)
+SymbolInfo = namedtuple(
+    "SymbolInfo",
+    "name visible select digits point trade_contract_size trade_mode "
+    "filling_mode volume_min volume_max volume_step bid ask description",
+)
+Tick = namedtuple("Tick", "time bid ask last volume time_msc flags volume_real")
+TradePosition = namedtuple(
+    "TradePosition",
+    "ticket time time_msc type magic identifier reason volume price_open sl tp "
+    "price_current swap profit symbol comment external_id",
+)
+TradeDeal = namedtuple(
+    "TradeDeal",
+    "ticket order time time_msc type entry magic position_id reason volume "
+    "price commission swap profit fee symbol comment external_id",
+)
+OrderSendResult = namedtuple(
+    "OrderSendResult",
+    "retcode deal order volume price bid ask comment request_id "
+    "retcode_external request",
+)
+
+_DEFAULT_SETTINGS: Dict[str, Any] = {
+    # Broker round-trip of order_send / Close and of the read-only calls
+    "order_latency_ms": 0.0,
+    "query_latency_ms": 0.0,
+    "latency_jitter_ms": 0.0,
+    # "constant", "uniform" (mean +- jitter) or "lognormal" (mean, jitter as
+    # standard deviation)
+    "latency_distribution": "constant",
+    "reject_rate": 0.0,
+    "requote_rate": 0.0,
+    "initial_balance": 100000.0,
+    "leverage": 100,
+    "base_price": 100.0,
+    "volatility": 0.0005,
+    # Overrides of the default symbol specification, by symbol name
+    "symbols": {},
+    "seed": None,
+}
+
+_DEFAULT_SYMBOL: Dict[str, Any] = {
+    "digits": 2,
+    "trade_contract_size": 1.0,
+    "trade_mode": SYMBOL_TRADE_MODE_FULL,
+    "filling_mode": SYMBOL_FILLING_IOC,
+    "volume_min": 0.01,
+    "volume_max": 100.0,
+    "volume_step": 0.01,
+    "spread": 0.0005,
+}
+
+
+class _Account:
+    def __init__(self, login: int, server: str, balance: float, leverage: int):
+        self.login = login
+        self.server = server
+        self.balance = balance
+        self.leverage = leverage
+        self.positions: Dict[int, Dict[str, Any]] = {}
+        self.deals: list = []
+
+
+class _Broker:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.settings: Dict[str, Any] = dict(_DEFAULT_SETTINGS)
+        self.random = random.Random()
+        self.accounts: Dict[int, _Account] = {}
+        self.account: Optional[_Account] = None
+        self.prices: Dict[str, float] = {}
+        self.selected: set = set()
+        self.tickets = itertools.count(100000000)
+        self.request_ids = itertools.count(1)
+        self.error: Tuple[int, str] = (RES_S_OK, "Success")
+
+    def sleep(self, kind: str):
+        mean = self.settings[f"{kind}_latency_ms"]
+        jitter = self.settings["latency_jitter_ms"]
+        if mean <= 0:
+            return
+        distribution = self.settings["latency_distribution"]
+        if distribution == "uniform":
+            delay = self.random.uniform(max(mean - jitter, 0), mean + jitter)
+        elif distribution == "lognormal" and jitter > 0:
+            sigma = math.sqrt(math.log(1 + (jitter / mean) ** 2))
+            delay = self.random.lognormvariate(math.log(mean) - sigma**2 / 2, sigma)
+        else:
+            delay = mean
+        time.sleep(delay / 1000)
+
+    def symbol(self, name: str) -> Dict[str, Any]:
+        return {**_DEFAULT_SYMBOL, **self.settings["symbols"].get(name, {})}
+
+    def quote(self, name: str) -> Tuple[float, float]:
+        """Move the price one random step and return (bid, ask)"""
+        spec = self.symbol(name)
+        base = self.settings["symbols"].get(name, {}).get(
+            "price", self.settings["base_price"]
+        )
+        price = self.prices.get(name, base)
+        price *= 1 + self.random.gauss(0, self.settings["volatility"])
+        self.prices[name] = price
+        half_spread = price * spec["spread"] / 2
+        digits = spec["digits"]
+        return round(price - half_spread, digits), round(price + half_spread, digits)
+
+    def mark(self, position: Dict[str, Any]) -> Dict[str, Any]:
+        """Revalue a position at the current price"""
+        bid, ask = self.quote(position["symbol"])
+        spec = self.symbol(position["symbol"])
+        if position["type"] == ORDER_TYPE_BUY:
+            current = bid
+            move = current - position["price_open"]
+        else:
+            current = ask
+            move = position["price_open"] - current
+        position["price_current"] = current
+        position["profit"] = round(
+            move * position["volume"] * spec["trade_contract_size"], 2
+        )
+        return position
+
+    def margin(self, account: _Account) -> float:
+        return sum(
+            position["price_open"]
+            * position["volume"]
+            * self.symbol(position["symbol"])["trade_contract_size"]
+            / account.leverage
+            for position in account.positions.values()
+        )
+
+
+_broker = _Broker()
+
+
+def configure(**settings) -> bool:
+    """Change the simulator settings, unknown keys raise ``ValueError``."""
+    unknown = set(settings) - set(_DEFAULT_SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown simulator settings: {sorted(unknown)}")
+    with _broker.lock:
+        _broker.settings.update(settings)
+        if "seed" in settings:
+            _broker.random.seed(settings["seed"])
+    return True
+
+
+def reset() -> bool:
+    """Forget every account, position and setting."""
+    global _broker
+    _broker = _Broker()
+    return True
+
+
+def _fail(code: int, message: str):
+    _broker.error = (code, message)
+
+
+def _ok():
+    _broker.error = (RES_S_OK, "Success")
+
+
+def initialize(
+    path: Optional[str] = None,
+    login: Optional[int] = None,
+    password: Optional[str] = None,
+    server: Optional[str] = None,
+    timeout: Optional[int] = None,
+    portable: bool = False,
+) -> bool:
+    with _broker.lock:
+        _broker.sleep("query")
+        if login is None:
+            _fail(RES_E_INVALID_PARAMS, "Login is required by the simulator")
+            return False
+        account = _broker.accounts.get(int(login))
+        if account is None:
+            account = _Account(
+                int(login),
+                server or "Simulator",
+                _broker.settings["initial_balance"],
+                _broker.settings["leverage"],
+            )
+            _broker.accounts[account.login] = account
+        _broker.account = account
+        _ok()
+        return True
+
+
+def login(login: int, password: Optional[str] = None, server=None, timeout=None):
+    return initialize(login=login, password=password, server=server)
+
+
+def shutdown() -> None:
+    with _broker.lock:
+        _broker.account = None
+
+
+def last_error() -> Tuple[int, str]:
+    return _broker.error
+
+
+def version() -> Tuple[int, int, str]:
+    return (500, 0, "simulator")
+
+
+def account_info() -> Optional[AccountInfo]:
+    with _broker.lock:
+        _broker.sleep("query")
+        account = _broker.account
+        if account is None:
+            _fail(RES_E_NO_IPC, "Terminal not initialized")
+            return None
+        profit = sum(_broker.mark(p)["profit"] for p in account.positions.values())
+        equity = account.balance + profit
+        margin = _broker.margin(account)
+        _ok()
+        return AccountInfo(
+            login=account.login,
+            trade_mode=0,
+            leverage=account.leverage,
+            balance=round(account.balance, 2),
+            credit=0.0,
+            profit=round(profit, 2),
+            equity=round(equity, 2),
+            margin=round(margin, 2),
+            margin_free=round(equity - margin, 2),
+            margin_level=round(equity / margin * 100, 2) if margin else 0.0,
+            name=f"Simulated {account.login}",
+            server=account.server,
+            currency="USD",
+            company="MT5 Simulator",
+        )
+
+
+def symbol_info(symbol: str) -> Optional[SymbolInfo]:
+    with _broker.lock:
+        _broker.sleep("query")
+        if _broker.account is None:
+            _fail(RES_E_NO_IPC, "Terminal not initialized")
+            return None
+        spec = _broker.symbol(symbol)
+        bid, ask = _broker.quote(symbol)
+        _ok()
+        return SymbolInfo(
+            name=symbol,
+            visible=symbol in _broker.selected,
+            select=symbol in _broker.selected,
+            digits=spec["digits"],
+            point=10 ** -spec["digits"],
+            trade_contract_size=spec["trade_contract_size"],
+            trade_mode=spec["trade_mode"],
+            filling_mode=spec["filling_mode"],
+            volume_min=spec["volume_min"],
+            volume_max=spec["volume_max"],
+            volume_step=spec["volume_step"],
+            bid=bid,
+            ask=ask,
+            description=f"Simulated {symbol}",
+        )
+
+
+def symbol_select(symbol: str, enable: bool = True) -> bool:
+    with _broker.lock:
+        if enable:
+            _broker.selected.add(symbol)
+        else:
+            _broker.selected.discard(symbol)
+        return True
+
+
+def symbol_info_tick(symbol: str) -> Optional[Tick]:
+    with _broker.lock:
+        _broker.sleep("query")
+        if _broker.account is None:
+            _fail(RES_E_NO_IPC, "Terminal not initialized")
+            return None
+        bid, ask = _broker.quote(symbol)
+        now = time.time()
+        _ok()
+        return Tick(int(now), bid, ask, 0.0, 0, int(now * 1000), 6, 0.0)
+
+
+def _position_tuple(position: Dict[str, Any]) -> TradePosition:
+    return TradePosition(**{field: position[field] for field in TradePosition._fields})
+
+
+def positions_total() -> int:
+    with _broker.lock:
+        return len(_broker.account.positions) if _broker.account else 0
+
+
+def positions_get(
+    symbol: Optional[str] = None, group: Optional[str] = None, ticket=None
+) -> Optional[Tuple[TradePosition, ...]]:
+    with _broker.lock:
+        _broker.sleep("query")
+        account = _broker.account
+        if account is None:
+            _fail(RES_E_NO_IPC, "Terminal not initialized")
+            return None
+        positions = [
+            _broker.mark(position)
+            for position in account.positions.values()
+            if (symbol is None or position["symbol"] == symbol)
+            and (ticket is None or position["ticket"] == int(ticket))
+        ]
+        _ok()
+        return tuple(_position_tuple(position) for position in positions)
+
+
+def history_deals_get(
+    date_from=None, date_to=None, group=None, ticket=None, position=None
+) -> Optional[Tuple[TradeDeal, ...]]:
+    with _broker.lock:
+        _broker.sleep("query")
+        account = _broker.account
+        if account is None:
+            _fail(RES_E_NO_IPC, "Terminal not initialized")
+            return None
+        deals = [
+            deal
+            for deal in account.deals
+            if (ticket is None or deal.ticket == int(ticket))
+            and (position is None or deal.position_id == int(position))
+            and (date_from is None or deal.time >= _timestamp(date_from))
+            and (date_to is None or deal.time <= _timestamp(date_to))
+        ]
+        _ok()
+        return tuple(deals)
+
+
+def _timestamp(value) -> int:
+    return int(value.timestamp()) if hasattr(value, "timestamp") else int(value)
+
+
+def order_calc_margin(
+    action: int, symbol: str, volume: float, price: float
+) -> Optional[float]:
+    with _broker.lock:
+        _broker.sleep("query")
+        account = _broker.account
+        if account is None:
+            _fail(RES_E_NO_IPC, "Terminal not initialized")
+            return None
+        contract_size = _broker.symbol(symbol)["trade_contract_size"]
+        _ok()
+        return round(price * volume * contract_size / account.leverage, 2)
+
+
+def _result(retcode: int, request: Dict[str, Any], comment: str, **fields):
+    values = {
+        "deal": 0,
+        "order": 0,
+        "volume": 0.0,
+        "price": 0.0,
+        "bid": 0.0,
+        "ask": 0.0,
+    }
+    values.update(fields)
+    return OrderSendResult(
+        retcode=retcode,
+        comment=comment,
+        request_id=next(_broker.request_ids),
+        retcode_external=0,
+        request=request,
+        **values,
+    )
+
+
+def _record_deal(account, position, deal_type, entry, volume, price, profit):
+    now = time.time()
+    account.deals.append(
+        TradeDeal(
+            ticket=next(_broker.tickets),
+            order=position["ticket"],
+            time=int(now),
+            time_msc=int(now * 1000),
+            type=deal_type,
+            entry=entry,
+            magic=position["magic"],
+            position_id=position["ticket"],
+            reason=3,
+            volume=volume,
+            price=price,
+            commission=0.0,
+            swap=0.0,
+            profit=profit,
+            fee=0.0,
+            symbol=position["symbol"],
+            comment=position["comment"],
+            external_id="",
+        )
+    )
+
+
+def order_send(request: Dict[str, Any]) -> Optional[OrderSendResult]:
+    with _broker.lock:
+        _broker.sleep("order")
+        account = _broker.account
+        if account is None:
+            _fail(RES_E_NO_IPC, "Terminal not initialized")
+            return None
+        _ok()
+
+        action = request.get("action")
+        if action == TRADE_ACTION_SLTP:
+            position = account.positions.get(int(request.get("position", 0)))
+            if position is None:
+                return _result(TRADE_RETCODE_INVALID, request, "Position not found")
+            position["sl"] = request.get("sl", position["sl"])
+            position["tp"] = request.get("tp", position["tp"])
+            return _result(TRADE_RETCODE_DONE, request, "Request executed")
+        if action != TRADE_ACTION_DEAL:
+            return _result(TRADE_RETCODE_INVALID, request, "Unsupported action")
+
+        symbol = request["symbol"]
+        spec = _broker.symbol(symbol)
+        order_type = request["type"]
+        volume = float(request["volume"])
+
+        if spec["trade_mode"] == SYMBOL_TRADE_MODE_DISABLED:
+            return _result(TRADE_RETCODE_TRADE_DISABLED, request, "Trade disabled")
+        if (
+            volume < spec["volume_min"] - 1e-9
+            or volume > spec["volume_max"] + 1e-9
+            or abs(round(volume / spec["volume_step"]) * spec["volume_step"] - volume)
+            > 1e-9
+        ):
+            return _result(TRADE_RETCODE_INVALID_VOLUME, request, "Invalid volume")
+
+        filling = request.get("type_filling", ORDER_FILLING_FOK)
+        allowed = {
+            ORDER_FILLING_FOK: SYMBOL_FILLING_FOK,
+            ORDER_FILLING_IOC: SYMBOL_FILLING_IOC,
+            ORDER_FILLING_BOC: SYMBOL_FILLING_BOC,
+        }
+        # Market execution symbols do not accept ORDER_FILLING_RETURN
+        if not spec["filling_mode"] & allowed.get(filling, 0):
+            return _result(
+                TRADE_RETCODE_INVALID_FILL, request, "Unsupported filling mode"
+            )
+
+        draw = _broker.random.random()
+        if draw < _broker.settings["reject_rate"]:
+            return _result(TRADE_RETCODE_REJECT, request, "Request rejected")
+
+        bid, ask = _broker.quote(symbol)
+        if draw < _broker.settings["reject_rate"] + _broker.settings["requote_rate"]:
+            return _result(
+                TRADE_RETCODE_REQUOTE, request, "Requote", bid=bid, ask=ask
+            )
+
+        price = ask if order_type == ORDER_TYPE_BUY else bid
+        required = price * volume * spec["trade_contract_size"] / account.leverage
+        equity = account.balance + sum(
+            _broker.mark(p)["profit"] for p in account.positions.values()
+        )
+        if required > equity - _broker.margin(account):
+            return _result(TRADE_RETCODE_NO_MONEY, request, "No money")
+
+        now = time.time()
+        ticket = next(_broker.tickets)
+        position = {
+            "ticket": ticket,
+            "time": int(now),
+            "time_msc": int(now * 1000),
+            "type": order_type,
+            "magic": request.get("magic", 0),
+            "identifier": ticket,
+            "reason": 3,
+            "volume": volume,
+            "price_open": price,
+            "sl": request.get("sl", 0.0),
+            "tp": request.get("tp", 0.0),
+            "price_current": price,
+            "swap": 0.0,
+            "profit": 0.0,
+            "symbol": symbol,
+            "comment": request.get("comment", ""),
+            "external_id": "",
+        }
+        account.positions[ticket] = position
+        deal_type = DEAL_TYPE_BUY if order_type == ORDER_TYPE_BUY else DEAL_TYPE_SELL
+        _record_deal(account, position, deal_type, DEAL_ENTRY_IN, volume, price, 0.0)
+        return _result(
+            TRADE_RETCODE_DONE,
+            request,
+            "Request executed",
+            deal=account.deals[-1].ticket,
+            order=ticket,
+            volume=volume,
+            price=price,
+            bid=bid,
+            ask=ask,
+        )
+
+
+def Close(symbol: str, *, comment: Optional[str] = None, ticket=None) -> bool:
+    """Close the position ``ticket``, or every position on ``symbol``."""
+    with _broker.lock:
+        _broker.sleep("order")
+        account = _broker.account
+        if account is None:
+            _fail(RES_E_NO_IPC, "Terminal not initialized")
+            return False
+        tickets = (
+            [int(ticket)]
+            if ticket
+            else [t for t, p in account.positions.items() if p["symbol"] == symbol]
+        )
+        if not tickets or any(t not in account.positions for t in tickets):
+            _fail(RES_E_NOT_FOUND, "Position not found")
+            return False
+
+        for position_ticket in tickets:
+            position = _broker.mark(account.positions.pop(position_ticket))
+            account.balance += position["profit"]
+            deal_type = (
+                DEAL_TYPE_SELL
+                if position["type"] == ORDER_TYPE_BUY
+                else DEAL_TYPE_BUY
+            )
+            _record_deal(
+                account,
+                position,
+                deal_type,
+                DEAL_ENTRY_OUT,
+                position["volume"],
+                position["price_current"],
+                position["profit"],
+            )
+        _ok()
+        return True
@@ -1,9 +1,12 @@
-import MetaTrader5 as mt5
-from typing import Dict, Any, Optional
+import hashlib
+import importlib
+import time
+from typing import Dict, Any, List, Optional, Tuple
 from .trade_interface import TradingInterface
 import logging
-from datetime import datetime
-from threading import Timer, Lock
+from flask import current_app, has_app_context
+from functools import wraps
+from threading import RLock
 from typing import TYPE_CHECKING
 from app.models.execute_trade_return import ExecuteTradeReturn
 from app.models.signal import Signal
@@ -11,6 +14,23 @@ from app.models.trade import Trade
 from app.models.prop_firm_trade_pair_association import PropFirmTradePairAssociation
 from app.models.trade_pairs import TradePairs
 from app import db
+from app.services import position_tags
+from app.services.fanout import in_flight_signals
+from app.services.filling_modes import filling_modes
+from app.services.health_monitor import health_monitor
+from app.services.strategy_matcher import strategy_matcher
+from app.services.sync_stats import sync_stats
+from app.services.symbol_catalog import (
+    SymbolSpec,
+    spec_from_symbol_info,
+    symbol_catalog,
+)
+from app.trade_actions.mt5_workers import TerminalProxy, terminal_pool
+from app.trade_actions.order_scheduler import (
+    PRIORITY_CLOSE,
+    PRIORITY_OPEN,
+    order_scheduler,
+)
 
 if TYPE_CHECKING:
     from app.models.prop_firm import PropFirm
@@ -18,25 +38,159 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 
+class _LocalTerminal:
+    """
+    The MetaTrader5 module of this process. It drives a single terminal, so
+    calls made for different prop firms from the fan-out threads must not
+    interleave and every firm shares the same session: prop firms served by
+    it are not isolated and their orders run one at a time.
+    """
+
+    def __init__(self, module):
+        self._module = module
+        self.lock = RLock()
+        # Login the terminal is currently bound to
+        self.session_login: Optional[int] = None
+
+    def __getattr__(self, name):
+        return getattr(self._module, name)
+
+
+# One per backend module, imported on first use so this module also loads
+# where the Windows-only MetaTrader5 package is not installed
+_local_terminals: Dict[str, _LocalTerminal] = {}
+_local_terminals_lock = RLock()
+
+SIMULATOR_BACKEND = "app.trade_actions.mt5_simulator"
+
+
+def _local_terminal(backend: str) -> _LocalTerminal:
+    with _local_terminals_lock:
+        if backend not in _local_terminals:
+            module = importlib.import_module(backend)
+            _local_terminals[backend] = _LocalTerminal(module)
+        return _local_terminals[backend]
+
+
+def _execution_mode(prop_firm: Optional["PropFirm"], config) -> str:
+    """``MT5_EXECUTION_MODE`` of a prop firm, "auto" resolved"""
+    mode = config.get("MT5_EXECUTION_MODE", "inprocess")
+    if mode != "auto":
+        return mode
+    if prop_firm is None:
+        return "inprocess"
+
+    from sqlalchemy import select
+
+    from app.models.prop_firm import PropFirm
+    from app.models.user import user_prop_firm
+
+    # Several prop firms on the terminal of this process would take turns.
+    # Active as in refresh_active(): at least one user has the prop firm
+    active = PropFirm.query.filter(
+        PropFirm.platform_type == prop_firm.platform_type,
+        PropFirm.id.in_(select(user_prop_firm.c.prop_firm_id)),
+    ).count()
+    return "process" if active > 1 else "inprocess"
+
+
+def _open_terminal(prop_firm: Optional["PropFirm"], backend: Optional[str]):
+    """The terminal of this process, or a dedicated worker in process mode"""
+    config = current_app.config if has_app_context() else {}
+    if backend is None:
+        backend = config.get("MT5_BACKEND", "MetaTrader5")
+        if backend == "simulator":
+            backend = SIMULATOR_BACKEND
+
+    if prop_firm is not None and _execution_mode(prop_firm, config) == "process":
+        terminal = terminal_pool.get(
+            prop_firm.id,
+            backend=backend,
+            timeout=config.get("MT5_CALL_TIMEOUT_SECONDS", 30),
+            order_timeout=config.get("MT5_ORDER_TIMEOUT_SECONDS", 120),
+        )
+    else:
+        terminal = _local_terminal(backend)
+
+    if backend == SIMULATOR_BACKEND and config.get("MT5_SIMULATOR"):
+        terminal.configure(**config["MT5_SIMULATOR"])
+    return terminal
+
+
+def _cooldown_for(prop_firm_id: Optional[int]) -> float:
+    if not has_app_context():
+        return 60
+    overrides = current_app.config.get("ORDER_COOLDOWN_BY_PROP_FIRM", {})
+    return overrides.get(
+        prop_firm_id, current_app.config.get("ORDER_COOLDOWN_SECONDS", 60)
+    )
+
+
+def _detached_signal(signal: Signal) -> Signal:
+    """Copy of a signal the scheduler threads can read without its session"""
+    return Signal(
+        id=signal.id,
+        strategy=signal.strategy,
+        order_type=signal.order_type,
+        contracts=signal.contracts,
+        ticker=signal.ticker,
+        position_size=signal.position_size,
+        created_at=signal.created_at,
+    )
+
+
+def _log_queued_result(label: str, future):
+    try:
+        result = future.result()
+        logger.info("Queued trade for %s finished: %s", label, result.message)
+    except Exception as e:
+        logger.error("Queued trade for %s failed: %s", label, e)
+
+
+def _with_terminal(method):
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.mt5.lock:
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
+
 class MT5Trading(TradingInterface):
+    # Module implementing the MetaTrader5 API, None follows MT5_BACKEND
+    backend: Optional[str] = None
+
     def __init__(self, prop_firm: Optional["PropFirm"] = None):
         super().__init__(prop_firm)
         self.mt_path = None
-        self.trade_queue = []  # Queue to store pending trades
-        self.last_trade_time = None  # Timestamp of the last executed trade
-        self.cooldown_period = 60  # Cooldown period in seconds (1 minute)
-        self.queue_lock = Lock()  # Lock for thread-safe queue operations
-        self.processing_timer = None  # Timer for processing the queue
+        # Seconds between two opening orders of this prop firm
+        self.cooldown_period = _cooldown_for(self.prop_firm_id)
+        self._login: Optional[int] = None  # Account of the last connect()
+        self.mt5 = _open_terminal(prop_firm, self.backend)
+        # Free margin and margin per lot, reused for margin_ttl seconds
+        self.margin_ttl = (
+            current_app.config.get("MARGIN_CACHE_SECONDS", 5)
+            if has_app_context()
+            else 5
+        )
+        self._free_margin: Optional[Tuple[float, float]] = None
+        self._margin_per_lot: Dict[Tuple[str, int], Tuple[Optional[float], float]] = {}
+        # Last time the broker answered an order with "market closed"
+        self.market_closed_at: Optional[float] = None
+        # Fingerprint and time of the last full sync_prop_firm
+        self._last_fingerprint: Optional[str] = None
+        self._last_full_sync = 0.0
 
     def set_mt_path(self, account_id: Optional[str] = None) -> str:
         """Set MT5 terminal path"""
-        if account_id is None and self.prop_firm:
-            account_id = str(self.prop_firm.id)
+        if account_id is None and self.prop_firm_id is not None:
+            account_id = str(self.prop_firm_id)
 
         self.mt_path = f"G:\\MetaTrader 5-{account_id}\\terminal64.exe"
 
         return self.mt_path
 
+    @_with_terminal
     def connect(self, credentials: Optional[Dict[str, Any]] = None) -> bool:
         """
         Connect to MT5 terminal
@@ -57,27 +211,36 @@ class MT5Trading(TradingInterface):
             logger.error("Missing required credentials")
             return False
 
+        login = int(creds.get("username", 0))
+
+        # Hot path, the terminal is still logged in with this account
+        if self._connected and self.mt5.session_login == login:
+            return True
+
         # Check if MT5 is already running
-        account_info = mt5.account_info()
+        account_info = self.mt5.account_info()
         if account_info:
-            same_user = int(account_info.login) == int(creds.get("username", 0))
+            same_user = int(account_info.login) == login
             if same_user:
+                self.mt5.session_login = self._login = login
                 self._connected = True
                 return True
             else:
-                mt5.shutdown()
+                self.mt5.shutdown()
+                self.mt5.session_login = None
                 self._connected = False
 
         try:
             # Initialize MT5
-            if not mt5.initialize(
-                login=int(creds.get("username", 0)),
+            if not self.mt5.initialize(
+                login=login,
                 password=creds.get("password", ""),
                 server=creds.get("server", ""),
                 path=self.set_mt_path(creds.get("id")),
             ):
-                logger.error("MT5 initialization failed: %s", mt5.last_error())
+                logger.error("MT5 initialization failed: %s", self.mt5.last_error())
                 return False
+            self.mt5.session_login = self._login = login
             self._connected = True
             logger.info("Successfully connected to MT5")
             return True
@@ -86,8 +249,39 @@ class MT5Trading(TradingInterface):
             self._connected = False
             return False
 
+    @_with_terminal
+    def disconnect(self):
+        """Drop the queued orders and log the terminal out of this account"""
+        dropped = order_scheduler.cancel(self.prop_firm_id)
+        if dropped:
+            logger.warning("Dropping %s queued trades on disconnect", dropped)
+
+        if isinstance(self.mt5, TerminalProxy):
+            # The worker only ever served this prop firm
+            terminal_pool.stop(self.mt5.key)
+        elif self._connected and self.mt5.session_login == self._login:
+            self.mt5.shutdown()
+            self.mt5.session_login = None
+        self._connected = False
+
     def close_trade(self, trade: Trade) -> ExecuteTradeReturn:
-        """Cancel a trade on MT5"""
+        """Cancel a trade on MT5, ahead of any queued opening order"""
+        snapshot = Trade(
+            prop_firm_id=trade.prop_firm_id,
+            signal_id=trade.signal_id,
+            platform_id=trade.platform_id,
+            ticker=trade.ticker,
+        )
+        order = order_scheduler.submit(
+            key=self.prop_firm_id,
+            symbol=trade.ticker,
+            action=lambda: self._close_trade(snapshot),
+            priority=PRIORITY_CLOSE,
+        )
+        return order.future.result()
+
+    @_with_terminal
+    def _close_trade(self, trade: Trade) -> ExecuteTradeReturn:
         try:
             if not self.connect():
                 return ExecuteTradeReturn(
@@ -97,25 +291,23 @@ class MT5Trading(TradingInterface):
                     details={},
                 )
 
-            existing_trades = mt5.positions_get()
-            result = mt5.Close(
-                symbol=trade.ticker,
-                ticket=int(trade.platform_id) if trade.platform_id else 0,
-            )
+            ticket = int(trade.platform_id) if trade.platform_id else 0
+            result = self.mt5.Close(symbol=trade.ticker, ticket=ticket)
 
             if not result:
                 logger.info("Will retry with SL and TP")
                 # Set take profit and stop loss at 2% of current value
                 try:
                     # Get symbol information for current price
-                    symbol_info = mt5.symbol_info(trade.ticker)
-                    tick = mt5.symbol_info_tick(trade.ticker)
-                    if not existing_trades:
+                    symbol_info = self.mt5.symbol_info(trade.ticker)
+                    tick = self.mt5.symbol_info_tick(trade.ticker)
+                    positions = self._open_positions(trade.ticker, ticket)
+                    if not positions:
                         raise ValueError("No existing trades found")
 
-                    order_type = existing_trades[0].type
+                    order_type = positions[0].type
                     # Determine current price based on order type
-                    if order_type == mt5.ORDER_TYPE_BUY:
+                    if order_type == self.mt5.ORDER_TYPE_BUY:
                         current_price = tick.ask
                         # For buy orders: SL below current price, TP above
                         stop_loss = current_price * 0.98  # 2% below
@@ -147,19 +339,17 @@ class MT5Trading(TradingInterface):
                 if stop_loss is not None and take_profit is not None:
                     try:
                         request = {
-                            "action": mt5.TRADE_ACTION_SLTP,
-                            "position": (
-                                int(trade.platform_id) if trade.platform_id else 0
-                            ),
+                            "action": self.mt5.TRADE_ACTION_SLTP,
+                            "position": ticket,
                             "sl": stop_loss,
                             "tp": take_profit,
                         }
-                        result = mt5.order_send(request)
+                        result = self.mt5.order_send(request)
                     except Exception as e:
                         logger.error("Error sending SL/TP for %s: %s", trade.ticker, e)
 
                 logger.debug("Result: %s", result)
-                logger.debug("Last error: %s", mt5.last_error())
+                logger.debug("Last error: %s", self.mt5.last_error())
 
             if not result:
                 error_message = (
@@ -173,8 +363,7 @@ class MT5Trading(TradingInterface):
                     details={},
                 )
 
-            remaining_trades = mt5.positions_get()
-            if len(remaining_trades) != len(existing_trades) - 1:
+            if self._open_positions(trade.ticker, ticket):
                 return ExecuteTradeReturn(
                     success=False,
                     message=(
@@ -193,7 +382,11 @@ class MT5Trading(TradingInterface):
                 success=True,
                 message=success_message,
                 trade_id=trade.platform_id,
-                details={"retcode": result, "result": result},
+                details={
+                    "retcode": result,
+                    "result": result,
+                    "deals": self._closing_deals(ticket),
+                },
             )
         except Exception as e:
             logger.error("Error canceling trade: %s", e)
@@ -201,79 +394,39 @@ class MT5Trading(TradingInterface):
                 success=False,
                 message=f"Tried to close trade but failed with error: {str(e)}",
                 trade_id=trade.platform_id,
-                details={"result": mt5.last_error()},
+                details={"result": self.mt5.last_error()},
             )
 
     def place_trade(self, trade: "Signal", label: str) -> ExecuteTradeReturn:
-        """Place trade on MT5 with queue system"""
-        current_time = datetime.now()
-
-        with self.queue_lock:
-            if self.last_trade_time is not None and (
-                (current_time - self.last_trade_time).total_seconds()
-                < self.cooldown_period
-            ):
-                logger.info("Trade for %s added to queue (cooldown active)", label)
-                self.trade_queue.append((trade, label, current_time))
-
-                if (
-                    self.processing_timer is None
-                    or not self.processing_timer.is_alive()
-                ):
-                    remaining_cooldown = (
-                        self.cooldown_period
-                        - (current_time - self.last_trade_time).total_seconds()
-                    )
-                    self.processing_timer = Timer(
-                        remaining_cooldown, self._process_trade_queue
-                    )
-                    self.processing_timer.daemon = True
-                    self.processing_timer.start()
-
-                return ExecuteTradeReturn(
-                    success=True,
-                    message="Trade queued for later execution",
-                    trade_id=None,
-                    details={},
-                    queued=True,
-                )
-            else:
-                logger.info("Executing trade immediately")
-                result = self._execute_trade(trade, label)
-
-            if result.success:
-                self.last_trade_time = datetime.now()
-
-            return result
-
-    def _process_trade_queue(self):
-        """Process queued trades after cooldown period"""
-        with self.queue_lock:
-            if not self.trade_queue:
-                self.processing_timer = None
-                return
-
-            trade, label, queue_time = self.trade_queue.pop(0)
-            logger.info(
-                "Processing queued trade for %s (queued at %s)",
-                label,
-                queue_time,
+        """Place trade on MT5 through the order scheduler"""
+        signal = _detached_signal(trade)
+        order = order_scheduler.submit(
+            key=self.prop_firm_id,
+            symbol=label,
+            action=lambda: self._execute_trade(signal, label),
+            priority=PRIORITY_OPEN,
+            cooldown=self.cooldown_period,
+        )
+
+        # Wait for the order only if it runs now, not for a whole cooldown
+        order.settled.wait()
+        if order.deferred:
+            logger.info("Trade for %s added to queue (cooldown active)", label)
+            order.future.add_done_callback(
+                lambda future: _log_queued_result(label, future)
+            )
+            return ExecuteTradeReturn(
+                success=True,
+                message="Trade queued for later execution",
+                trade_id=None,
+                details={},
+                queued=True,
             )
 
-            result = self._execute_trade(trade, label)
-
-            if result.success:
-                self.last_trade_time = datetime.now()
-
-            if self.trade_queue:
-                self.processing_timer = Timer(
-                    self.cooldown_period, self._process_trade_queue
-                )
-                self.processing_timer.daemon = True
-                self.processing_timer.start()
-            else:
-                self.processing_timer = None
+        logger.info("Executing trade immediately")
+        return order.future.result()
 
+    @_with_terminal
     def _execute_trade(self, trade: "Signal", label: str) -> ExecuteTradeReturn:
         """Execute a trade with MT5"""
         if not self.connect():
@@ -285,8 +438,8 @@ class MT5Trading(TradingInterface):
             )
 
         try:
-            symbol_info = mt5.symbol_info(label)
-            if symbol_info is None:
+            spec = self._symbol_spec(label)
+            if spec is None:
                 return ExecuteTradeReturn(
                     success=False,
                     message=f"Symbol {label} not found",
@@ -294,16 +447,32 @@ class MT5Trading(TradingInterface):
                     details={},
                 )
 
-            if not symbol_info.visible:
-                if not mt5.symbol_select(label, True):
+            rejection = spec.rejects(trade.order_type)
+            if rejection:
+                return ExecuteTradeReturn(
+                    success=False,
+                    message=f"{rejection}: {label}",
+                    trade_id=None,
+                    details={"trade_mode": spec.trade_mode},
+                )
+
+            if not spec.visible:
+                if not self.mt5.symbol_select(label, True):
                     return ExecuteTradeReturn(
                         success=False,
                         message=f"Failed to select {label} in Market Watch",
                         trade_id=None,
                         details={},
                     )
+                spec = symbol_catalog.store(
+                    self.prop_firm_id, label, spec._replace(visible=True)
+                )
+
+            tick = self.mt5.symbol_info_tick(label)
+            if tick is None and self.mt5.symbol_select(label, True):
+                # The terminal may have dropped it from Market Watch since
+                tick = self.mt5.symbol_info_tick(label)
 
-            tick = mt5.symbol_info_tick(label)
             if tick is None:
                 return ExecuteTradeReturn(
                     success=False,
@@ -314,27 +483,56 @@ class MT5Trading(TradingInterface):
 
             price = tick.ask if trade.order_type.upper() == "BUY" else tick.bid
             order_type = (
-                mt5.ORDER_TYPE_BUY
+                self.mt5.ORDER_TYPE_BUY
                 if trade.order_type.upper() == "BUY"
-                else mt5.ORDER_TYPE_SELL
+                else self.mt5.ORDER_TYPE_SELL
             )
 
-            existing_trades = mt5.positions_get()
-            request, result = self.try_to_place_order(trade, label, price, order_type)
+            # Sized for this prop firm only, the signal is left untouched
+            volume = self._affordable_volume(
+                spec, label, order_type, price, trade.contracts
+            )
+            if volume is None:
+                return ExecuteTradeReturn(
+                    success=False,
+                    message=f"Not enough free margin for {label}",
+                    trade_id=None,
+                    details={"requested_volume": trade.contracts},
+                )
 
-            number_of_tries = 0
-            while (
-                trade.contracts > 0.01
-                and result.retcode != mt5.TRADE_RETCODE_DONE
-                and number_of_tries < 10
-            ):
-                trade.contracts = round(trade.contracts * 0.8, 2)
-                request, result = self.try_to_place_order(
-                    trade, label, price, order_type
+            request, result = self.try_to_place_order(
+                trade, label, price, order_type, volume
+            )
+            # Any fill or rejection changes the free margin
+            self._free_margin = None
+
+            if result and result.retcode == self.mt5.TRADE_RETCODE_NO_MONEY:
+                # The cached margin was off, size once more from fresh values
+                self._margin_per_lot.pop((label, order_type), None)
+                retry_volume = self._affordable_volume(
+                    spec, label, order_type, price, trade.contracts
                 )
-                number_of_tries += 1
+                if retry_volume is not None and retry_volume < volume:
+                    volume = retry_volume
+                    request, result = self.try_to_place_order(
+                        trade, label, price, order_type, volume
+                    )
+                    self._free_margin = None
 
-            if result.retcode == mt5.TRADE_RETCODE_MARKET_CLOSED:
+            if result and result.retcode == self.mt5.TRADE_RETCODE_INVALID_VOLUME:
+                # The broker changed the symbol, refetch it for the next order
+                symbol_catalog.forget(self.prop_firm_id, label)
+
+            if result is None:
+                # order_send failed before the order reached the broker
+                return ExecuteTradeReturn(
+                    success=False,
+                    message="Order failed: no result from MT5",
+                    trade_id=None,
+                    details={"result": self.mt5.last_error()},
+                )
+            if result.retcode == self.mt5.TRADE_RETCODE_MARKET_CLOSED:
+                self.market_closed_at = time.monotonic()
                 return ExecuteTradeReturn(
                     success=False,
                     message="Market is closed",
@@ -344,7 +542,7 @@ class MT5Trading(TradingInterface):
                         "comment": result.comment,
                     },
                 )
-            elif not result or result.retcode != mt5.TRADE_RETCODE_DONE:
+            elif result.retcode != self.mt5.TRADE_RETCODE_DONE:
                 return ExecuteTradeReturn(
                     success=False,
                     message=f"Order failed: {result.comment}",
@@ -355,8 +553,9 @@ class MT5Trading(TradingInterface):
                     },
                 )
 
-            new_trades = mt5.positions_get()
-            if len(new_trades) != len(existing_trades) + 1:
+            self.market_closed_at = None
+            placed_trade = self._placed_position(result)
+            if placed_trade is None:
                 return ExecuteTradeReturn(
                     success=False,
                     message=(
@@ -367,16 +566,13 @@ class MT5Trading(TradingInterface):
                     details={},
                 )
 
-            placed_trade = [
-                trade for trade in new_trades if trade not in existing_trades
-            ][0]
-
             return ExecuteTradeReturn(
                 success=True,
                 message="Trade placed successfully",
                 trade_id=str(result.order),
                 details={
                     "volume": result.volume,
+                    "requested_volume": trade.contracts,
                     "price": result.price,
                     "request_id": result.request_id,
                     "buy_request": request,
@@ -393,58 +589,210 @@ class MT5Trading(TradingInterface):
                 details={},
             )
 
-    def try_to_place_order(self, trade, label, price, order_type):
+    def _placed_position(self, result) -> Optional[Any]:
+        """
+        The position opened by a filled order, looked up by ticket. Hedging
+        accounts number the position after the order, otherwise the deal
+        tells which position the order went to.
+        """
+        positions = self.mt5.positions_get(ticket=result.order)
+        if positions:
+            return positions[0]
+        if not result.deal:
+            return None
+        deals = self.mt5.history_deals_get(ticket=result.deal)
+        if not deals:
+            return None
+        positions = self.mt5.positions_get(ticket=deals[0].position_id)
+        return positions[0] if positions else None
+
+    def _open_positions(self, symbol: str, ticket: int) -> List[Any]:
+        """The position with this ticket, every position of the symbol if 0"""
+        if ticket:
+            positions = self.mt5.positions_get(ticket=ticket)
+        else:
+            positions = self.mt5.positions_get(symbol=symbol)
+        return list(positions or [])
+
+    def _closing_deals(self, ticket: int) -> List[Any]:
+        """Deals that closed the position, to report the exit price and profit"""
+        if not ticket:
+            return []
+        deals = self.mt5.history_deals_get(position=ticket) or []
+        return [deal for deal in deals if deal.entry != self.mt5.DEAL_ENTRY_IN]
+
+    def _symbol_spec(self, label: str) -> Optional[SymbolSpec]:
+        """Specification from the catalog, fetched from MT5 the first time"""
+        spec = symbol_catalog.get(self.prop_firm_id, label)
+        if spec is None:
+            symbol_info = self.mt5.symbol_info(label)
+            if symbol_info is None:
+                return None
+            spec = symbol_catalog.store(
+                self.prop_firm_id, label, spec_from_symbol_info(symbol_info)
+            )
+        return spec
+
+    @_with_terminal
+    def refresh_symbol_specs(self, labels: List[str]) -> Dict[str, SymbolSpec]:
+        """Refetch the specification of the given symbols from MT5"""
+        if not self.connect():
+            raise Exception("Failed to connect to MT5")
+
+        refreshed = {}
+        for label in labels:
+            symbol_info = self.mt5.symbol_info(label)
+            if symbol_info is None:
+                logger.warning("Symbol %s not found while refreshing", label)
+                continue
+            refreshed[label] = symbol_catalog.store(
+                self.prop_firm_id, label, spec_from_symbol_info(symbol_info)
+            )
+        return refreshed
+
+    def _affordable_volume(
+        self,
+        spec: SymbolSpec,
+        label: str,
+        order_type: int,
+        price: float,
+        requested: float,
+    ) -> Optional[float]:
+        """
+        The requested volume, reduced to what the free margin of the account
+        allows and made valid for the symbol. None if not even the minimum
+        volume is affordable.
+        """
+        now = time.monotonic()
+        if self._free_margin is None or now - self._free_margin[1] > self.margin_ttl:
+            account_info = self.mt5.account_info()
+            if account_info is None:
+                return spec.normalize_volume(requested)
+            self._free_margin = (account_info.margin_free, now)
+
+        key = (label, order_type)
+        cached = self._margin_per_lot.get(key)
+        if cached is None or now - cached[1] > self.margin_ttl:
+            margin = None
+            try:
+                margin = self.mt5.order_calc_margin(order_type, label, 1.0, price)
+            except Exception as e:
+                logger.warning("order_calc_margin failed for %s: %s", label, e)
+            if margin is None and spec.trade_contract_size:
+                # Estimate from the catalog when the terminal cannot tell
+                account_info = self.mt5.account_info()
+                leverage = getattr(account_info, "leverage", 0) or 1
+                margin = price * spec.trade_contract_size / leverage
+            cached = (margin, now)
+            self._margin_per_lot[key] = cached
+
+        volume = requested
+        margin_per_lot = cached[0]
+        if margin_per_lot:
+            volume = min(volume, self._free_margin[0] / margin_per_lot)
+            if volume < spec.volume_min:
+                return None
+        return spec.normalize_volume(volume)
+
+    def try_to_place_order(self, trade, label, price, order_type, volume=None):
         good_return_codes = [
-            mt5.TRADE_RETCODE_PLACED,
-            mt5.TRADE_RETCODE_DONE,
-            mt5.TRADE_RETCODE_DONE_PARTIAL,
+            self.mt5.TRADE_RETCODE_PLACED,
+            self.mt5.TRADE_RETCODE_DONE,
+            self.mt5.TRADE_RETCODE_DONE_PARTIAL,
         ]
 
         bad_return_codes = [
-            mt5.TRADE_RETCODE_INVALID_FILL,
-            mt5.TRADE_RETCODE_PRICE_OFF,
-            mt5.TRADE_RETCODE_MARKET_CLOSED,
+            self.mt5.TRADE_RETCODE_INVALID_FILL,
+            self.mt5.TRADE_RETCODE_PRICE_OFF,
+            self.mt5.TRADE_RETCODE_MARKET_CLOSED,
+            # Another filling type cannot fix these
+            self.mt5.TRADE_RETCODE_NO_MONEY,
+            self.mt5.TRADE_RETCODE_INVALID_VOLUME,
         ]
 
-        list_of_filling_types = [
-            mt5.ORDER_FILLING_BOC,
-            mt5.ORDER_FILLING_FOK,
-            mt5.ORDER_FILLING_IOC,
-            mt5.ORDER_FILLING_RETURN,
-        ]
+        list_of_filling_types = self._default_filling_types()
+
+        # The filling type that worked last time first, discovery afterwards
+        learned = filling_modes.get(self.prop_firm_id, label)
+        if learned in list_of_filling_types:
+            list_of_filling_types.remove(learned)
+            list_of_filling_types.insert(0, learned)
 
         request = None
         result = None
+        sends = 0
+        wasted = 0
 
         for filling_type in list_of_filling_types:
             request = {
-                "action": mt5.TRADE_ACTION_DEAL,
+                "action": self.mt5.TRADE_ACTION_DEAL,
                 "symbol": label,
-                "volume": trade.contracts,
+                "volume": trade.contracts if volume is None else volume,
                 "type": order_type,
                 "price": price,
                 "deviation": max(int(trade.position_size), 20),
-                "magic": 234000,
-                "type_time": mt5.ORDER_TIME_GTC,
+                "magic": position_tags.magic_for(trade.id),
+                "comment": position_tags.comment_for(trade.id, trade.strategy),
+                "type_time": self.mt5.ORDER_TIME_GTC,
                 "type_filling": filling_type,
             }
-            result = mt5.order_send(request)
+            result = self.mt5.order_send(request)
+            sends += 1
+
+            if result is None:
+                # Not sent, another filling type would fail the same way
+                logger.error("order_send failed: %s", self.mt5.last_error())
+                break
 
-            if result.retcode == mt5.TRADE_RETCODE_INVALID_FILL:
+            if result.retcode == self.mt5.TRADE_RETCODE_INVALID_FILL:
+                wasted += 1
                 continue
 
             if result.retcode in bad_return_codes:
                 break
 
             if result.retcode in good_return_codes:
+                if filling_type != learned:
+                    filling_modes.learn(self.prop_firm_id, label, filling_type)
                 break
 
+        # Guesses a full discovery would have spent before the learned type
+        saved = 0
+        if learned is not None and sends == 1 and not wasted:
+            saved = self._default_filling_types().index(learned)
+        filling_modes.record(self.prop_firm_id, label, sends, wasted, saved)
+
         return request, result
 
+    def _default_filling_types(self) -> List[int]:
+        return [
+            self.mt5.ORDER_FILLING_BOC,
+            self.mt5.ORDER_FILLING_FOK,
+            self.mt5.ORDER_FILLING_IOC,
+            self.mt5.ORDER_FILLING_RETURN,
+        ]
+
     def is_connected(self) -> bool:
-        if not self.connect():
+        """Answered from the heartbeat, probed live only when there is none"""
+        health = health_monitor.get(self.prop_firm_id)
+        if health is None or not health_monitor.running:
+            health = health_monitor.probe(self.prop_firm_id, self)
+        return health.connected and not health_monitor.is_stale(health)
+
+    @_with_terminal
+    def check_connection(self) -> bool:
+        """Whether the session of this account answers, without logging in"""
+        if not self._connected:
             return False
-        account_info = mt5.account_info()
+        if self.mt5.session_login != self._login:
+            # Another prop firm holds the shared terminal, this one logs
+            # back in with its next call: only the terminal can be checked
+            return self.mt5.version() is not None
+        account_info = self.mt5.account_info()
+        if account_info is None:
+            # The terminal dropped the session, force a full connect next time
+            self.mt5.session_login = None
+            self._connected = False
         return account_info is not None
 
     def _find_best_matching_strategy(self, symbol: str, prop_firm: "PropFirm") -> str:
@@ -452,38 +800,26 @@ class MT5Trading(TradingInterface):
         Find the best matching trading strategy for a symbol based on
         character similarity.
         """
-        from app.models.trading_strategy import TradingStrategy
-
-        all_strategies = TradingStrategy.query.all()
-
-        if not all_strategies:
-            return "NO_STRATEGY"
-
-        best_match = None
-        best_score = 0
-        symbol_lower = symbol.lower()
+        return strategy_matcher.match(symbol)
 
-        for strategy in all_strategies:
-            strategy_lower = strategy.name.lower()
-            common_chars = 0
-            for char in symbol_lower:
-                if char in strategy_lower:
-                    common_chars += 1
-
-            score = common_chars / len(symbol_lower) if len(symbol_lower) > 0 else 0
-
-            if score > best_score:
-                best_score = score
-                best_match = strategy.name
-
-        if best_score >= 0.2 and best_match:
-            return best_match
+    @_with_terminal
+    def sync_prop_firm(
+        self, prop_firm: Optional["PropFirm"] = None, force: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Synchronize prop firm information with MT5.
 
-        return "NO_STRATEGY"
+        When the account and its positions are exactly as the previous sync
+        left them, nothing is written and only ``{"unchanged": True, ...}``
+        is returned, unless ``force`` is set or the last full sync is older
+        than ``SYNC_FULL_EVERY_SECONDS``.
+        """
+        target_prop_firm = prop_firm
+        if target_prop_firm is None and self.prop_firm_id is not None:
+            from app.models.prop_firm import PropFirm
 
-    def sync_prop_firm(self, prop_firm: Optional["PropFirm"] = None) -> Dict[str, Any]:
-        """Synchronize prop firm information with MT5."""
-        target_prop_firm = prop_firm or self.prop_firm
+            # Loaded by the calling thread, the adapter is shared
+            target_prop_firm = db.session.get(PropFirm, self.prop_firm_id)
 
         if not target_prop_firm:
             raise ValueError("No PropFirm instance available for synchronization")
@@ -493,94 +829,256 @@ class MT5Trading(TradingInterface):
         if not self.connect():
             raise Exception(f"Failed to connect to MT5 for {target_prop_firm.name}")
 
-        account_info = mt5.account_info()
+        account_info = self.mt5.account_info()
         if not account_info:
             raise Exception(
                 f"Failed to get account information for {target_prop_firm.name}"
             )
 
+        positions = self.mt5.positions_get() or ()
+
+        fingerprint = self._sync_fingerprint(account_info, positions)
+        full_sync_age = time.monotonic() - self._last_full_sync
+        if (
+            not force
+            and fingerprint == self._last_fingerprint
+            and full_sync_age < current_app.config.get("SYNC_FULL_EVERY_SECONDS", 60)
+        ):
+            sync_stats.record(target_prop_firm.id, skipped=True)
+            return {
+                "unchanged": True,
+                "login": account_info.login,
+                "fingerprint": fingerprint,
+                "positions_key": self._positions_key(positions),
+                "positions": len(positions),
+            }
+
         to_return = dict(account_info._asdict())
         if account_info.balance > 0:
             to_return["drawdown_percentage"] = (
                 (account_info.balance - account_info.equity) / account_info.balance
             ) * 100
 
-        target_prop_firm.update_available_balance(account_info.margin_free)
-        target_prop_firm.name = account_info.company
-        target_prop_firm.save()
+        try:
+            target_prop_firm.update_available_balance(account_info.margin_free)
+            target_prop_firm.name = account_info.company
+            db.session.add(target_prop_firm)
 
-        to_return["trades"] = []
-        positions = mt5.positions_get()
+            to_return["trades"], left_to_fanout = self._reconcile_positions(
+                target_prop_firm, positions
+            )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        # Positions left to a running fan-out are looked at again next time,
+        # in case it gives up on them
+        self._last_fingerprint = None if left_to_fanout else fingerprint
+        self._last_full_sync = time.monotonic()
+        sync_stats.record(target_prop_firm.id, skipped=False)
+        to_return["unchanged"] = False
+        to_return["fingerprint"] = fingerprint
+        to_return["positions_key"] = self._positions_key(positions)
+        return to_return
 
-        for position in positions:
-            existing_trade = Trade.query.filter_by(
-                platform_id=str(position.ticket),
-                prop_firm_id=target_prop_firm.id,
-            ).first()
-
-            if not existing_trade:
-                strategy_name = self._find_best_matching_strategy(
-                    position.symbol, target_prop_firm
+    @staticmethod
+    def _positions_key(positions: Any) -> str:
+        """
+        Digest of the ticket and volume of every position: it changes when a
+        position is opened, closed or resized, not with its profit.
+        """
+        digest = hashlib.blake2b(digest_size=8)
+        for position in sorted(positions, key=lambda position: position.ticket):
+            digest.update(repr((position.ticket, position.volume)).encode())
+        return digest.hexdigest()
+
+    @staticmethod
+    def _sync_fingerprint(account_info: Any, positions: Any) -> str:
+        """
+        Digest of what a sync writes: the account figures and, for every
+        position, its ticket, volume and profit.
+        """
+        digest = hashlib.blake2b(digest_size=8)
+        digest.update(
+            repr(
+                (
+                    account_info.login,
+                    account_info.company,
+                    account_info.balance,
+                    account_info.equity,
+                    account_info.margin_free,
                 )
+            ).encode()
+        )
+        for position in sorted(positions, key=lambda position: position.ticket):
+            digest.update(
+                repr(
+                    (position.ticket, position.volume, position.profit, position.swap)
+                ).encode()
+            )
+        return digest.hexdigest()
+
+    def _reconcile_positions(
+        self, prop_firm: "PropFirm", positions: Any
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Match the open positions with the stored trades: unknown positions
+        are matched to the signal encoded in their magic number or comment,
+        or get a new signal with a guessed strategy when they have none
+        (opened by hand), trades without a position are deleted.
+        Everything needed is loaded upfront with a few queries and the
+        changes are only staged, the caller commits them at once.
+
+        Positions of signals a fan-out is still placing are left alone, the
+        fan-out records their trades itself.
+
+        Returns:
+            The reconciled trades and how many positions were left to a
+            running fan-out.
+        """
+        in_flight = in_flight_signals.of(prop_firm.id)
+        # Stored trades with their signal, by ticket
+        trades_by_ticket: Dict[Optional[str], List[Tuple[Trade, Optional[Signal]]]] = {}
+        for stored_trade, signal in (
+            db.session.query(Trade, Signal)
+            .outerjoin(Signal, Signal.id == Trade.signal_id)
+            .filter(Trade.prop_firm_id == prop_firm.id)
+        ):
+            trades_by_ticket.setdefault(stored_trade.platform_id, []).append(
+                (stored_trade, signal)
+            )
 
-                # Get the pop_firm_trade_pair_association for the prop_firm
-                prop_firm_trade_pair_association = PropFirmTradePairAssociation.query.filter_by(
-                    prop_firm_id=target_prop_firm.id,
-                    label=position.symbol,
-                ).first()
+        # Trade pair name of each label of the prop firm
+        pair_names: Dict[str, str] = dict(
+            db.session.query(PropFirmTradePairAssociation.label, TradePairs.name)
+            .join(
+                TradePairs,
+                TradePairs.id == PropFirmTradePairAssociation.trade_pair_id,
+            )
+            .filter(PropFirmTradePairAssociation.prop_firm_id == prop_firm.id)
+        )
+
+        # Signals encoded in the positions placed by the app, one query
+        unknown = [
+            position
+            for position in positions
+            if str(position.ticket) not in trades_by_ticket
+            and position_tags.signal_id_of(position) not in in_flight
+        ]
+        tagged_ids = {position_tags.signal_id_of(position) for position in unknown}
+        tagged_ids.discard(None)
+        tagged_signals: Dict[int, Signal] = (
+            {
+                signal.id: signal
+                for signal in Signal.query.filter(Signal.id.in_(tagged_ids))
+            }
+            if tagged_ids
+            else {}
+        )
+        open_tickets = {str(position.ticket) for position in positions}
+        # A signal has one trade per prop firm: the trade of a closed ticket
+        # can move to the tagged position, one of an open ticket cannot
+        trades_by_signal: Dict[int, Trade] = {}
+        signals_in_use = set()
+        for ticket, stored_trades in trades_by_ticket.items():
+            for stored_trade, _ in stored_trades:
+                if ticket in open_tickets:
+                    signals_in_use.add(stored_trade.signal_id)
+                else:
+                    trades_by_signal[stored_trade.signal_id] = stored_trade
+
+        strategy_names: Dict[str, str] = {}
+        reconciled: List[Tuple[Trade, Optional[Signal]]] = []
+        new_trades: List[Tuple[Any, Signal]] = []
+        left_to_fanout = 0
+        for position in positions:
+            ticket = str(position.ticket)
+            if ticket in trades_by_ticket:
+                reconciled.append(trades_by_ticket[ticket][0])
+                continue
 
-                if not prop_firm_trade_pair_association:
-                    continue
+            signal_id = position_tags.signal_id_of(position)
+            if signal_id in in_flight:
+                left_to_fanout += 1
+                continue
 
-                trade_pair = TradePairs.query.filter_by(
-                    id=prop_firm_trade_pair_association.trade_pair_id,
-                ).first()
+            signal = tagged_signals.pop(signal_id, None)
+            if signal is not None and signal.id not in signals_in_use:
+                signals_in_use.add(signal.id)
+                stored_trade = trades_by_signal.get(signal.id)
+                if stored_trade is not None:
+                    # The trade of this signal lost track of its ticket
+                    stored_trade.platform_id = ticket
+                    stored_trade.response = position._asdict()
+                    reconciled.append((stored_trade, signal))
+                else:
+                    new_trades.append((position, signal))
+                continue
 
-                if not trade_pair:
-                    logger.error(f"Trade pair not found for {position.symbol}")
-                    continue
+            if position.symbol not in pair_names:
+                logger.error(f"Trade pair not found for {position.symbol}")
+                continue
 
-                new_signal = Signal(
-                    strategy=strategy_name,
-                    order_type=(
-                        "buy" if position.type == mt5.ORDER_TYPE_BUY else "sell"
+            if position.symbol not in strategy_names:
+                strategy_names[position.symbol] = self._find_best_matching_strategy(
+                    position.symbol, prop_firm
+                )
+            new_trades.append(
+                (
+                    position,
+                    Signal(
+                        strategy=strategy_names[position.symbol],
+                        order_type=(
+                            "buy"
+                            if position.type == self.mt5.ORDER_TYPE_BUY
+                            else "sell"
+                        ),
+                        contracts=position.volume,
+                        ticker=pair_names[position.symbol],
+                        position_size=abs(position.profit + position.swap),
                     ),
-                    contracts=position.volume,
-                    ticker=trade_pair.name,
-                    position_size=abs(position.profit + position.swap),
                 )
-                new_signal = Signal.create_new_signal(new_signal)
-
-                existing_trade = Trade.associate_signal(
-                    new_signal,
-                    target_prop_firm,
-                    str(position.ticket),
-                    position._asdict(),
-                    position.symbol,
+            )
+
+        if new_trades:
+            db.session.add_all(
+                [signal for _, signal in new_trades if signal.id is None]
+            )
+            db.session.flush()
+            for position, signal in new_trades:
+                new_trade = Trade(
+                    prop_firm_id=prop_firm.id,
+                    signal_id=signal.id,
+                    platform_id=str(position.ticket),
+                    response=position._asdict(),
+                    ticker=position.symbol,
                 )
+                db.session.add(new_trade)
+                reconciled.append((new_trade, signal))
+
+        # Flushed first, so trades moved to an open ticket are kept; trades
+        # without a ticket are only dropped with the last position
+        db.session.flush()
+        deleted = Trade.delete_stale(
+            prop_firm.id, open_tickets, keep_untracked=bool(positions)
+        )
+        if deleted:
+            logger.info(
+                "Deleted the trades of %s closed positions of prop firm %s: %s",
+                len(deleted),
+                prop_firm.id,
+                deleted,
+            )
 
-            new_signal = Signal.query.filter_by(id=existing_trade.signal_id).first()
-            output_trade = existing_trade.to_dict()
-            if new_signal:
-                output_trade["strategy"] = new_signal.strategy
-                output_trade["order_type"] = new_signal.order_type
-                output_trade["contracts"] = new_signal.contracts
-                output_trade["ticker"] = new_signal.ticker
-                output_trade["position_size"] = new_signal.position_size
-
-            to_return["trades"].append(output_trade)
-
-        trades_to_delete = Trade.query.filter(
-            Trade.prop_firm_id == target_prop_firm.id,
-            Trade.platform_id.notin_([str(position.ticket) for position in positions]),
-        ).all()
-        for trade in trades_to_delete:
-            db.session.delete(trade)
-
-        if not positions:
-            Trade.query.filter(
-                Trade.prop_firm_id == target_prop_firm.id,
-            ).delete()
-
-        db.session.commit()
-        return to_return
+        output = []
+        for stored_trade, signal in reconciled:
+            output_trade = stored_trade.to_dict()
+            if signal:
+                output_trade["strategy"] = signal.strategy
+                output_trade["order_type"] = signal.order_type
+                output_trade["contracts"] = signal.contracts
+                output_trade["ticker"] = signal.ticker
+                output_trade["position_size"] = signal.position_size
+            output.append(output_trade)
+        return output, left_to_fanout
@@ -0,0 +1,274 @@
+"""One worker process per MetaTrader5 terminal.
+
+The ``MetaTrader5`` module binds a single terminal to the process importing
+it, so serving several prop firms from the Flask process means logging out
+and back in whenever the next order is for another firm. In ``process``
+execution mode every prop firm gets its own worker process which imports the
+module, logs in once and stays logged in; ``MT5Trading`` talks to it through a
+``TerminalProxy`` that forwards each ``mt5.<function>()`` call over a local
+socket. Calls for different firms run in parallel, calls for the same firm are
+serialized by the proxy lock.
+
+The worker is started with ``python -m`` rather than ``multiprocessing`` so it
+does not re-import the web application's main module.
+"""
+
+import importlib
+import logging
+import os
+import queue
+import secrets
+import subprocess
+import sys
+import threading
+from functools import partial
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Any, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+_PROJECT_ROOT = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+_AUTHKEY_ENV = "MT5_WORKER_AUTHKEY"
+# Calls that reach the broker: given the order timeout, since the order may
+# still be filled while the terminal is slow to answer
+_ORDER_CALLS = {"order_send", "order_check"}
+
+
+class TerminalWorkerError(Exception):
+    """The worker process failed, timed out or the call raised in it."""
+
+
+class Record:
+    """Picklable stand-in for the named tuples returned by ``MetaTrader5``."""
+
+    def __init__(self, fields: Dict[str, Any]):
+        self.__dict__.update(fields)
+
+    def _asdict(self) -> Dict[str, Any]:
+        return dict(self.__dict__)
+
+    def __eq__(self, other):
+        return isinstance(other, Record) and self.__dict__ == other.__dict__
+
+    __hash__ = None
+
+    def __repr__(self):
+        fields = ", ".join(f"{k}={v!r}" for k, v in self.__dict__.items())
+        return f"Record({fields})"
+
+
+def _to_picklable(value):
+    if hasattr(value, "_asdict"):
+        return Record({k: _to_picklable(v) for k, v in value._asdict().items()})
+    if isinstance(value, (tuple, list)):
+        return tuple(_to_picklable(item) for item in value)
+    if isinstance(value, dict):
+        return {k: _to_picklable(v) for k, v in value.items()}
+    return value
+
+
+def serve(conn: Connection, backend: str):
+    """Worker side: run the calls received on ``conn`` against ``backend``."""
+    module = importlib.import_module(backend)
+    conn.send({name: value for name, value in vars(module).items() if name.isupper()})
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+
+        name, args, kwargs = message
+        try:
+            conn.send((True, _to_picklable(getattr(module, name)(*args, **kwargs))))
+        except Exception as e:
+            conn.send((False, f"{name} failed: {type(e).__name__}: {e}"))
+
+    try:
+        module.shutdown()
+    except Exception:
+        pass
+
+
+def main():
+    backend = sys.argv[1]
+    authkey = bytes.fromhex(os.environ.pop(_AUTHKEY_ENV))
+    with Listener(("127.0.0.1", 0), authkey=authkey) as listener:
+        # The parent reads the port from the first line, stdout is then
+        # pointed at stderr so nothing else ends up in the pipe
+        print(listener.address[1], flush=True)
+        os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+        with listener.accept() as conn:
+            serve(conn, backend)
+
+
+class TerminalProxy:
+    """
+    Looks like the ``MetaTrader5`` module: constants are served from a copy
+    taken at startup and every function call runs in the worker process.
+    """
+
+    def __init__(
+        self,
+        key: Hashable,
+        backend: str,
+        timeout: float,
+        order_timeout: Optional[float] = None,
+    ):
+        self.key = key
+        self.backend = backend
+        self.timeout = timeout
+        self.order_timeout = max(timeout, order_timeout or timeout)
+        self.lock = threading.RLock()
+        # Login the worker's terminal is bound to, reset with the worker
+        self.session_login: Optional[int] = None
+        self._process: Optional[subprocess.Popen] = None
+        self._conn: Optional[Connection] = None
+        self._constants: Dict[str, Any] = {}
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        with self.lock:
+            self._ensure_started()
+            if name in self._constants:
+                return self._constants[name]
+        return partial(self.call, name)
+
+    def call(self, name: str, *args, **kwargs):
+        timeout = self.order_timeout if name in _ORDER_CALLS else self.timeout
+        with self.lock:
+            self._ensure_started()
+            try:
+                self._conn.send((name, args, kwargs))
+                if not self._conn.poll(timeout):
+                    raise TerminalWorkerError(f"{name} timed out after {timeout}s")
+                ok, value = self._conn.recv()
+            except (EOFError, OSError, TerminalWorkerError) as e:
+                logger.error("MT5 worker %s failed during %s: %s", self.key, name, e)
+                if name in _ORDER_CALLS:
+                    logger.error(
+                        "Outcome of %s on MT5 worker %s is unknown, the next "
+                        "sync reconciles the positions: %s",
+                        name,
+                        self.key,
+                        args,
+                    )
+                self._kill()
+                raise TerminalWorkerError(str(e)) from e
+
+        if not ok:
+            raise TerminalWorkerError(value)
+        return value
+
+    def close(self):
+        with self.lock:
+            if self._conn is not None:
+                try:
+                    self._conn.send(None)
+                    self._process.wait(timeout=self.timeout)
+                except Exception:
+                    pass
+            self._kill()
+
+    def _ensure_started(self):
+        if self._process is not None and self._process.poll() is None:
+            return
+        self._kill()
+
+        authkey = secrets.token_bytes(32)
+        process = subprocess.Popen(
+            [sys.executable, "-m", __name__, self.backend],
+            cwd=_PROJECT_ROOT,
+            env={**os.environ, _AUTHKEY_ENV: authkey.hex()},
+            stdout=subprocess.PIPE,
+        )
+        self._process = process
+        try:
+            port = self._read_port(process)
+            if not port:
+                raise TerminalWorkerError(f"MT5 worker {self.key} failed to start")
+            self._conn = Client(("127.0.0.1", int(port)), authkey=authkey)
+            if not self._conn.poll(self.timeout):
+                raise TerminalWorkerError(f"MT5 worker {self.key} did not answer")
+            self._constants = self._conn.recv()
+        except Exception:
+            self._kill()
+            raise
+        logger.info("Started MT5 worker %s (pid %s)", self.key, process.pid)
+
+    def _read_port(self, process: subprocess.Popen) -> bytes:
+        """First line of the worker, read in a thread to give up on a hung start"""
+        lines: "queue.Queue[bytes]" = queue.Queue()
+        threading.Thread(
+            target=lambda: lines.put(process.stdout.readline()),
+            name=f"mt5-worker-{self.key}-start",
+            daemon=True,
+        ).start()
+        try:
+            return lines.get(timeout=self.timeout).strip()
+        except queue.Empty:
+            raise TerminalWorkerError(
+                f"MT5 worker {self.key} did not start within {self.timeout}s"
+            ) from None
+
+    def _kill(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        if self._process is not None:
+            if self._process.poll() is None:
+                self._process.kill()
+            self._process.stdout.close()
+            self._process = None
+        self.session_login = None
+
+
+class TerminalPool:
+    """Process-wide set of terminal workers, one per prop firm id."""
+
+    def __init__(self):
+        self._proxies: Dict[Hashable, TerminalProxy] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        key: Hashable,
+        backend: str,
+        timeout: float,
+        order_timeout: Optional[float] = None,
+    ) -> TerminalProxy:
+        with self._lock:
+            proxy = self._proxies.get(key)
+            if proxy is None:
+                proxy = self._proxies[key] = TerminalProxy(
+                    key, backend, timeout, order_timeout
+                )
+            return proxy
+
+    def stop(self, key: Hashable):
+        with self._lock:
+            proxy = self._proxies.pop(key, None)
+        if proxy is not None:
+            proxy.close()
+
+    def shutdown(self):
+        with self._lock:
+            keys = list(self._proxies)
+        for key in keys:
+            self.stop(key)
+
+
+terminal_pool = TerminalPool()
+
+
+if __name__ == "__main__":
+    # Run the imported module rather than __main__, so the Record instances
+    # sent to the parent unpickle as app.trade_actions.mt5_workers.Record
+    from app.trade_actions.mt5_workers import main as worker_main
+
+    worker_main()
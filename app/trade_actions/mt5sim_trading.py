@@ -0,0 +1,10 @@
+from app.trade_actions.mt5_trading import SIMULATOR_BACKEND, MT5Trading
+
+
+class MT5SIMTrading(MT5Trading):
+    """
+    MT5 adapter backed by the offline simulator, selected with the
+    ``MT5SIM`` platform type. Settings come from ``MT5_SIMULATOR``.
+    """
+
+    backend = SIMULATOR_BACKEND
@@ -0,0 +1,254 @@
+"""Single-threaded scheduler for broker orders of every prop firm.
+
+Orders wait in one heap ordered by ``(ready_time, priority, sequence)``.
+Opening orders of a prop firm become ready once its cooldown since the last
+filled open has elapsed, closes are ready immediately and win ties, so an exit
+is never stuck behind queued entries. The scheduler thread only decides what
+runs next; the broker calls themselves run on a small executor, at most one
+per prop firm and ``ORDER_SYMBOL_CONCURRENCY`` per symbol.
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional
+
+from flask import current_app
+
+from app import db
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_CLOSE = 0
+PRIORITY_OPEN = 1
+
+
+class OrderCancelled(Exception):
+    """The order was dropped before it ran (its prop firm was disconnected)."""
+
+
+class ScheduledOrder:
+    def __init__(
+        self,
+        key: Hashable,
+        symbol: str,
+        priority: int,
+        action: Callable[[], Any],
+        cooldown: float,
+        app,
+    ):
+        self.key = key
+        self.symbol = symbol
+        self.priority = priority
+        self.action = action
+        self.cooldown = cooldown
+        self.app = app
+        self.future: Future = Future()
+        self.submitted_at = time.monotonic()
+        self.started_at: Optional[float] = None
+        # Set once the order either started or was pushed back by a cooldown
+        self.settled = threading.Event()
+        self.deferred = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.priority == PRIORITY_OPEN
+
+
+class OrderScheduler:
+    def __init__(self):
+        self._heap: List[tuple] = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._symbol_limit = 4
+        # Orders that were ready but blocked by a busy firm or symbol
+        self._blocked: List[ScheduledOrder] = []
+        self._busy_keys: set = set()
+        self._symbol_in_flight: Dict[str, int] = defaultdict(int)
+        self._ready_at: Dict[Hashable, float] = {}
+        self._waits: Deque[float] = deque(maxlen=1000)
+        self._completed = 0
+
+    def submit(
+        self,
+        key: Hashable,
+        symbol: str,
+        action: Callable[[], Any],
+        priority: int = PRIORITY_OPEN,
+        cooldown: float = 0.0,
+    ) -> ScheduledOrder:
+        """
+        Queue an order without waiting for it.
+
+        Args:
+            key: Terminal the order runs on (prop firm id)
+            symbol: Broker symbol, used for the per-symbol concurrency limit
+            action: Callable placing or closing the order, run in an app context
+            priority: ``PRIORITY_CLOSE`` or ``PRIORITY_OPEN``
+            cooldown: Seconds the firm waits after this order if it is a
+                filled open
+
+        Returns:
+            The order, whose ``future`` holds the result of ``action``
+        """
+        app = current_app._get_current_object()
+        self._start(app)
+
+        order = ScheduledOrder(key, symbol, priority, action, cooldown, app)
+        with self._condition:
+            ready_time = order.submitted_at
+            if order.is_open:
+                ready_time = max(ready_time, self._ready_at.get(key, 0.0))
+                if ready_time > order.submitted_at:
+                    self._defer(order)
+            self._push(ready_time, order)
+            self._condition.notify()
+        return order
+
+    def cancel(self, key: Hashable) -> int:
+        """Drop the pending orders of a terminal, returns how many were dropped."""
+        with self._condition:
+            dropped = [entry for entry in self._heap if entry[3].key == key]
+            dropped_blocked = [order for order in self._blocked if order.key == key]
+            self._heap = [entry for entry in self._heap if entry[3].key != key]
+            heapq.heapify(self._heap)
+            self._blocked = [order for order in self._blocked if order.key != key]
+            self._ready_at.pop(key, None)
+
+        orders = [entry[3] for entry in dropped] + dropped_blocked
+        for order in orders:
+            order.future.set_exception(OrderCancelled(f"Order for {key} cancelled"))
+            order.settled.set()
+        return len(orders)
+
+    def has_orders(self, key: Hashable) -> bool:
+        """Whether a terminal has orders queued or being executed."""
+        with self._condition:
+            return (
+                key in self._busy_keys
+                or any(entry[3].key == key for entry in self._heap)
+                or any(order.key == key for order in self._blocked)
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and wait times, for monitoring."""
+        now = time.monotonic()
+        with self._condition:
+            pending = [entry[3] for entry in self._heap] + self._blocked
+            depth_by_key: Dict[str, int] = defaultdict(int)
+            for order in pending:
+                depth_by_key[str(order.key)] += 1
+            waits = list(self._waits)
+            return {
+                "depth": len(pending),
+                "depth_by_prop_firm": dict(depth_by_key),
+                "in_flight": len(self._busy_keys),
+                "completed": self._completed,
+                "oldest_wait_seconds": round(
+                    max((now - order.submitted_at for order in pending), default=0.0),
+                    3,
+                ),
+                "avg_wait_seconds": (
+                    round(sum(waits) / len(waits), 3) if waits else 0.0
+                ),
+                "max_wait_seconds": round(max(waits), 3) if waits else 0.0,
+            }
+
+    def _start(self, app):
+        with self._condition:
+            if self._thread is not None:
+                return
+            self._symbol_limit = app.config.get("ORDER_SYMBOL_CONCURRENCY", 4)
+            self._executor = ThreadPoolExecutor(
+                max_workers=app.config.get("ORDER_SCHEDULER_WORKERS", 8),
+                thread_name_prefix="order",
+            )
+            self._thread = threading.Thread(
+                target=self._run, name="order-scheduler", daemon=True
+            )
+            self._thread.start()
+
+    def _push(self, ready_time: float, order: ScheduledOrder):
+        heapq.heappush(
+            self._heap, (ready_time, order.priority, next(self._sequence), order)
+        )
+
+    @staticmethod
+    def _defer(order: ScheduledOrder):
+        if not order.deferred:
+            order.deferred = True
+            order.settled.set()
+
+    def _run(self):
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+                ready_time = self._heap[0][0]
+                if ready_time > now:
+                    self._condition.wait(ready_time - now)
+                    continue
+
+                order = heapq.heappop(self._heap)[3]
+                firm_ready_at = self._ready_at.get(order.key, 0.0)
+                if order.is_open and firm_ready_at > now:
+                    # A fill since this order was queued started a cooldown
+                    self._defer(order)
+                    self._push(firm_ready_at, order)
+                elif (
+                    order.key in self._busy_keys
+                    or self._symbol_in_flight[order.symbol] >= self._symbol_limit
+                ):
+                    self._blocked.append(order)
+                else:
+                    self._dispatch(order, now)
+
+    def _dispatch(self, order: ScheduledOrder, now: float):
+        if not order.future.set_running_or_notify_cancel():
+            return
+        order.started_at = now
+        self._waits.append(now - order.submitted_at)
+        self._busy_keys.add(order.key)
+        self._symbol_in_flight[order.symbol] += 1
+        order.settled.set()
+        self._executor.submit(self._execute, order)
+
+    def _execute(self, order: ScheduledOrder):
+        result = None
+        try:
+            with order.app.app_context():
+                try:
+                    result = order.action()
+                finally:
+                    db.session.remove()
+            order.future.set_result(result)
+        except Exception as e:
+            logger.error("Scheduled order for %s failed: %s", order.key, e)
+            order.future.set_exception(e)
+        finally:
+            self._finish(order, result)
+
+    def _finish(self, order: ScheduledOrder, result):
+        with self._condition:
+            self._busy_keys.discard(order.key)
+            self._symbol_in_flight[order.symbol] -= 1
+            self._completed += 1
+            if order.is_open and getattr(result, "success", False):
+                self._ready_at[order.key] = time.monotonic() + order.cooldown
+
+            # Give the blocked orders another chance, in their original order
+            for blocked in self._blocked:
+                self._push(blocked.submitted_at, blocked)
+            self._blocked = []
+            self._condition.notify()
+
+
+order_scheduler = OrderScheduler()
@@ -0,0 +1,139 @@
+"""Process-wide registry of trading adapters, keyed by prop firm id.
+
+``PropFirm`` rows are reloaded by every request, but the adapter behind them
+holds state that must outlive a request: the terminal connection, the
+cooldown queue and its timers. The registry keeps one adapter per prop firm
+for the life of the process and replaces it only when the connection
+settings of the prop firm change.
+"""
+
+import importlib
+import logging
+import threading
+from collections import defaultdict
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+from app.trade_actions.trade_interface import TradingInterface
+
+if TYPE_CHECKING:
+    from app.models.prop_firm import PropFirm
+
+logger = logging.getLogger(__name__)
+
+
+def _connection_settings(prop_firm: "PropFirm") -> Tuple:
+    return (
+        prop_firm.platform_type,
+        prop_firm.username,
+        prop_firm.password,
+        prop_firm.ip_address,
+        prop_firm.port,
+    )
+
+
+class TradingRegistry:
+    def __init__(self):
+        self._adapters: Dict[int, TradingInterface] = {}
+        self._settings: Dict[int, Tuple] = {}
+        self._lock = threading.RLock()
+        # Held while the adapter of a prop firm is created and connected, so
+        # a slow login only holds up the callers of that prop firm
+        self._creating: Dict[int, threading.Lock] = defaultdict(threading.Lock)
+
+    def get(self, prop_firm: "PropFirm") -> Optional[TradingInterface]:
+        """
+        Return the adapter of a prop firm, creating and connecting it on the
+        first use or after its connection settings changed.
+        """
+        if not prop_firm.platform_type:
+            return None
+
+        settings = _connection_settings(prop_firm)
+        adapter = self._current(prop_firm, settings)
+        if adapter is not None:
+            return adapter
+
+        with self._lock:
+            creating = self._creating[prop_firm.id]
+        with creating:
+            # Created by the caller we waited for
+            adapter = self._current(prop_firm, settings)
+            if adapter is not None:
+                return adapter
+
+            with self._lock:
+                changed = prop_firm.id in self._settings
+            if changed:
+                logger.info("Connection settings of %s changed", prop_firm.name)
+                self.invalidate(prop_firm.id)
+
+            adapter = self._create(prop_firm)
+            if prop_firm.has_complete_credentials():
+                self._connect(adapter)
+            with self._lock:
+                self._adapters[prop_firm.id] = adapter
+                self._settings[prop_firm.id] = settings
+            return adapter
+
+    def _current(
+        self, prop_firm: "PropFirm", settings: Tuple
+    ) -> Optional[TradingInterface]:
+        """The adapter of a prop firm if its connection settings still hold"""
+        with self._lock:
+            adapter = self._adapters.get(prop_firm.id)
+            if adapter is None or self._settings[prop_firm.id] != settings:
+                return None
+            return adapter
+
+    def peek(self, prop_firm_id: int) -> Optional[TradingInterface]:
+        """The adapter of a prop firm if one exists, without creating it."""
+        with self._lock:
+            return self._adapters.get(prop_firm_id)
+
+    def reconnect(self, prop_firm: "PropFirm") -> bool:
+        """Drop the current connection of a prop firm and open a new one."""
+        adapter = self.get(prop_firm)
+        if adapter is None:
+            return False
+        adapter.disconnect()
+        return self._connect(adapter)
+
+    def invalidate(self, prop_firm_id: int):
+        """Disconnect and forget the adapter, the next ``get`` recreates it."""
+        with self._lock:
+            adapter = self._adapters.pop(prop_firm_id, None)
+            self._settings.pop(prop_firm_id, None)
+        if adapter is not None:
+            try:
+                adapter.disconnect()
+            except Exception as e:
+                logger.error("Error disconnecting prop firm %s: %s", prop_firm_id, e)
+
+    def shutdown(self):
+        """Disconnect every adapter, used when the process exits."""
+        with self._lock:
+            prop_firm_ids = list(self._adapters)
+        for prop_firm_id in prop_firm_ids:
+            self.invalidate(prop_firm_id)
+
+    @staticmethod
+    def _create(prop_firm: "PropFirm") -> TradingInterface:
+        # Convert platform type to module name
+        # (e.g., 'MT5' -> 'mt5_trading')
+        module_name = f"{prop_firm.platform_type.lower()}_trading"
+        module = importlib.import_module(f"app.trade_actions.{module_name}")
+        # (assumes class name is platform type + 'Trading')
+        class_name = f"{prop_firm.platform_type.upper()}Trading"
+        trading_class = getattr(module, class_name)
+        return trading_class(prop_firm)
+
+    @staticmethod
+    def _connect(adapter: TradingInterface) -> bool:
+        try:
+            return adapter.connect()
+        except Exception as e:
+            logger.error("Failed to connect trading instance: %s", e)
+            return False
+
+
+trading_registry = TradingRegistry()
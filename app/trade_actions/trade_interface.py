@@ -20,20 +20,25 @@ class TradingInterface(ABC):
             prop_firm: PropFirm instance containing credentials and
                       configuration
         """
-        self.prop_firm = prop_firm
         self._connected = False
+        # Adapters are shared by the request threads and replaced when the
+        # credentials change: only a snapshot is kept, never the row itself
+        self.prop_firm_id = prop_firm.id if prop_firm else None
+        self._credentials: Dict[str, Any] = (
+            {
+                "username": prop_firm.username,
+                "password": prop_firm.password,
+                "server": prop_firm.ip_address,
+                "id": prop_firm.id,
+            }
+            if prop_firm
+            else {}
+        )
 
     @property
     def credentials(self) -> Dict[str, Any]:
         """Get credentials from the associated PropFirm"""
-        if self.prop_firm:
-            return {
-                "username": self.prop_firm.username,
-                "password": self.prop_firm.password,
-                "server": self.prop_firm.ip_address,
-                "id": self.prop_firm.id,
-            }
-        return {}
+        return self._credentials
 
     @abstractmethod
     def connect(self, credentials: Optional[Dict[str, Any]] = None) -> bool:
@@ -50,6 +55,13 @@ class TradingInterface(ABC):
         """
         pass
 
+    def disconnect(self):
+        """
+        Release the connection, called when the adapter is dropped from the
+        registry (credential change or shutdown)
+        """
+        self._connected = False
+
     @abstractmethod
     def place_trade(self, trade: "Signal", label: str) -> "ExecuteTradeReturn":
         """
@@ -83,3 +95,11 @@ class TradingInterface(ABC):
         Check if the connection is active
         """
         pass
+
+    def check_connection(self) -> bool:
+        """
+        Check the connection against the platform, used by the heartbeat.
+        It must not log in again. ``is_connected`` may answer from the last
+        heartbeat instead.
+        """
+        return self._connected
@@ -0,0 +1,192 @@
+"""
+Benchmark of the signal and trade lookups with and without their indexes.
+
+Seeds a throwaway SQLite database with ``--signals`` signals (1M by default)
+and ``--trades`` trades spread over 20 prop firms, then runs the hot queries
+of the app, built with the same filters as the code that issues them:
+
+- latest identical signal (``Signal.get_signal_by_parsed``)
+- opposite signals of a strategy (``identify_old_trades``)
+- trade of a ticket (sync, ``/api/trades/close``)
+- latest signals and latest trades (ordered listings)
+
+Each query is run without the indexes of the ``hot lookup indexes``
+migration, then with them. The query plan and the best latency of
+``--repeat`` runs are reported for both.
+
+Usage:
+    python -m benchmarks.bench_indexes [--signals 1000000] [--trades 200000]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert, select
+
+from app.models.signal import Signal
+from app.models.trade import Trade
+
+PROP_FIRMS = 20
+BATCH = 50000
+
+INDEXES = [
+    "ix_signals_strategy_order_type_ticker_position_size",
+    "ix_signals_created_at",
+    "ix_trades_platform_id_prop_firm_id",
+    "ix_trades_created_at",
+]
+
+
+def seed(engine, signals: int, trades: int):
+    rng = random.Random(7)
+    strategies = [f"Strategy {index}" for index in range(200)]
+    tickers = [f"TICK{index}" for index in range(50)]
+    sizes = [0.0, 0.5, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0]
+    start = datetime(2024, 1, 1)
+
+    with engine.begin() as connection:
+        for first in range(0, signals, BATCH):
+            connection.execute(
+                insert(Signal.__table__),
+                [
+                    {
+                        "id": index + 1,
+                        "strategy": rng.choice(strategies),
+                        "order_type": rng.choice(("buy", "sell")),
+                        "contracts": 1.0,
+                        "ticker": rng.choice(tickers),
+                        "position_size": rng.choice(sizes),
+                        "created_at": start + timedelta(seconds=index),
+                    }
+                    for index in range(first, min(first + BATCH, signals))
+                ],
+            )
+        signal_ids = rng.sample(range(1, signals + 1), min(trades, signals))
+        for first in range(0, len(signal_ids), BATCH):
+            connection.execute(
+                insert(Trade.__table__),
+                [
+                    {
+                        "prop_firm_id": index % PROP_FIRMS + 1,
+                        "signal_id": signal_id,
+                        "platform_id": str(100000000 + index),
+                        "created_at": start + timedelta(seconds=signal_id),
+                        "ticker": "TICK0",
+                    }
+                    for index, signal_id in enumerate(
+                        signal_ids[first : first + BATCH], start=first
+                    )
+                ],
+            )
+
+
+def queries(trades: int):
+    ticket = trades // 2
+    return [
+        (
+            "latest identical signal",
+            select(Signal)
+            .filter_by(
+                strategy="Strategy 42",
+                order_type="buy",
+                ticker="TICK7",
+                position_size=1.0,
+            )
+            .order_by(Signal.id.desc())
+            .limit(1),
+        ),
+        (
+            "opposite signals",
+            select(Signal).filter_by(
+                order_type="sell", ticker="TICK7", strategy="Strategy 42"
+            ),
+        ),
+        (
+            "trade of a ticket",
+            select(Trade).where(
+                Trade.platform_id == str(100000000 + ticket),
+                Trade.prop_firm_id == ticket % PROP_FIRMS + 1,
+            ),
+        ),
+        (
+            "latest signals",
+            select(Signal).order_by(Signal.created_at.desc()).limit(50),
+        ),
+        (
+            "latest trades",
+            select(Trade).order_by(Trade.created_at.desc()).limit(50),
+        ),
+    ]
+
+
+def measure(engine, statement, repeat: int):
+    """Query plan and best latency in milliseconds"""
+    sql = str(statement.compile(engine, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as connection:
+        plan = "; ".join(
+            row[-1]
+            for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")
+        )
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            connection.exec_driver_sql(sql).fetchall()
+            timings.append(time.perf_counter() - started)
+    return plan, min(timings) * 1e3
+
+
+def run(args):
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine("sqlite:///" + os.path.join(directory, "bench.db"))
+        tables = [Signal.__table__, Trade.__table__]
+        for table in tables:
+            table.create(engine)
+        indexes = [
+            index
+            for table in tables
+            for index in table.indexes
+            if index.name in INDEXES
+        ]
+        for index in indexes:
+            index.drop(engine)
+
+        started = time.perf_counter()
+        seed(engine, args.signals, args.trades)
+        print(
+            f"Seeded {args.signals} signals and {args.trades} trades "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+
+        statements = queries(args.trades)
+        before = [
+            measure(engine, statement, args.repeat) for _, statement in statements
+        ]
+
+        started = time.perf_counter()
+        for index in indexes:
+            index.create(engine)
+        print(f"Created {len(indexes)} indexes in {time.perf_counter() - started:.1f}s")
+
+        after = [
+            measure(engine, statement, args.repeat) for _, statement in statements
+        ]
+
+        for (name, _), (plan_before, ms_before), (plan_after, ms_after) in zip(
+            statements, before, after
+        ):
+            print(f"\n{name}: {ms_before:.3f} ms -> {ms_after:.3f} ms")
+            print(f"  before: {plan_before}")
+            print(f"  after:  {plan_after}")
+        print("\n(best of", args.repeat, "runs)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Signal and trade index benchmark")
+    parser.add_argument("--signals", type=int, default=1000000)
+    parser.add_argument("--trades", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=5)
+    run(parser.parse_args())
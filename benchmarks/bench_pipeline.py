@@ -0,0 +1,147 @@
+"""
+End-to-end benchmark of the webhook-to-fill pipeline on the MT5 simulator.
+
+Creates a throwaway SQLite database with a user, one trade pair and
+``--firms`` prop firms on the ``MT5SIM`` platform, then posts ``--signals``
+opening signals to ``/receiveMessage`` through the Flask test client. Every
+request goes through parsing, routing, the fan-out, the order scheduler and
+the simulated broker, and persists its trades. Reports request latency
+percentiles, throughput and how many orders were filled.
+
+Usage:
+    python -m benchmarks.bench_pipeline [--firms 4] [--signals 200]
+        [--order-latency-ms 30] [--jitter-ms 10] [--distribution lognormal]
+        [--reject-rate 0.0] [--requote-rate 0.0] [--mode inprocess|process|auto]
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import config
+
+
+def build_app(database_path: str, args):
+    uri = "sqlite:///" + database_path
+    config.Config.SQLALCHEMY_DATABASE_URI = uri
+    config.DevelopmentConfig.SQLALCHEMY_DATABASE_URI = uri
+
+    import run
+
+    app = run.flask_app
+    app.config.update(
+        ORDER_COOLDOWN_SECONDS=0,
+        IDEMPOTENCY_WINDOW_SECONDS=0,
+        MT5_EXECUTION_MODE=args.mode,
+        MT5_SIMULATOR={
+            "order_latency_ms": args.order_latency_ms,
+            "latency_jitter_ms": args.jitter_ms,
+            "latency_distribution": args.distribution,
+            "reject_rate": args.reject_rate,
+            "requote_rate": args.requote_rate,
+            "seed": 7,
+        },
+    )
+    return app
+
+
+def seed(app, firms: int):
+    from app import db
+    from app.models.prop_firm import PropFirm
+    from app.models.prop_firm_trade_pair_association import (
+        PropFirmTradePairAssociation,
+    )
+    from app.models.trade_pairs import TradePairs
+    from app.models.user import User
+
+    with app.app_context():
+        db.create_all()
+        user = User(email="bench@example.com", password="bench")
+        trade_pair = TradePairs(name="BTCUSD")
+        db.session.add_all([user, trade_pair])
+        db.session.flush()
+        for index in range(firms):
+            prop_firm = PropFirm(
+                name=f"Bench {index}",
+                full_balance=100000,
+                available_balance=100000,
+                drawdown_percentage=0,
+                platform_type="MT5SIM",
+                username=str(5000 + index),
+                password="bench",
+                ip_address="Simulator",
+            )
+            db.session.add(prop_firm)
+            db.session.flush()
+            user.prop_firms.append(prop_firm)
+            db.session.add(
+                PropFirmTradePairAssociation(
+                    prop_firm_id=prop_firm.id,
+                    trade_pair_id=trade_pair.id,
+                    label="BTCUSD",
+                )
+            )
+        db.session.commit()
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def run(args):
+    with tempfile.TemporaryDirectory() as directory:
+        app = build_app(os.path.join(directory, "bench.db"), args)
+        seed(app, args.firms)
+        client = app.test_client()
+
+        latencies = []
+        started = time.perf_counter()
+        for index in range(args.signals):
+            body = (
+                f'"strategy":"Bench {index}", "order":"buy", "contracts":"0.1", '
+                f'"ticker":"BTCUSD", "position_size":"0.1"'
+            )
+            request_started = time.perf_counter()
+            response = client.post("/receiveMessage", data=body)
+            latencies.append((time.perf_counter() - request_started) * 1000)
+            assert response.status_code == 200, response.get_data(as_text=True)
+        elapsed = time.perf_counter() - started
+
+        from app.models.trade import Trade
+        from app.trade_actions.registry import trading_registry
+
+        with app.app_context():
+            fills = Trade.query.count()
+        trading_registry.shutdown()
+
+    orders = args.signals * args.firms
+    print(f"signals:      {args.signals} x {args.firms} prop firms ({args.mode})")
+    print(f"filled:       {fills}/{orders}")
+    print(f"throughput:   {args.signals / elapsed:.1f} signals/s")
+    print(
+        "latency (ms): "
+        f"p50 {percentile(latencies, 0.5):.1f}  "
+        f"p95 {percentile(latencies, 0.95):.1f}  "
+        f"p99 {percentile(latencies, 0.99):.1f}  "
+        f"mean {statistics.mean(latencies):.1f}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Webhook to fill benchmark")
+    parser.add_argument("--firms", type=int, default=4)
+    parser.add_argument("--signals", type=int, default=200)
+    parser.add_argument("--order-latency-ms", type=float, default=30.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument(
+        "--distribution",
+        choices=["constant", "uniform", "lognormal"],
+        default="lognormal",
+    )
+    parser.add_argument("--reject-rate", type=float, default=0.0)
+    parser.add_argument("--requote-rate", type=float, default=0.0)
+    parser.add_argument("--mode", choices=["inprocess", "process", "auto"], default="inprocess")
+    run(parser.parse_args())
@@ -0,0 +1,147 @@
+"""
+Micro-benchmark of the webhook signal parser.
+
+Compares ``parse_signal`` with the historical brace-wrapping + ``json.loads``
+parsing over the message shapes we receive, after checking both produce the
+same fields. Two numbers are reported per shape:
+
+- parse: decoding the body into fields
+- request: what ``/trades`` pays, i.e. the old double ``Signal.from_mt_string``
+  (lookup, then save) against one parse plus one ``Signal`` for the save
+
+Usage:
+    python -m benchmarks.bench_signal_parser [--iterations 20000]
+"""
+
+import argparse
+import json
+import timeit
+
+from app.models.signal import Signal
+from app.models.trade import Trade  # noqa: F401 (configures Signal's mapper)
+from app.services.signal_parser import parse_signal
+
+CORPUS = [
+    # TradingView template, quoted numbers
+    '"strategy":"Stiff Zone", "order":"sell", "contracts":"0.001", '
+    '"ticker":"BTCUSDT.P", "position_size":"-0.001"',
+    # TradingView template, unquoted position size
+    '"strategy":"Stiff Zone", "order":"sell", "contracts":"0.001", '
+    '"ticker":"BTCUSDT.P", "position_size":-0.001',
+    # Unquoted numbers everywhere
+    '"strategy":"Heiken-Ashi CE LSMA [v5.1]", "order":"sell", "contracts":149.949, '
+    '"ticker":"RUNEUSDT.P", "position_size":-149.949',
+    # No spaces, upper case order
+    '"strategy":"Moving Average","order":"SELL","contracts":3.0,"ticker":"MSFT" ,'
+    '"position_size":1500.0',
+    # Single quoted keys and values
+    "'strategy':'Breakout', 'order':'buy', 'contracts':'1.0', 'ticker':'AMZN', "
+    "'position_size':'3000.0'",
+    # Flat position (close signal)
+    '"strategy":"Breakout", "order":"sell", "contracts":"1", "ticker":"AMZN", '
+    '"position_size":"0"',
+    # Plain JSON body
+    json.dumps(
+        {
+            "strategy": "Stiff Zone",
+            "order": "buy",
+            "contracts": 0.5,
+            "ticker": "ETHUSDT.P",
+            "position_size": 0.5,
+        }
+    ),
+    # Apostrophe inside a double quoted strategy name
+    '"strategy":"Tom\'s Trend", "order":"buy", "contracts":"2", '
+    '"ticker":"XAUUSD", "position_size":"2"',
+]
+
+
+def legacy_parse(mt_string: str) -> tuple:
+    """The parsing ``Signal.from_mt_string`` used to do."""
+    try:
+        formatted_string = "{" + mt_string.strip() + "}"
+        escaped_string = formatted_string.replace("'", '"')
+        data = json.loads(escaped_string)
+    except json.JSONDecodeError:
+        formatted_string = "{" + mt_string.strip() + "}"
+        data = json.loads(formatted_string)
+
+    contracts = round(float(data["contracts"]), 2)
+    return (
+        data["strategy"],
+        data["order"],
+        max(contracts, 0.01),
+        data["ticker"],
+        abs(float(data["position_size"])),
+    )
+
+
+def legacy_request(mt_string: str):
+    for _ in range(2):
+        strategy, order, contracts, ticker, position_size = legacy_parse(mt_string)
+        signal = Signal(
+            strategy=strategy,
+            order_type=order,
+            contracts=contracts,
+            ticker=ticker,
+            position_size=position_size,
+        )
+    return signal
+
+
+def fast_request(body: str):
+    return parse_signal(body).to_signal()
+
+
+def best_of(function, body: str, iterations: int) -> float:
+    """Best per-call time in microseconds over a few repeats."""
+    timings = timeit.repeat(lambda: function(body), number=iterations, repeat=5)
+    return min(timings) / iterations * 1e6
+
+
+def check_equivalence():
+    for body in CORPUS:
+        try:
+            expected = legacy_parse(body)
+        except json.JSONDecodeError:
+            # Shapes the old parser rejected (plain JSON bodies)
+            continue
+        assert tuple(parse_signal(body)) == expected, body
+
+
+def run(iterations: int):
+    check_equivalence()
+
+    print(f"{'shape':>5} {'parse old':>10} {'parse new':>10} {'req old':>10} {'req new':>10}")
+    totals = [0.0, 0.0, 0.0, 0.0]
+    for index, body in enumerate(CORPUS):
+        try:
+            legacy_parse(body)
+        except json.JSONDecodeError:
+            timings = [None, best_of(parse_signal, body, iterations)]
+            timings += [None, best_of(fast_request, body, iterations)]
+        else:
+            timings = [
+                best_of(legacy_parse, body, iterations),
+                best_of(parse_signal, body, iterations),
+                best_of(legacy_request, body, iterations),
+                best_of(fast_request, body, iterations),
+            ]
+
+        cells = []
+        for column, timing in enumerate(timings):
+            if timing is None:
+                cells.append(f"{'rejected':>10}")
+                continue
+            totals[column] += timing
+            cells.append(f"{timing:>10.2f}")
+        print(f"{index:>5} " + " ".join(cells))
+
+    print(f"{'sum':>5} " + " ".join(f"{total:>10.2f}" for total in totals))
+    print("(microseconds per call, best of 5 repeats)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Signal parser benchmark")
+    parser.add_argument("--iterations", type=int, default=5000)
+    run(parser.parse_args().iterations)
@@ -0,0 +1,147 @@
+"""
+Micro-benchmark of the strategy guessed for unknown positions.
+
+Generates ``--strategies`` strategy names and a set of broker symbols,
+checks that ``StrategyMatcher`` gives the same answer as the historical
+character loop of ``MT5Trading._find_best_matching_strategy`` for every
+symbol, then reports per symbol:
+
+- loop: the historical loop over every strategy name (without the
+  ``TradingStrategy.query.all()`` it also paid per position)
+- index: the matcher scoring the distinct character masks
+- memoized: the matcher answering a symbol it already matched
+
+Usage:
+    python -m benchmarks.bench_strategy_matcher [--strategies 5000]
+"""
+
+import argparse
+import random
+import string
+import timeit
+
+from app.services.strategy_matcher import StrategyMatcher
+
+SYMBOLS = [
+    "BTCUSD",
+    "ETHUSD",
+    "XAUUSD",
+    "EURUSD",
+    "GBPJPY",
+    "US30",
+    "NAS100",
+    "USTEC.cash",
+    "BTCUSDT.P",
+    "RUNEUSDT.P",
+    "AMZN",
+    "MSFT",
+    "",
+    "zzz",
+]
+
+WORDS = [
+    "Stiff Zone",
+    "Heiken-Ashi CE LSMA [v5.1]",
+    "Moving Average",
+    "Breakout",
+    "Tom's Trend",
+    "Scalper",
+    "Mean Reversion",
+    "RSI Divergence",
+    "Supertrend",
+    "VWAP Bounce",
+]
+
+
+def strategy_names(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    names = []
+    while len(names) < count:
+        name = rng.choice(WORDS)
+        if rng.random() < 0.5:
+            name += " " + "".join(
+                rng.choice(string.ascii_letters + string.digits)
+                for _ in range(rng.randint(2, 8))
+            )
+        name += f" #{len(names)}"
+        names.append(name)
+    return names
+
+
+def legacy_match(symbol: str, names) -> str:
+    """The loop ``_find_best_matching_strategy`` used to run."""
+    if not names:
+        return "NO_STRATEGY"
+
+    best_match = None
+    best_score = 0
+    symbol_lower = symbol.lower()
+
+    for name in names:
+        strategy_lower = name.lower()
+        common_chars = 0
+        for char in symbol_lower:
+            if char in strategy_lower:
+                common_chars += 1
+
+        score = common_chars / len(symbol_lower) if len(symbol_lower) > 0 else 0
+
+        if score > best_score:
+            best_score = score
+            best_match = name
+
+    if best_score >= 0.2 and best_match:
+        return best_match
+
+    return "NO_STRATEGY"
+
+
+def check_equivalence(names):
+    for size in (0, 1, 10, len(names)):
+        matcher = StrategyMatcher()
+        matcher.load(names[:size])
+        for symbol in SYMBOLS:
+            expected = legacy_match(symbol, names[:size])
+            assert matcher.match(symbol) == expected, (size, symbol)
+
+
+def best_of(function, iterations: int) -> float:
+    """Best per-symbol time in microseconds over a few repeats."""
+    timings = timeit.repeat(function, number=iterations, repeat=5)
+    return min(timings) / iterations / len(SYMBOLS) * 1e6
+
+
+def run(strategies: int, iterations: int):
+    names = strategy_names(strategies)
+    check_equivalence(names)
+
+    matcher = StrategyMatcher()
+    matcher.load(names)
+
+    def index():
+        matcher._matches.clear()
+        for symbol in SYMBOLS:
+            matcher.match(symbol)
+
+    def memoized():
+        for symbol in SYMBOLS:
+            matcher.match(symbol)
+
+    loop = best_of(lambda: [legacy_match(symbol, names) for symbol in SYMBOLS], iterations)
+    indexed = best_of(index, iterations)
+    cached = best_of(memoized, iterations * 100)
+    build = min(timeit.repeat(lambda: StrategyMatcher().load(names), number=1, repeat=5))
+
+    print(f"{strategies} strategies, {len(matcher._masks)} distinct character sets")
+    print(f"{'loop':>10} {'index':>10} {'memoized':>10}")
+    print(f"{loop:>10.2f} {indexed:>10.2f} {cached:>10.2f}")
+    print("(microseconds per symbol, best of 5 repeats)")
+    print(f"index built in {build * 1e3:.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Strategy matcher benchmark")
+    parser.add_argument("--strategies", type=int, default=5000)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+    run(args.strategies, args.iterations)
@@ -21,6 +21,97 @@ class Config:
     PERMANENT_SESSION_LIFETIME = 86400  # 24 hours in seconds
     SESSION_USE_SIGNER = True  # Sign the session cookie for added security
 
+    # Signal ingestion: "sync" runs the fan-out inside the webhook request,
+    # "async" only enqueues the signal and answers 202
+    SIGNAL_INGESTION_MODE = os.environ.get("SIGNAL_INGESTION_MODE", "sync")
+    SIGNAL_QUEUE_WORKERS = int(os.environ.get("SIGNAL_QUEUE_WORKERS", 4))
+    SIGNAL_QUEUE_POLL_SECONDS = 2
+    SIGNAL_QUEUE_STALE_SECONDS = 600
+
+    # Concurrent fan-out of a signal to the prop firm terminals (prop firms
+    # sharing the terminal of this process still take turns, see
+    # MT5_EXECUTION_MODE)
+    FANOUT_MAX_WORKERS = int(os.environ.get("FANOUT_MAX_WORKERS", 8))
+    FANOUT_TIMEOUT_SECONDS = 30
+
+    # Rebuild interval of the ticker routing table, covers changes made by
+    # other worker processes
+    ROUTING_TABLE_TTL_SECONDS = 60
+
+    # Repeated webhook deliveries inside this window get the original
+    # response back (0 disables the dedupe)
+    IDEMPOTENCY_WINDOW_SECONDS = int(os.environ.get("IDEMPOTENCY_WINDOW_SECONDS", 60))
+    IDEMPOTENCY_CACHE_SIZE = 1024
+
+    # "inprocess" shares this process' MetaTrader5 terminal between the prop
+    # firms: their calls take turns on one lock and one login, so the fan-out
+    # is not concurrent and the firms are not isolated. "process" gives each
+    # prop firm a worker process that stays logged in to its own terminal.
+    # "auto" picks "process" when more than one prop firm of the platform is
+    # active. It is decided once, when the adapter of a prop firm is created,
+    # so restart the workers after activating more prop firms
+    MT5_EXECUTION_MODE = os.environ.get("MT5_EXECUTION_MODE", "inprocess")
+    MT5_CALL_TIMEOUT_SECONDS = 30
+    # order_send/order_check of a worker: the worker is only restarted (and
+    # the outcome left to the next sync) once this has passed
+    MT5_ORDER_TIMEOUT_SECONDS = 120
+    # Module behind the MT5 platform type: "MetaTrader5", or "simulator" for
+    # the offline broker in app/trade_actions/mt5_simulator.py (prop firms
+    # with the MT5SIM platform type always use the simulator)
+    MT5_BACKEND = os.environ.get("MT5_BACKEND", "MetaTrader5")
+    # Keyword arguments of mt5_simulator.configure()
+    MT5_SIMULATOR: dict = {}
+
+    # Order scheduler: seconds between two opening orders of a prop firm
+    # (overridable per prop firm id), orders in flight per broker symbol and
+    # threads running the broker calls
+    ORDER_COOLDOWN_SECONDS = 60
+    ORDER_COOLDOWN_BY_PROP_FIRM: dict = {}
+    ORDER_SYMBOL_CONCURRENCY = 4
+    ORDER_SCHEDULER_WORKERS = 8
+
+    # Background refresh of the broker symbol specifications (0 disables it,
+    # symbols are then only fetched the first time they are traded)
+    SYMBOL_CATALOG_REFRESH_SECONDS = 3600
+    # Free margin and per-lot margin used to size orders are reused this long
+    # (the free margin is always refetched after an order)
+    MARGIN_CACHE_SECONDS = 5
+    # Strategy names used to guess the strategy of unknown positions are
+    # reloaded this often (the strategy routes reload them at once)
+    STRATEGY_MATCHER_REFRESH_SECONDS = 60
+    # Rows per page of the trade and signal listings, when the request sets
+    # no limit, and the most a request may ask for
+    PAGE_SIZE_DEFAULT = 100
+    PAGE_SIZE_MAX = 1000
+    # Heartbeat of the terminals of the active prop firms behind /health (0
+    # disables it, connections are then checked when asked); entries older
+    # than the stale limit are reported as stale. One worker probes, holding
+    # the health_monitor lease for the stale limit
+    HEALTH_CHECK_INTERVAL_SECONDS = 15
+    HEALTH_STALE_AFTER_SECONDS = 45
+    HEALTH_CHECK_WORKERS = 4
+    # A sync that finds the account unchanged writes nothing, but a full
+    # reconciliation still runs at least this often
+    SYNC_FULL_EVERY_SECONDS = 60
+    # Prop firms are synced concurrently, one worker per terminal; a cycle
+    # returns what it has after the deadline (below the 5s sync interval)
+    SYNC_MAX_WORKERS = 16
+    SYNC_DEADLINE_SECONDS = 4.5
+    # Overlapping sync requests join the running one; the lease of a worker
+    # that died is taken over after SYNC_LEASE_SECONDS
+    SYNC_LEASE_SECONDS = 30
+    SYNC_LEASE_POLL_SECONDS = 0.1
+    # In-app periodic sync, run by the worker holding the scheduler lease;
+    # each prop firm's interval adapts between the min and the max. It
+    # replaces the external pollers (sync_scheduler.py, tradesSync): enable
+    # it only once they are stopped
+    SYNC_SCHEDULER_ENABLED = os.environ.get("SYNC_SCHEDULER_ENABLED", "0") == "1"
+    SYNC_SCHEDULER_TICK_SECONDS = 0.5
+    SYNC_SCHEDULER_LEASE_SECONDS = 15
+    SYNC_INTERVAL_SECONDS = 5
+    SYNC_INTERVAL_MIN_SECONDS = 1
+    SYNC_INTERVAL_MAX_SECONDS = 60
+
 
 class DevelopmentConfig(Config):
     DEBUG = True
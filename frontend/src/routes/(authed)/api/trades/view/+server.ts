@@ -2,11 +2,11 @@
 import { json } from '@sveltejs/kit';
 import type { RequestHandler } from '../$types';
 
-// Get all trades
-export const GET: RequestHandler = async ({ fetch }: { fetch: any }) => {
+// One page of the listing, the query (cursor, limit, filters) is passed on
+export const GET: RequestHandler = async ({ fetch, url }: { fetch: any, url: URL }) => {
     try {
 
-        const response = await fetch(`/python/trades`);
+        const response = await fetch(`/python/trades${url.search}`);
 
         if (!response.ok) {
             throw new Error(`HTTP error! status: ${response.status}`);
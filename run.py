@@ -1,8 +1,16 @@
 from app import create_app, db
 from config import DevelopmentConfig
-from flask import jsonify, request, g, render_template
+from flask import current_app, jsonify, request, g, render_template, url_for
 from flask_migrate import Migrate
 from app.models.prop_firm import PropFirm
+from app.services.health_monitor import health_monitor
+from app.services.idempotency import idempotent
+from app.services.signal_parser import parse_request_signal
+from app.services.sync_scheduler import sync_scheduler
+from app.services.sync_stats import sync_stats
+from app.trade_actions.order_scheduler import order_scheduler
+from app.trade_actions.registry import trading_registry
+import atexit
 import os
 import signal
 import logging
@@ -64,6 +72,30 @@ request_logger.info("Logger initialization test")
 fh.flush()
 
 
+def is_async_ingestion() -> bool:
+    """The ingestion mode comes from the config, overridable per request."""
+    mode = request.args.get("mode", current_app.config["SIGNAL_INGESTION_MODE"])
+    return mode == "async"
+
+
+def enqueue_signal(signal):
+    """Queue the signal for fan-out and acknowledge it right away."""
+    from app.services.signal_queue import signal_queue
+
+    job = signal_queue.enqueue(signal)
+    return (
+        jsonify(
+            {
+                "status": "queued",
+                "signal_id": signal.id,
+                "ingestion_id": job.id,
+                "status_url": url_for("signals.signal_status", signal_id=signal.id),
+            }
+        ),
+        202,
+    )
+
+
 class FlaskApp:
     _instance = None
 
@@ -89,6 +121,25 @@ class FlaskApp:
         # Register routes
         self.register_routes()
 
+        # Background workers draining the async signal queue
+        from app.services.signal_queue import signal_queue
+
+        signal_queue.init_app(self.app)
+
+        # Background refresh of the broker symbol specifications
+        from app.services.symbol_catalog import symbol_catalog
+
+        symbol_catalog.init_app(self.app)
+
+        # Heartbeat of the terminals, /health reads its snapshot
+        health_monitor.init_app(self.app)
+
+        # Periodic sync of the prop firms, in the elected worker only
+        sync_scheduler.init_app(self.app)
+
+        # Log the terminals out when the process exits
+        atexit.register(trading_registry.shutdown)
+
         self._initialized = True
 
     def register_middleware(self):
@@ -165,23 +216,31 @@ class FlaskApp:
             return render_template("index.html")
 
         @self.app.route("/open_positions", methods=["POST"], strict_slashes=False)
+        @idempotent
         def open_positions():
             from app.routes.trades import handle_trade_with_parameters
             from app.routes.signals import save_signal
 
-            saved_signal = save_signal(request.get_data(as_text=True))
+            saved_signal = save_signal(parse_request_signal())
+            if is_async_ingestion():
+                return enqueue_signal(saved_signal)
             return handle_trade_with_parameters(saved_signal)
 
         @self.app.route("/api/trades", methods=["POST"], strict_slashes=False)
+        @idempotent
         def api_trades():
             # Used in order to create a trade from the API using an already saved signal
             from app.routes.trades import handle_trade_with_parameters
             from app.routes.signals import Signal, save_signal
 
-            signal = Signal.get_signal_by_mt_string(request.get_data(as_text=True))
+            parsed_signal = parse_request_signal()
+            signal = Signal.get_signal_by_parsed(parsed_signal)
 
             if not signal:
-                signal = save_signal(request.get_data(as_text=True))
+                signal = save_signal(parsed_signal)
+
+            if is_async_ingestion():
+                return enqueue_signal(signal)
 
             try:
                 trades_paced = handle_trade_with_parameters(signal)
@@ -196,15 +255,20 @@ class FlaskApp:
             )
 
         @self.app.route("/trades", methods=["POST"], strict_slashes=False)
+        @idempotent
         def trades():
             # Used in order to create a trade from the API using a new signal
             from app.routes.trades import handle_trade_with_parameters
             from app.routes.signals import Signal, save_signal
 
-            signal = Signal.get_signal_by_mt_string(request.get_data(as_text=True))
+            parsed_signal = parse_request_signal()
+            signal = Signal.get_signal_by_parsed(parsed_signal)
 
             if not signal:
-                signal = save_signal(request.get_data(as_text=True))
+                signal = save_signal(parsed_signal)
+
+            if is_async_ingestion():
+                return enqueue_signal(signal)
 
             try:
                 trades_paced = handle_trade_with_parameters(signal)
@@ -219,11 +283,15 @@ class FlaskApp:
             )
 
         @self.app.route("/receiveMessage", methods=["POST"], strict_slashes=False)
+        @idempotent
         def receive_message():
             from app.routes.trades import handle_trade_with_parameters
             from app.routes.signals import save_signal
 
-            saved_signal = save_signal(request.get_data(as_text=True))
+            saved_signal = save_signal(parse_request_signal())
+            if is_async_ingestion():
+                return enqueue_signal(saved_signal)
+
             try:
                 trades_paced = handle_trade_with_parameters(saved_signal)
             except Exception as e:
@@ -236,6 +304,41 @@ class FlaskApp:
                 }
             )
 
+        @self.app.route("/trades/batch", methods=["POST"])
+        def trades_batch():
+            # Several signals in one request, saved together and fanned out
+            # together, grouped per prop firm terminal
+            from app.routes.trades_association import signal_batch_results
+            from app.services.signal_parser import SignalParseError, parse_signal_batch
+            from app.services.signal_queue import signal_queue
+
+            try:
+                parsed_signals = parse_signal_batch(request.get_data(as_text=True))
+            except SignalParseError as e:
+                return jsonify({"status": "error", "message": str(e)}), 400
+
+            def enqueue(signals):
+                return [
+                    {
+                        "signal_id": job.signal_id,
+                        "status": "queued",
+                        "ingestion_id": job.id,
+                        "status_url": url_for(
+                            "signals.signal_status", signal_id=job.signal_id
+                        ),
+                    }
+                    for job in signal_queue.enqueue_many(signals)
+                ]
+
+            if is_async_ingestion():
+                results = signal_batch_results(parsed_signals, enqueue)
+                status_code = 202
+            else:
+                results = signal_batch_results(parsed_signals)
+                status_code = 200
+
+            return jsonify({"status": "success", "results": results}), status_code
+
         @self.app.route("/health", methods=["GET"])
         def health():
             prop_firms = PropFirm.query.all()
@@ -244,23 +347,24 @@ class FlaskApp:
             health_status = {"status": "healthy", "prop_firms": []}
 
             for firm in prop_firms:
-                # Check if the trading instance is connected
-                is_connected = (
-                    firm.trading is not None and firm.trading.is_connected()
-                )  # Assuming is_connected() is a method in your TradingInterface
-
+                # Served from the heartbeat snapshot, no terminal is touched
+                # unless the heartbeat is disabled
                 health_status["prop_firms"].append(
                     {
                         "id": firm.id,
                         "name": firm.name,
                         "is_active": firm.is_active,
-                        "connected": is_connected,
+                        **health_monitor.status(firm),
                     }
                 )
+            health_status["order_scheduler"] = order_scheduler.stats()
+            health_status["sync"] = sync_stats.stats()
+            health_status["sync_scheduler"] = sync_scheduler.stats()
             return jsonify(health_status)
 
         @self.app.route("/shutdown", methods=["GET"])
         def shutdown():
+            trading_registry.shutdown()
             os.kill(os.getpid(), signal.SIGINT)
             return "OK", 200
 
@@ -64,6 +64,11 @@ class PropFirmSyncScheduler:
                 result = response.json()
                 logger.info(f"Sync successful: {result.get('message', 'No message')}")
                 return result
+            elif response.status_code == 202:
+                # Run by another worker, its outcome is unknown
+                result = response.json()
+                logger.warning(f"Sync outcome unknown: {result.get('message', 'No message')}")
+                return result
             else:
                 logger.error(f"Sync failed with status {response.status_code}: {response.text}")
                 return {"success": False, "error": f"HTTP {response.status_code}"}
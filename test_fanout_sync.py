@@ -0,0 +1,195 @@
+import threading
+import unittest
+from unittest import mock
+
+from app import create_app, db
+from app.models.prop_firm import PropFirm
+from app.models.prop_firm_trade_pair_association import PropFirmTradePairAssociation
+from app.models.signal import Signal
+from app.models.trade import Trade
+from app.models.trade_pairs import TradePairs
+from app.models.user import User
+from app.routes import trades_association
+from app.services.fanout import in_flight_signals
+from app.services.routing import routing_table
+from app.trade_actions import mt5_simulator
+from app.trade_actions.registry import trading_registry
+from config import TestingConfig
+
+
+class RaceTestingConfig(TestingConfig):
+    # A sync blocked behind the fan-out's transaction gives up quickly
+    SQLALCHEMY_ENGINE_OPTIONS = {"connect_args": {"timeout": 0.2}}
+
+
+class TestFanOutSyncRace(unittest.TestCase):
+    """A sync running while a fan-out places its orders (sync scheduler,
+    external pollers) must not make the fan-out fail."""
+
+    def setUp(self):
+        self.app = create_app(RaceTestingConfig)
+        self.app.config.update(
+            MT5_EXECUTION_MODE="inprocess",
+            ORDER_COOLDOWN_SECONDS=0,
+            MT5_SIMULATOR={"order_latency_ms": 0, "volatility": 0, "seed": 7},
+        )
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.drop_all()
+        db.create_all()
+        mt5_simulator.reset()
+        routing_table.invalidate()
+
+        user = User(email="race@example.com", password="race")
+        trade_pair = TradePairs(name="BTCUSD")
+        db.session.add_all([user, trade_pair])
+        db.session.flush()
+        self.prop_firm_ids = []
+        for index in range(2):
+            prop_firm = PropFirm(
+                name=f"Race {index}",
+                full_balance=100000,
+                available_balance=100000,
+                drawdown_percentage=0,
+                platform_type="MT5SIM",
+                username=str(7000 + index),
+                password="race",
+                ip_address="Simulator",
+            )
+            db.session.add(prop_firm)
+            db.session.flush()
+            user.prop_firms.append(prop_firm)
+            db.session.add(
+                PropFirmTradePairAssociation(
+                    prop_firm_id=prop_firm.id,
+                    trade_pair_id=trade_pair.id,
+                    label="BTCUSD",
+                )
+            )
+            self.prop_firm_ids.append(prop_firm.id)
+
+        self.signal = Signal(
+            strategy="Race",
+            order_type="buy",
+            contracts=1,
+            ticker="BTCUSD",
+            position_size=1,
+        )
+        db.session.add(self.signal)
+        db.session.commit()
+        self.sync_results = {}
+
+    def tearDown(self):
+        trading_registry.shutdown()
+        routing_table.invalidate()
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _sync(self, prop_firm_id):
+        """Sync a prop firm the way the scheduler does, from another thread"""
+
+        def run():
+            with self.app.app_context():
+                try:
+                    prop_firm = db.session.get(PropFirm, prop_firm_id)
+                    self.sync_results[prop_firm_id] = prop_firm.trading.sync_prop_firm(
+                        prop_firm, force=True
+                    )
+                except Exception as e:
+                    self.sync_results[prop_firm_id] = e
+                finally:
+                    db.session.remove()
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+
+    def _place_with_sync_between_fill_and_commit(self):
+        place_firm_orders = trades_association._place_firm_orders
+
+        def place_then_sync(trading, firm_orders):
+            outcomes = place_firm_orders(trading, firm_orders)
+            self._sync(trading.prop_firm_id)
+            return outcomes
+
+        with mock.patch.object(
+            trades_association, "_place_firm_orders", place_then_sync
+        ):
+            return trades_association.place_orders([self.signal])
+
+    def _stored_trades(self):
+        return sorted(
+            (trade.prop_firm_id, trade.signal_id, trade.platform_id)
+            for trade in Trade.query.all()
+        )
+
+    def test_sync_leaves_in_flight_positions_to_the_fanout(self):
+        trades, errors = self._place_with_sync_between_fill_and_commit()
+
+        self.assertEqual(errors[self.signal.id], [])
+        self.assertEqual(len(trades[self.signal.id]), 2)
+        # The syncs saw the new positions but recorded nothing for them
+        for prop_firm_id in self.prop_firm_ids:
+            self.assertEqual(self.sync_results[prop_firm_id]["trades"], [])
+        self.assertEqual(
+            self._stored_trades(),
+            sorted(
+                (trade.prop_firm_id, self.signal.id, trade.platform_id)
+                for trade in trades[self.signal.id]
+            ),
+        )
+        self.assertEqual(Signal.query.count(), 1)
+
+        # The next sync looks at the positions again and finds their trades
+        self._sync(self.prop_firm_ids[0])
+        synced = self.sync_results[self.prop_firm_ids[0]]
+        self.assertFalse(synced["unchanged"])
+        self.assertEqual(
+            [trade["signal_id"] for trade in synced["trades"]], [self.signal.id]
+        )
+
+    def test_fanout_survives_a_sync_of_another_worker(self):
+        # The sync of another worker does not know the fan-out is running and
+        # comes right after the fan-out looked for an existing trade of the
+        # prop firm
+        update_balance = PropFirm.update_available_balance_with_trade
+
+        def update_balance_then_sync(prop_firm, signal):
+            update_balance(prop_firm, signal)
+            self._sync(prop_firm.id)
+
+        with mock.patch.object(
+            in_flight_signals, "of", return_value=set()
+        ), mock.patch.object(
+            PropFirm, "update_available_balance_with_trade", update_balance_then_sync
+        ):
+            trades, errors = trades_association.place_orders([self.signal])
+
+        self.assertEqual(errors[self.signal.id], [])
+        self.assertEqual(len(trades[self.signal.id]), 2)
+        stored = self._stored_trades()
+        self.assertEqual(len(stored), 2)
+        self.assertEqual({signal_id for _, signal_id, _ in stored}, {self.signal.id})
+        self.assertEqual(Signal.query.count(), 1)
+
+    def test_fanout_merges_a_trade_the_sync_recorded_first(self):
+        with mock.patch.object(in_flight_signals, "of", return_value=set()):
+            trades, errors = self._place_with_sync_between_fill_and_commit()
+
+        self.assertEqual(errors[self.signal.id], [])
+        self.assertEqual(len(trades[self.signal.id]), 2)
+        for prop_firm_id in self.prop_firm_ids:
+            self.assertEqual(
+                [
+                    trade["signal_id"]
+                    for trade in self.sync_results[prop_firm_id]["trades"]
+                ],
+                [self.signal.id],
+            )
+        self.assertEqual(len(self._stored_trades()), 2)
+        self.assertEqual(Signal.query.count(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
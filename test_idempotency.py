@@ -0,0 +1,132 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from flask import abort, g, jsonify
+
+from app import create_app, db
+from app.models.idempotency_key import IdempotencyKey
+from app.services.idempotency import (
+    IDEMPOTENCY_HEADER,
+    REPLAYED_HEADER,
+    idempotency_store,
+    idempotent,
+)
+from config import TestingConfig
+
+
+class TestIdempotentWebhook(unittest.TestCase):
+    SIGNAL = (
+        '"strategy":"Stiff Zone", "order":"sell", "contracts":"0.001", '
+        '"ticker":"BTCUSDT.P", "position_size":"-0.001"'
+    )
+
+    def setUp(self):
+        self.app = create_app(TestingConfig)
+        self.app.config.update(IDEMPOTENCY_WINDOW_SECONDS=60)
+        self.calls = []
+
+        @self.app.route("/webhook", methods=["POST"])
+        @idempotent
+        def webhook():
+            self.calls.append(g.get("parsed_signal"))
+            if self.fail_with is not None:
+                abort(self.fail_with)
+            return jsonify({"call": len(self.calls)}), 201
+
+        self.fail_with = None
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.client = self.app.test_client()
+        db.drop_all()
+        db.create_all()
+        idempotency_store._cache.clear()
+
+    def tearDown(self):
+        idempotency_store._cache.clear()
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _post(self, body=SIGNAL, **headers):
+        return self.client.post("/webhook", data=body, headers=headers)
+
+    def test_repeated_delivery_is_replayed(self):
+        first = self._post()
+        second = self._post(self.SIGNAL.replace(", ", ",  "))
+
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second.get_json(), first.get_json())
+        self.assertNotIn(REPLAYED_HEADER, first.headers)
+        self.assertEqual(second.headers[REPLAYED_HEADER], "true")
+
+    def test_replayed_from_the_database_by_another_worker(self):
+        self._post()
+        # The LRU of this process is empty in the other workers
+        idempotency_store._cache.clear()
+        response = self._post()
+
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(response.get_json(), {"call": 1})
+        self.assertEqual(response.headers[REPLAYED_HEADER], "true")
+
+    def test_delivery_in_progress(self):
+        with self.app.test_request_context("/webhook", method="POST", data=self.SIGNAL):
+            key = idempotency_store.request_key()
+        db.session.add(IdempotencyKey(key=key, path="/webhook"))
+        db.session.commit()
+
+        response = self._post()
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.calls, [])
+
+    def test_idempotency_key_header(self):
+        self._post(**{IDEMPOTENCY_HEADER: "a"})
+        self._post(**{IDEMPOTENCY_HEADER: "b"})
+        replayed = self._post(**{IDEMPOTENCY_HEADER: "a"})
+
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(replayed.get_json(), {"call": 1})
+
+    def test_failed_delivery_is_retried(self):
+        self.fail_with = 500
+        self.assertEqual(self._post().status_code, 500)
+        self.fail_with = None
+        response = self._post()
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(self.calls), 2)
+        self.assertNotIn(REPLAYED_HEADER, response.headers)
+
+    def test_rejected_delivery_is_retried(self):
+        self.fail_with = 400
+        self.assertEqual(self._post().status_code, 400)
+        self.fail_with = None
+        response = self._post()
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(IdempotencyKey.query.count(), 1)
+
+    def test_delivery_after_the_window_is_processed(self):
+        self._post()
+        idempotency_store._cache.clear()
+        IdempotencyKey.query.update(
+            {
+                IdempotencyKey.created_at: datetime.now(timezone.utc)
+                - timedelta(seconds=120)
+            }
+        )
+        db.session.commit()
+
+        self.assertEqual(self._post().get_json(), {"call": 2})
+
+    def test_disabled_without_a_window(self):
+        self.app.config["IDEMPOTENCY_WINDOW_SECONDS"] = 0
+        self._post()
+        self._post()
+        self.assertEqual(len(self.calls), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,166 @@
+import unittest
+from datetime import datetime, timedelta
+
+from app import create_app, db
+from app.models.prop_firm import PropFirm
+from app.models.signal import Signal
+from app.models.trade import Trade
+from app.services.pagination import PaginationError, decode_cursor, encode_cursor
+from config import TestingConfig
+
+
+class TestCursor(unittest.TestCase):
+    def test_round_trip(self):
+        keys = [Trade.created_at, Trade.signal_id]
+        values = [datetime(2024, 5, 1, 12, 30, 15, 250), 42]
+        cursor = encode_cursor(values)
+        self.assertNotIn("=", cursor)
+        self.assertEqual(decode_cursor(cursor, keys), values)
+
+    def test_invalid_cursors(self):
+        keys = [Signal.id]
+        # Not base64, not JSON, wrong number of values, not a list
+        for cursor in ["%%%", "bm90IGpzb24", encode_cursor([1, 2]), "MQ"]:
+            with self.subTest(cursor=cursor):
+                with self.assertRaises(PaginationError):
+                    decode_cursor(cursor, keys)
+
+
+class TestSignalPages(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestingConfig)
+        self.app.config.update(PAGE_SIZE_DEFAULT=4, PAGE_SIZE_MAX=6)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.client = self.app.test_client()
+        db.drop_all()
+        db.create_all()
+
+        start = datetime(2024, 1, 1)
+        for index in range(10):
+            db.session.add(
+                Signal(
+                    strategy="Even" if index % 2 == 0 else "Odd",
+                    order_type="buy",
+                    contracts=1,
+                    ticker="BTCUSD",
+                    position_size=1,
+                    created_at=start + timedelta(days=index),
+                )
+            )
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _pages(self, **args):
+        ids, cursor = [], None
+        while True:
+            query = dict(args, **({"cursor": cursor} if cursor else {}))
+            response = self.client.get("/api/signals/list", query_string=query)
+            self.assertEqual(response.status_code, 200)
+            data = response.get_json()
+            ids.append([signal["id"] for signal in data["signals"]])
+            cursor = data["next_cursor"]
+            if cursor is None:
+                return ids
+
+    def test_pages_cover_every_signal_once_newest_first(self):
+        self.assertEqual(self._pages(), [[10, 9, 8, 7], [6, 5, 4, 3], [2, 1]])
+
+    def test_limit_is_capped(self):
+        self.assertEqual(self._pages(limit=100), [[10, 9, 8, 7, 6, 5], [4, 3, 2, 1]])
+
+    def test_rows_added_meanwhile_do_not_shift_the_pages(self):
+        response = self.client.get("/api/signals/list")
+        cursor = response.get_json()["next_cursor"]
+        db.session.add(
+            Signal(
+                strategy="Late",
+                order_type="buy",
+                contracts=1,
+                ticker="BTCUSD",
+                position_size=1,
+            )
+        )
+        db.session.commit()
+        response = self.client.get("/api/signals/list", query_string={"cursor": cursor})
+        self.assertEqual(
+            [signal["id"] for signal in response.get_json()["signals"]], [6, 5, 4, 3]
+        )
+
+    def test_filters(self):
+        self.assertEqual(self._pages(strategy="Odd"), [[10, 8, 6, 4], [2]])
+        self.assertEqual(
+            self._pages(
+                created_after="2024-01-03T00:00:00+00:00",
+                created_before="2024-01-05",
+            ),
+            [[4, 3]],
+        )
+
+    def test_invalid_arguments(self):
+        for query in [
+            {"cursor": "%%%"},
+            {"limit": "0"},
+            {"limit": "ten"},
+            {"created_after": "soon"},
+        ]:
+            with self.subTest(query=query):
+                response = self.client.get("/api/signals/list", query_string=query)
+                self.assertEqual(response.status_code, 400)
+
+
+class TestTradeAssociationPages(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestingConfig)
+        self.app.config.update(PAGE_SIZE_DEFAULT=2)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.client = self.app.test_client()
+        db.drop_all()
+        db.create_all()
+
+        prop_firm = PropFirm(
+            name="Paged",
+            full_balance=100000,
+            available_balance=100000,
+            drawdown_percentage=0,
+        )
+        db.session.add(prop_firm)
+        start = datetime(2024, 1, 1)
+        for index in range(3):
+            signal = Signal(
+                strategy="Paged",
+                order_type="buy",
+                contracts=1,
+                ticker="BTCUSD",
+                position_size=1,
+                created_at=start + timedelta(days=index),
+            )
+            db.session.add(signal)
+            db.session.flush()
+            db.session.add(Trade(prop_firm_id=prop_firm.id, signal_id=signal.id))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_cursor_is_in_the_body(self):
+        first = self.client.get("/api/trades_association/").get_json()
+        self.assertEqual([trade["id"] for trade in first["trades"]], [3, 2])
+        self.assertEqual(first["trades"][0]["prop_firm"]["name"], "Paged")
+
+        second = self.client.get(
+            "/api/trades_association/", query_string={"cursor": first["next_cursor"]}
+        ).get_json()
+        self.assertEqual([trade["id"] for trade in second["trades"]], [1])
+        self.assertIsNone(second["next_cursor"])
+
+
+if __name__ == "__main__":
+    unittest.main()
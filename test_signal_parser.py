@@ -0,0 +1,115 @@
+import json
+import unittest
+
+from app.services.signal_parser import (
+    ParsedSignal,
+    SignalParseError,
+    parse_signal,
+    parse_signal_batch,
+)
+
+
+def legacy_parse(mt_string):
+    """The parsing Signal.from_mt_string used to do"""
+    try:
+        data = json.loads(("{" + mt_string.strip() + "}").replace("'", '"'))
+    except json.JSONDecodeError:
+        data = json.loads("{" + mt_string.strip() + "}")
+    return (
+        data["strategy"],
+        data["order"],
+        max(round(float(data["contracts"]), 2), 0.01),
+        data["ticker"],
+        abs(float(data["position_size"])),
+    )
+
+
+class TestSignalParser(unittest.TestCase):
+    MT_STRINGS = [
+        '"strategy":"Stiff Zone", "order":"sell", "contracts":"0.001", '
+        '"ticker":"BTCUSDT.P", "position_size":"-0.001"',
+        '"strategy":"Stiff Zone", "order":"sell", "contracts":"0.001", '
+        '"ticker":"BTCUSDT.P", "position_size":-0.001',
+        '"strategy":"Heiken-Ashi CE LSMA [v5.1]", "order":"sell", '
+        '"contracts":149.949, "ticker":"RUNEUSDT.P", "position_size":-149.949',
+        '"strategy":"Moving Average","order":"SELL","contracts":3.0,'
+        '"ticker":"MSFT" ,"position_size":1500.0',
+        "'strategy':'Breakout', 'order':'buy', 'contracts':'1.0', "
+        "'ticker':'AMZN', 'position_size':'3000.0'",
+        '"strategy":"Tom\'s Trend", "order":"buy", "contracts":"2", '
+        '"ticker":"XAUUSD", "position_size":"2"',
+        '  "strategy":"Breakout", "order":"sell", "contracts":"1", '
+        '"ticker":"AMZN", "position_size":"0"\n',
+    ]
+
+    def test_mt_strings_parse_like_the_legacy_parser(self):
+        for body in self.MT_STRINGS:
+            with self.subTest(body=body):
+                self.assertEqual(tuple(parse_signal(body)), legacy_parse(body))
+
+    def test_json_body(self):
+        body = json.dumps(
+            {
+                "strategy": "Stiff Zone",
+                "order_type": "buy",
+                "contracts": 0.004,
+                "ticker": "ETHUSDT.P",
+                "position_size": -0.5,
+            }
+        )
+        self.assertEqual(
+            parse_signal(body),
+            ParsedSignal("Stiff Zone", "buy", 0.01, "ETHUSDT.P", 0.5),
+        )
+
+    def test_invalid_bodies(self):
+        for body in [
+            "not a signal",
+            '"strategy":"a"} {"order":"buy"',
+            '{"strategy":"a"} trailing',
+            "[1, 2]",
+        ]:
+            with self.subTest(body=body):
+                with self.assertRaisesRegex(SignalParseError, "neither"):
+                    parse_signal(body)
+
+    def test_missing_field(self):
+        with self.assertRaisesRegex(SignalParseError, "ticker"):
+            parse_signal('"strategy":"a", "order":"buy", "contracts":1, "position_size":1')
+
+    def test_invalid_number(self):
+        with self.assertRaises(SignalParseError):
+            parse_signal(
+                '"strategy":"a", "order":"buy", "contracts":"many", '
+                '"ticker":"X", "position_size":1'
+            )
+
+    def test_batch_keeps_order_and_errors(self):
+        parsed = parse_signal_batch("\n".join([self.MT_STRINGS[0], "oops", ""]))
+        self.assertEqual(len(parsed), 2)
+        self.assertEqual(parsed[0].ticker, "BTCUSDT.P")
+        self.assertIsInstance(parsed[1], SignalParseError)
+
+    def test_batch_of_objects(self):
+        body = json.dumps(
+            {
+                "signals": [
+                    self.MT_STRINGS[1],
+                    {
+                        "strategy": "a",
+                        "order": "buy",
+                        "contracts": 1,
+                        "ticker": "X",
+                        "position_size": 1,
+                    },
+                    3,
+                ]
+            }
+        )
+        parsed = parse_signal_batch(body)
+        self.assertEqual([type(item) for item in parsed[:2]], [ParsedSignal] * 2)
+        self.assertIsInstance(parsed[2], SignalParseError)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import threading
+import time
+import unittest
+
+from app import create_app
+from app.services.fanout import FanOutExecutor, FanOutTimeout
+from config import TestingConfig
+
+
+class TestFanOutExecutor(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestingConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.release = threading.Event()
+
+    def tearDown(self):
+        self.release.set()
+        self.app_context.pop()
+
+    def _stuck(self):
+        self.release.wait(5)
+        return "late"
+
+    def test_results_and_errors(self):
+        def fail():
+            raise ValueError("rejected")
+
+        results = FanOutExecutor(max_workers=2).run(
+            {1: lambda: "filled", 2: fail}, timeout=1
+        )
+        self.assertEqual(results[1], "filled")
+        self.assertIsInstance(results[2], ValueError)
+
+    def test_task_behind_a_timed_out_task_gives_up(self):
+        executor = FanOutExecutor(max_workers=4)
+        first = executor.run({1: self._stuck}, timeout=0.1)
+        self.assertIsInstance(first[1], FanOutTimeout)
+
+        # The stuck task still holds the terminal of prop firm 1
+        started = time.monotonic()
+        second = executor.run({1: lambda: "filled", 2: lambda: "filled"}, timeout=0.2)
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertIsInstance(second[1], FanOutTimeout)
+        self.assertIn("busy", str(second[1]))
+        self.assertEqual(second[2], "filled")
+
+    def test_task_without_a_worker_is_cancelled(self):
+        ran = []
+        results = FanOutExecutor(max_workers=1).run(
+            {1: self._stuck, 2: lambda: ran.append(2)}, timeout=0.1
+        )
+        self.assertIn("still running", str(results[1]))
+        self.assertIn("Not started", str(results[2]))
+        self.release.set()
+        time.sleep(0.1)
+        self.assertEqual(ran, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+
+from app import create_app
+from app.trade_actions.order_scheduler import PRIORITY_CLOSE, OrderScheduler
+from config import TestingConfig
+
+FILLED = SimpleNamespace(success=True)
+
+
+class TestOrderScheduler(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestingConfig)
+        self.app.config.update(ORDER_SYMBOL_CONCURRENCY=2, ORDER_SCHEDULER_WORKERS=8)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.scheduler = OrderScheduler()
+        self.started = []
+        self.lock = threading.Lock()
+
+    def tearDown(self):
+        self.app_context.pop()
+
+    def _action(self, name, release=None, result=FILLED):
+        def action():
+            with self.lock:
+                self.started.append((name, time.monotonic()))
+            if release is not None:
+                release.wait(5)
+            return result
+
+        return action
+
+    def _started(self, name):
+        return next(at for started, at in self.started if started == name)
+
+    def test_opens_wait_for_the_cooldown_of_their_prop_firm(self):
+        first = self.scheduler.submit(1, "BTCUSD", self._action("first"), cooldown=0.3)
+        first.future.result(5)
+        filled_at = time.monotonic()
+        second = self.scheduler.submit(1, "BTCUSD", self._action("second"))
+        other = self.scheduler.submit(2, "BTCUSD", self._action("other"))
+
+        self.assertTrue(second.settled.wait(5))
+        self.assertTrue(second.deferred)
+        other.future.result(5)
+        second.future.result(5)
+        self.assertGreaterEqual(self._started("second") - filled_at, 0.25)
+        # Another prop firm is not held up by the cooldown
+        self.assertLess(self._started("other"), self._started("second"))
+
+    def test_failed_open_starts_no_cooldown(self):
+        failed = SimpleNamespace(success=False)
+        self.scheduler.submit(
+            1, "BTCUSD", self._action("first", result=failed), cooldown=5
+        ).future.result(5)
+        second = self.scheduler.submit(1, "BTCUSD", self._action("second"))
+
+        second.future.result(5)
+        self.assertFalse(second.deferred)
+
+    def test_close_runs_before_an_open_waiting_for_the_cooldown(self):
+        self.scheduler.submit(
+            1, "BTCUSD", self._action("open"), cooldown=0.3
+        ).future.result(5)
+        deferred = self.scheduler.submit(1, "ETHUSD", self._action("deferred open"))
+        close = self.scheduler.submit(
+            1, "BTCUSD", self._action("close"), priority=PRIORITY_CLOSE
+        )
+
+        close.future.result(5)
+        deferred.future.result(5)
+        self.assertEqual(
+            [name for name, _ in self.started], ["open", "close", "deferred open"]
+        )
+
+    def test_orders_in_flight_per_symbol_are_limited(self):
+        release = threading.Event()
+        orders = [
+            self.scheduler.submit(key, "BTCUSD", self._action(f"btc {key}", release))
+            for key in (1, 2, 3)
+        ]
+        eth = self.scheduler.submit(4, "ETHUSD", self._action("eth"))
+
+        eth.future.result(5)
+        time.sleep(0.05)
+        self.assertEqual(
+            sorted(name for name, _ in self.started), ["btc 1", "btc 2", "eth"]
+        )
+        self.assertTrue(self.scheduler.has_orders(3))
+        self.assertEqual(self.scheduler.stats()["depth"], 1)
+
+        release.set()
+        for order in orders:
+            order.future.result(5)
+        self.assertEqual(self.started[-1][0], "btc 3")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+import unittest
+
+from app import create_app, db
+from app.models.prop_firm import PropFirm
+from app.models.prop_firm_trade_pair_association import PropFirmTradePairAssociation
+from app.models.signal import Signal
+from app.models.trade import Trade
+from app.models.trade_pairs import TradePairs
+from app.models.user import User
+from app.routes.trades_association import signal_batch_results
+from app.services.routing import routing_table
+from app.services.signal_parser import parse_signal_batch
+from app.trade_actions import mt5_simulator
+from app.trade_actions.registry import trading_registry
+from config import TestingConfig
+
+
+def mt_string(strategy, order, ticker, position_size):
+    return (
+        f'"strategy":"{strategy}", "order":"{order}", "contracts":"1", '
+        f'"ticker":"{ticker}", "position_size":"{position_size}"'
+    )
+
+
+class TestSignalBatch(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestingConfig)
+        self.app.config.update(
+            MT5_EXECUTION_MODE="inprocess",
+            ORDER_COOLDOWN_SECONDS=0,
+            MT5_SIMULATOR={"order_latency_ms": 0, "volatility": 0, "seed": 7},
+        )
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.request_context = self.app.test_request_context()
+        self.request_context.push()
+        db.drop_all()
+        db.create_all()
+        mt5_simulator.reset()
+        routing_table.invalidate()
+
+        user = User(email="batch@example.com", password="batch")
+        db.session.add(user)
+        trade_pairs = [TradePairs(name="BTCUSD"), TradePairs(name="ETHUSD")]
+        db.session.add_all(trade_pairs)
+        db.session.flush()
+        prop_firm = PropFirm(
+            name="Batch",
+            full_balance=100000,
+            available_balance=100000,
+            drawdown_percentage=0,
+            platform_type="MT5SIM",
+            username="7100",
+            password="batch",
+            ip_address="Simulator",
+        )
+        db.session.add(prop_firm)
+        db.session.flush()
+        user.prop_firms.append(prop_firm)
+        for trade_pair in trade_pairs:
+            db.session.add(
+                PropFirmTradePairAssociation(
+                    prop_firm_id=prop_firm.id,
+                    trade_pair_id=trade_pair.id,
+                    label=trade_pair.name,
+                )
+            )
+        db.session.commit()
+        self.prop_firm_id = prop_firm.id
+
+    def tearDown(self):
+        trading_registry.shutdown()
+        routing_table.invalidate()
+        db.session.remove()
+        db.drop_all()
+        self.request_context.pop()
+        self.app_context.pop()
+
+    def _batch(self, *lines, place=None):
+        parsed = parse_signal_batch("\n".join(lines))
+        if place is None:
+            return signal_batch_results(parsed)
+        return signal_batch_results(parsed, place)
+
+    def test_results_follow_the_input_with_parse_errors_in_place(self):
+        results = self._batch(
+            mt_string("Batch", "buy", "BTCUSD", 1),
+            "not a signal",
+            mt_string("Batch", "buy", "ETHUSD", 1),
+            '"strategy":"Batch", "order":"buy"',
+        )
+
+        self.assertEqual([result["index"] for result in results], [0, 1, 2, 3])
+        self.assertEqual(
+            [result["status"] for result in results],
+            ["success", "error", "success", "error"],
+        )
+        self.assertIn("contracts", results[3]["errors"][0])
+        signals = Signal.query.order_by(Signal.id).all()
+        self.assertEqual([signal.ticker for signal in signals], ["BTCUSD", "ETHUSD"])
+        self.assertEqual(
+            [results[0]["signal_id"], results[2]["signal_id"]],
+            [signal.id for signal in signals],
+        )
+        for result in (results[0], results[2]):
+            self.assertEqual(result["errors"], [])
+            self.assertEqual(
+                [trade["prop_firm_id"] for trade in result["trades"]],
+                [self.prop_firm_id],
+            )
+
+    def test_closing_signals_keep_their_position(self):
+        self._batch(mt_string("Batch", "buy", "BTCUSD", 1))
+        results = self._batch(
+            mt_string("Batch", "buy", "ETHUSD", 1),
+            mt_string("Batch", "sell", "BTCUSD", 0),
+        )
+
+        self.assertEqual([result["status"] for result in results], ["success"] * 2)
+        closing = db.session.get(Signal, results[1]["signal_id"])
+        self.assertEqual((closing.ticker, closing.position_size), ("BTCUSD", 0))
+        self.assertEqual(len(results[1]["trades"]), 1)
+        self.assertEqual(
+            {trade.signal.ticker for trade in Trade.query.all()}, {"ETHUSD"}
+        )
+
+    def test_outcomes_are_matched_to_the_signals_in_order(self):
+        placed = []
+
+        def place(signals):
+            placed.append([signal.ticker for signal in signals])
+            return [
+                {"signal_id": signal.id, "status": "queued"} for signal in signals
+            ]
+
+        results = self._batch(
+            "oops",
+            mt_string("Batch", "buy", "ETHUSD", 1),
+            mt_string("Batch", "buy", "BTCUSD", 1),
+            place=place,
+        )
+
+        self.assertEqual(placed, [["ETHUSD", "BTCUSD"]])
+        self.assertEqual(results[0]["status"], "error")
+        self.assertEqual(
+            [db.session.get(Signal, result["signal_id"]).ticker for result in results[1:]],
+            ["ETHUSD", "BTCUSD"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,186 @@
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from app import create_app, db
+from app.models.sync_lease import SyncLease
+from app.services.single_flight import (
+    _FAILED,
+    SingleFlight,
+    SingleFlightError,
+    single_flight,
+)
+from config import TestingConfig
+
+
+class TestSingleFlight(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestingConfig)
+        self.app.config.update(SYNC_LEASE_SECONDS=30, SYNC_LEASE_POLL_SECONDS=0.01)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.drop_all()
+        db.create_all()
+        self.flight = SingleFlight()
+        self.calls = 0
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _job(self, result="synced", release=None):
+        def job():
+            self.calls += 1
+            if release is not None:
+                release.wait(5)
+            return result
+
+        return job
+
+    def _in_thread(self, name, job):
+        outcome = {}
+
+        def target():
+            with self.app.app_context():
+                try:
+                    outcome["value"] = self.flight.run(name, job)
+                except Exception as e:
+                    outcome["error"] = e
+                finally:
+                    db.session.remove()
+
+        thread = threading.Thread(target=target)
+        thread.start()
+        return thread, outcome
+
+    def _held_by_another_worker(self, name, expires_in=30):
+        db.session.add(
+            SyncLease(
+                name=name,
+                owner="elsewhere:1",
+                expires_at=datetime.now(timezone.utc) + timedelta(seconds=expires_in),
+                coalesced=0,
+            )
+        )
+        db.session.commit()
+
+    def _finish_elsewhere(self, name, result):
+        # Waiters only accept results finished after their request
+        time.sleep(0.05)
+        db.session.query(SyncLease).filter_by(name=name).update(
+            {
+                SyncLease.owner: None,
+                SyncLease.expires_at: None,
+                SyncLease.finished_at: datetime.now(timezone.utc),
+                SyncLease.result: result,
+            }
+        )
+        db.session.commit()
+
+    def test_callers_join_the_running_flight(self):
+        release = threading.Event()
+        leader, leader_outcome = self._in_thread("all", self._job(release=release))
+        while self.calls == 0:
+            time.sleep(0.01)
+        follower, follower_outcome = self._in_thread("all", self._job())
+        time.sleep(0.05)
+        release.set()
+        leader.join(5)
+        follower.join(5)
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(leader_outcome["value"], ("synced", False))
+        self.assertEqual(follower_outcome["value"], ("synced", True))
+        self.assertEqual(self.flight.stats()["by_name"]["all"]["coalesced"], 1)
+
+    def test_result_of_another_worker_is_shared(self):
+        self._held_by_another_worker("all")
+        waiter, outcome = self._in_thread("all", self._job())
+        self._finish_elsewhere("all", {"success": True, "synced": 2})
+        waiter.join(5)
+
+        self.assertEqual(self.calls, 0)
+        self.assertEqual(outcome["value"], ({"success": True, "synced": 2}, True))
+
+    def test_failure_of_another_worker_is_raised(self):
+        self._held_by_another_worker("all")
+        waiter, outcome = self._in_thread("all", self._job())
+        self._finish_elsewhere("all", {_FAILED: "terminal gone"})
+        waiter.join(5)
+
+        self.assertEqual(self.calls, 0)
+        self.assertIsInstance(outcome["error"], SingleFlightError)
+        self.assertIn("terminal gone", str(outcome["error"]))
+
+    def test_failure_is_stored_as_one(self):
+        def job():
+            raise RuntimeError("terminal gone")
+
+        with self.assertRaises(RuntimeError):
+            self.flight.run("all", job)
+        lease = db.session.get(SyncLease, "all")
+        self.assertEqual(lease.result, {_FAILED: "terminal gone"})
+        self.assertIsNone(lease.owner)
+
+    def test_expired_lease_is_taken_over(self):
+        self._held_by_another_worker("all", expires_in=-1)
+
+        self.assertEqual(self.flight.run("all", self._job()), ("synced", False))
+        self.assertEqual(self.calls, 1)
+        self.assertIsNone(db.session.get(SyncLease, "all").owner)
+
+    def test_lease_is_renewed_while_running(self):
+        self.app.config["SYNC_LEASE_SECONDS"] = 0.3
+        expiries = []
+
+        def job():
+            for _ in range(3):
+                expiries.append(
+                    db.session.query(SyncLease.expires_at).filter_by(name="all").scalar()
+                )
+                time.sleep(0.25)
+            return "synced"
+
+        self.assertEqual(self.flight.run("all", job), ("synced", False))
+        self.assertLess(expiries[0], expiries[-1])
+        # Still leased once its first expiry has passed
+        self.assertGreater(expiries[-1] - expiries[0], timedelta(seconds=0.3))
+
+
+class TestSyncAllRoute(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestingConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.client = self.app.test_client()
+        db.drop_all()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_unknown_result_is_not_reported_as_success(self):
+        with mock.patch.object(single_flight, "run", return_value=(None, True)):
+            response = self.client.post("/api/prop_firms/sync_public", json={})
+
+        self.assertEqual(response.status_code, 202)
+        data = response.get_json()
+        self.assertEqual(data["status"], "unknown")
+        self.assertIsNot(data["success"], True)
+
+    def test_failure_of_another_worker_is_an_error(self):
+        error = SingleFlightError("terminal gone")
+        with mock.patch.object(single_flight, "run", side_effect=error):
+            response = self.client.post("/api/prop_firms/sync_public", json={})
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.get_json()["success"], False)
+
+
+if __name__ == "__main__":
+    unittest.main()
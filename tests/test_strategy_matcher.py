@@ -0,0 +1,110 @@
+import random
+import string
+import unittest
+
+from app import create_app, db
+from app.models.trading_strategy import TradingStrategy
+from app.services.strategy_matcher import NO_STRATEGY, StrategyMatcher
+from config import TestingConfig
+
+
+def legacy_match(symbol, names):
+    """The loop MT5Trading._find_best_matching_strategy used to run"""
+    if not names:
+        return NO_STRATEGY
+
+    best_match = None
+    best_score = 0
+    symbol_lower = symbol.lower()
+    for name in names:
+        strategy_lower = name.lower()
+        common_chars = sum(1 for char in symbol_lower if char in strategy_lower)
+        score = common_chars / len(symbol_lower) if symbol_lower else 0
+        if score > best_score:
+            best_score = score
+            best_match = name
+
+    if best_score >= 0.2 and best_match:
+        return best_match
+    return NO_STRATEGY
+
+
+class TestStrategyMatcher(unittest.TestCase):
+    SYMBOLS = [
+        "BTCUSD",
+        "XAUUSD",
+        "EURUSD",
+        "US30",
+        "NAS100",
+        "USTEC.cash",
+        "BTCUSDT.P",
+        "AMZN",
+        "zzz",
+        "Q",
+        "",
+    ]
+    NAMES = [
+        "Stiff Zone",
+        "Heiken-Ashi CE LSMA [v5.1]",
+        "Moving Average",
+        "Breakout",
+        "Tom's Trend",
+        # Same characters as an earlier name: the first one wins the tie
+        "Trend Tom's",
+        "BTC scalper",
+        "VWAP Bounce",
+        "US30 Open",
+    ]
+
+    def _assert_like_the_legacy_loop(self, names, symbols):
+        matcher = StrategyMatcher()
+        matcher.load(names)
+        for symbol in symbols:
+            with self.subTest(symbol=symbol, names=len(names)):
+                self.assertEqual(matcher.match(symbol), legacy_match(symbol, names))
+
+    def test_same_answers_as_the_legacy_loop(self):
+        for size in range(len(self.NAMES) + 1):
+            self._assert_like_the_legacy_loop(self.NAMES[:size], self.SYMBOLS)
+
+    def test_same_answers_on_generated_names(self):
+        rng = random.Random(7)
+        alphabet = string.ascii_letters + string.digits + " .#"
+        names = [
+            "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 12)))
+            for _ in range(300)
+        ]
+        symbols = [
+            "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 10)))
+            for _ in range(200)
+        ]
+        self._assert_like_the_legacy_loop(names, symbols + self.SYMBOLS)
+
+    def test_strategies_are_loaded_in_id_order_and_reloaded_when_invalidated(self):
+        app = create_app(TestingConfig)
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+            try:
+                db.session.add_all(
+                    [
+                        TradingStrategy(name="Trend Tom's"),
+                        TradingStrategy(name="Tom's Trend"),
+                    ]
+                )
+                db.session.commit()
+                matcher = StrategyMatcher()
+                self.assertEqual(matcher.match("TTS"), "Trend Tom's")
+
+                db.session.add(TradingStrategy(name="BTC scalper"))
+                db.session.commit()
+                self.assertEqual(matcher.match("BTCUSD"), "Trend Tom's")
+                matcher.invalidate()
+                self.assertEqual(matcher.match("BTCUSD"), "BTC scalper")
+            finally:
+                db.session.remove()
+                db.drop_all()
+
+
+if __name__ == "__main__":
+    unittest.main()
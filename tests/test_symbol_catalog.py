@@ -0,0 +1,68 @@
+import unittest
+from unittest import mock
+
+from app import create_app, db
+from app.models.prop_firm import PropFirm
+from app.models.prop_firm_trade_pair_association import PropFirmTradePairAssociation
+from app.models.user import User
+from app.services.symbol_catalog import symbol_catalog
+from app.trade_actions.order_scheduler import order_scheduler
+from config import TestingConfig
+
+
+class TestSymbolCatalogRefresh(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestingConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.drop_all()
+        db.create_all()
+        user = User(email="catalog@example.com", password="catalog")
+        for name in ["Idle", "Busy"]:
+            prop_firm = PropFirm(
+                name=name,
+                full_balance=100000,
+                available_balance=100000,
+                drawdown_percentage=0,
+                is_active=True,
+            )
+            user.prop_firms.append(prop_firm)
+            db.session.add(prop_firm)
+        db.session.add(user)
+        db.session.commit()
+        self.idle, self.busy = [prop_firm.id for prop_firm in user.prop_firms]
+        for prop_firm_id in (self.idle, self.busy):
+            db.session.add(
+                PropFirmTradePairAssociation(
+                    prop_firm_id=prop_firm_id, label="EURUSD", trade_pair_id=1
+                )
+            )
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_prop_firms_placing_orders_are_skipped(self):
+        refreshed = []
+
+        def trading(prop_firm):
+            def refresh_symbol_specs(labels):
+                refreshed.append(prop_firm.id)
+                return labels
+
+            return mock.Mock(refresh_symbol_specs=refresh_symbol_specs)
+
+        with mock.patch.object(PropFirm, "trading", property(trading)), mock.patch.object(
+            order_scheduler,
+            "has_orders",
+            side_effect=lambda prop_firm_id: prop_firm_id == self.busy,
+        ):
+            symbol_catalog.refresh()
+
+        self.assertEqual(refreshed, [self.idle])
+
+
+if __name__ == "__main__":
+    unittest.main()
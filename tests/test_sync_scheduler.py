@@ -0,0 +1,117 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from app import create_app, db
+from app.models.prop_firm import PropFirm
+from app.models.sync_lease import SyncLease
+from app.models.user import User
+from app.services import prop_firm_sync
+from app.services.sync_scheduler import SyncScheduler
+from config import TestingConfig
+
+
+class FakeSynchronizer:
+    def __init__(self):
+        self.synced = []
+        self.positions_key = "a"
+        self.profit = 0
+
+    def refresh_active(self):
+        pass
+
+    def sync(self, prop_firm_ids):
+        self.synced.append(list(prop_firm_ids))
+        # Open positions make the fingerprint change on every sync
+        self.profit += 1
+        return {
+            prop_firm_id: {
+                "fingerprint": f"profit {self.profit}",
+                "positions_key": self.positions_key,
+            }
+            for prop_firm_id in prop_firm_ids
+        }, {}
+
+
+class TestSyncScheduler(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestingConfig)
+        self.app.config.update(
+            SYNC_INTERVAL_SECONDS=5,
+            SYNC_INTERVAL_MIN_SECONDS=1,
+            SYNC_INTERVAL_MAX_SECONDS=60,
+        )
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.drop_all()
+        db.create_all()
+        prop_firm = PropFirm(
+            name="Scheduled",
+            full_balance=100000,
+            available_balance=100000,
+            drawdown_percentage=0,
+            is_active=True,
+        )
+        user = User(email="scheduler@example.com", password="scheduler")
+        user.prop_firms.append(prop_firm)
+        db.session.add_all([user, prop_firm])
+        db.session.commit()
+        self.prop_firm_id = prop_firm.id
+
+        self.scheduler = SyncScheduler()
+        self.scheduler._app = self.app
+        self.synchronizer = FakeSynchronizer()
+        patcher = mock.patch.object(
+            prop_firm_sync, "prop_firm_synchronizer", self.synchronizer
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _run_now(self):
+        schedule = self.scheduler._schedules.get(self.prop_firm_id)
+        if schedule is not None:
+            schedule.next_due = 0
+        self.scheduler.run_due()
+        return self.scheduler._schedules[self.prop_firm_id]
+
+    def test_backs_off_while_only_profit_moves(self):
+        intervals = [self._run_now().interval for _ in range(6)]
+        self.assertEqual(intervals, [10, 20, 40, 60, 60, 60])
+
+    def test_changed_positions_sync_fast_then_back_off(self):
+        self._run_now()
+        self.synchronizer.positions_key = "b"
+        schedule = self._run_now()
+        self.assertEqual((schedule.interval, schedule.last_status), (1, "changing"))
+        self.assertEqual([self._run_now().interval for _ in range(3)], [2, 4, 8])
+
+    def test_fanout_of_another_worker_holds_the_sync(self):
+        now = datetime.now(timezone.utc)
+        db.session.add(
+            SyncLease(
+                name=f"in_flight:{self.prop_firm_id}:other-host:1",
+                owner="other-host:1",
+                expires_at=now + timedelta(seconds=60),
+                result=[7],
+                coalesced=0,
+            )
+        )
+        db.session.commit()
+        schedule = self._run_now()
+        self.assertEqual(self.synchronizer.synced, [])
+        self.assertEqual(schedule.last_status, "orders_in_flight")
+
+        # Expired, the worker died
+        SyncLease.query.update({SyncLease.expires_at: now - timedelta(seconds=1)})
+        db.session.commit()
+        self._run_now()
+        self.assertEqual(self.synchronizer.synced, [[self.prop_firm_id]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+
+from app import create_app, db
+from app.models.prop_firm import PropFirm
+from app.models.signal import Signal
+from app.models.trade import Trade
+from config import TestingConfig
+
+
+class TestDeleteStale(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestingConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.drop_all()
+        db.create_all()
+
+        prop_firms = [
+            PropFirm(
+                name=name,
+                full_balance=100000,
+                available_balance=100000,
+                drawdown_percentage=0,
+            )
+            for name in ("Synced", "Other")
+        ]
+        signals = [
+            Signal(
+                strategy="Stale",
+                order_type="buy",
+                contracts=1,
+                ticker="BTCUSD",
+                position_size=1,
+            )
+            for _ in range(4)
+        ]
+        db.session.add_all(prop_firms + signals)
+        db.session.flush()
+        self.prop_firm_id, self.other_id = [prop_firm.id for prop_firm in prop_firms]
+        self.signal_ids = [signal.id for signal in signals]
+        # Open, closed, closed, without a ticket, and a trade of another firm
+        for signal_id, ticket in zip(self.signal_ids, ["100", "101", "102", None]):
+            db.session.add(
+                Trade(
+                    prop_firm_id=self.prop_firm_id,
+                    signal_id=signal_id,
+                    platform_id=ticket,
+                )
+            )
+        db.session.add(
+            Trade(
+                prop_firm_id=self.other_id,
+                signal_id=self.signal_ids[1],
+                platform_id="101",
+            )
+        )
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _remaining(self):
+        return sorted(
+            (trade.prop_firm_id, trade.signal_id) for trade in Trade.query.all()
+        )
+
+    def test_returns_the_deleted_signal_ids(self):
+        deleted = Trade.delete_stale(self.prop_firm_id, ["100", "100", "999"])
+        db.session.commit()
+
+        self.assertEqual(sorted(deleted), self.signal_ids[1:])
+        # The other prop firm keeps its trade of the same ticket
+        self.assertEqual(
+            self._remaining(),
+            [
+                (self.prop_firm_id, self.signal_ids[0]),
+                (self.other_id, self.signal_ids[1]),
+            ],
+        )
+
+    def test_keeps_the_trades_without_a_ticket(self):
+        deleted = Trade.delete_stale(self.prop_firm_id, ["100"], keep_untracked=True)
+
+        self.assertEqual(sorted(deleted), self.signal_ids[1:3])
+        self.assertIn((self.prop_firm_id, self.signal_ids[3]), self._remaining())
+
+    def test_no_open_ticket_deletes_every_trade_of_the_firm(self):
+        deleted = Trade.delete_stale(self.prop_firm_id, [])
+
+        self.assertEqual(sorted(deleted), self.signal_ids)
+        self.assertEqual(len(self._remaining()), 1)
+
+    def test_nothing_is_committed(self):
+        Trade.delete_stale(self.prop_firm_id, [])
+        db.session.rollback()
+
+        self.assertEqual(len(self._remaining()), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()